@@ -1,10 +1,14 @@
 import os
 from dotenv import load_dotenv
-from supabase import create_client, Client
+from supabase import create_client, Client, ClientOptions
 
 load_dotenv()
 
 url: str = os.environ.get("SUPABASE_URL")
 key: str = os.environ.get("SUPABASE_KEY")
+# Deadline of every database call, in seconds
+timeout: float = float(os.environ.get("SUPABASE_TIMEOUT", "5"))
 
-supabase: Client = create_client(url, key)
+supabase: Client = create_client(
+    url, key, options=ClientOptions(postgrest_client_timeout=timeout)
+)
@@ -1,6 +1,13 @@
+import threading
+
 import bcrypt
 from fastapi import HTTPException
 from config import supabase
+from utils.attendance_stats import STATS_COLUMNS, attendance_stats
+from utils.attendee_search import SEARCH_COLUMNS, attendee_index
+from utils.emails import known_emails
+from utils.resilience import guarded, resilient_read
+from utils.ticket_refs import allocate_ticket_reference, ticket_refs
 
 
 
@@ -13,6 +20,7 @@ def mask_fixed_ends(value: str, stars: int = 3, keep_start: int = 2, keep_end: i
 
 
 
+@resilient_read(stale=True)
 def get_sponsorteirs():
     """
     Fetch all sponsor tiers from the database.
@@ -30,6 +38,7 @@ def get_sponsorteirs():
     
     return data
 
+@resilient_read
 def get_sponsortirtbytitle(title):
     """
     Fetch a specific sponsor tier by its title.
@@ -46,6 +55,7 @@ def get_sponsortirtbytitle(title):
     
     return data[0]
 
+@resilient_read
 def get_something_email(table, email):
     """
     Fetch a specific entry by email from a given table.
@@ -62,6 +72,7 @@ def get_something_email(table, email):
         data[0]["phone"] = mask_fixed_ends(data[0]["phone"])
     return data[0]
 
+@resilient_read
 def get_something_by_field(table, field, value):
     """
     Fetch a specific entry by a given field and value from a specified table.
@@ -82,6 +93,7 @@ def get_something_by_field(table, field, value):
             entry["password"] = "******************"
     return data
 
+@resilient_read
 def get_something_by_email_firstname_lastname(table, email, firstname, lastname):
     """
     Fetch a specific entry by email, first name, and last name from a given table.
@@ -97,6 +109,211 @@ def get_something_by_email_firstname_lastname(table, email, firstname, lastname)
     return data[0]
 
 
+@guarded
+def get_existing_values(table, field, values, chunk_size=200):
+    """
+    Return the subset of values already present in a field of a table,
+    using one "in" query per chunk instead of one query per value.
+    """
+    values = list(values)
+    existing = set()
+    for start in range(0, len(values), chunk_size):
+        response = (
+            supabase.table(table)
+            .select(field)
+            .in_(field, values[start:start + chunk_size])
+            .execute()
+        )
+        existing.update(entry[field] for entry in response.data)
+    return existing
+
+@resilient_read
+def _columns_page(table, columns, start, page_size, order, since):
+    query = supabase.table(table).select(*columns)
+    if since is not None:
+        query = query.gte(order, since)
+    response = (
+        query
+        .order(order, desc=False)
+        .range(start, start + page_size - 1)
+        .execute()
+    )
+    return response.data
+
+def iter_columns_paged(table, *columns, page_size=1000, order="created_at", since=None):
+    """
+    Yield the given columns of every row, one page at a time, so tables
+    larger than the API row limit are read completely without holding them
+    in memory. With since, only the rows whose order field is at or after it.
+    """
+    start = 0
+    while True:
+        page = _columns_page(table, columns, start, page_size, order, since)
+        yield from page
+        if len(page) < page_size:
+            return
+        start += page_size
+
+
+def get_columns_paged(table, *columns, page_size=1000):
+    """
+    Get the given columns of every row of a table.
+    """
+    return list(iter_columns_paged(table, *columns, page_size=page_size))
+
+
+def get_column_values(table, field, page_size=1000):
+    """
+    Get every value of a single column of a table.
+    """
+    return [entry[field] for entry in get_columns_paged(table, field, page_size=page_size)]
+
+
+@guarded
+def get_registration_changes(since_xid, since_seq, limit):
+    """
+    Get the registrations changed or deleted after a (transaction id,
+    change sequence number) cursor, oldest first, with the horizon the
+    next cursor may move to. See migrations/008_registrations_change_horizon.sql.
+    """
+    response = supabase.rpc(
+        "registration_changes",
+        {"since_xid": str(since_xid), "since_seq": since_seq, "max_rows": limit},
+    ).execute()
+    return response.data
+
+
+@resilient_read
+def exists_where(table, field, value):
+    """
+    Check if an entry exists where a field matches a value, fetching only its id.
+    """
+    response = (
+        supabase.table(table)
+        .select("id")
+        .eq(field, value)
+        .limit(1)
+        .execute()
+    )
+    return len(response.data) > 0
+
+
+def registration_email_exists(email_normalized):
+    """
+    Check if an attendee is already registered with a normalized email.
+
+    Answered from the in-process set of known emails when it is warm, with an
+    id-only query on the indexed email_normalized column otherwise.
+    """
+    if not known_emails.warm:
+        try:
+            known_emails.load(get_column_values("registrations", "email_normalized"))
+        except Exception as e:
+            print(f"Failed to load known emails: {e}")
+            return exists_where("registrations", "email_normalized", email_normalized)
+    return email_normalized in known_emails
+
+
+def _load_ticket_refs():
+    if not ticket_refs.warm:
+        ticket_refs.load(get_columns_paged("registrations", "id", "ticket_ref"))
+
+
+@resilient_read
+def _registration_id_by_ref_query(ref):
+    response = (
+        supabase.table("registrations").select("id").eq("ticket_ref", ref).execute()
+    )
+    return response.data[0]["id"] if response.data else None
+
+
+def registration_id_by_ref(ref):
+    """
+    Get the id of the registration holding a ticket reference.
+
+    Answered from the in-process map when it knows the reference, with a
+    query otherwise: the reference may have been allocated by another
+    instance, or after the map was loaded.
+    """
+    try:
+        _load_ticket_refs()
+    except Exception as e:
+        print(f"Failed to load ticket references: {e}")
+        return _registration_id_by_ref_query(ref)
+    registration_id = ticket_refs.get(ref)
+    if registration_id is None:
+        registration_id = _registration_id_by_ref_query(ref)
+        if registration_id is not None:
+            ticket_refs.add(ref, registration_id)
+    return registration_id
+
+
+_attendee_index_reload = threading.Lock()
+
+
+def _reload_attendee_index():
+    try:
+        attendee_index.load(iter_columns_paged("registrations", *SEARCH_COLUMNS))
+    except Exception as e:
+        print(f"Failed to reload the attendee search index: {e}")
+    finally:
+        _attendee_index_reload.release()
+
+
+def load_attendee_index():
+    """
+    Build the attendee search index if it is cold, or start reloading it in
+    the background if it is stale. Only one load runs at a time: cold
+    callers wait for it, while a stale index keeps being served.
+    """
+    if attendee_index.warm:
+        return
+    if attendee_index.loaded:
+        if _attendee_index_reload.acquire(blocking=False):
+            threading.Thread(target=_reload_attendee_index, name="attendee-index", daemon=True).start()
+        return
+    with _attendee_index_reload:
+        if not attendee_index.loaded:
+            attendee_index.load(iter_columns_paged("registrations", *SEARCH_COLUMNS))
+
+
+def search_registrations(query, limit):
+    """
+    Search registrations by partial name, organization or ticket reference.
+    """
+    load_attendee_index()
+    return attendee_index.search(query, limit)
+
+
+def reconcile_attendance_stats():
+    """
+    Recount the attendance statistics from the registrations table.
+    """
+    drift = attendance_stats.load(iter_columns_paged("registrations", *STATS_COLUMNS))
+    if drift:
+        print(f"Attendance statistics drifted on: {', '.join(drift)}")
+
+
+def new_ticket_reference():
+    """
+    Allocate a ticket reference no registration holds yet.
+    """
+    try:
+        _load_ticket_refs()
+        is_taken = ticket_refs.__contains__
+    except Exception as e:
+        print(f"Failed to load ticket references: {e}")
+        is_taken = lambda ref: exists_where("registrations", "ticket_ref", ref)
+    return allocate_ticket_reference(is_taken)
+
+
+def is_unique_violation(error):
+    """
+    Tell if an exception raised by an insert comes from a unique constraint.
+    """
+    return getattr(error, "code", None) == "23505" or "23505" in str(error)
+
+@guarded
 def insert_something(table, data):
     """
     Insert a new entry into a specified table.
@@ -109,6 +326,36 @@ def insert_something(table, data):
         print(f"Failed to insert data: {response.error}")
         return False
 
+@guarded
+def upsert_something(table, data, on_conflict):
+    """
+    Insert or update one or many entries in a specified table, in a single
+    statement, using the unique columns listed in on_conflict.
+    """
+    response = (
+        supabase.table(table)
+        .upsert(data, on_conflict=on_conflict)
+        .execute()
+    )
+    if response:
+        return True
+    else:
+        print(f"Failed to upsert data: {response.error}")
+        return False
+
+@guarded
+def get_columns_by_id(table, id, *columns):
+    """
+    Current values of some columns of an entry, read from the database and
+    never from a cache. Returns None when the entry does not exist.
+    """
+    response = supabase.table(table).select(",".join(columns)).eq("id", id).limit(1).execute()
+    if len(response.data) == 0:
+        return None
+    return response.data[0]
+
+
+@guarded
 def update_something(table, id, data):
     """
     Update an existing entry in a specified table by its ID.
@@ -120,6 +367,32 @@ def update_something(table, id, data):
         
         return False
 
+@guarded
+def update_where_in(table, field, values, data, chunk_size=200, **conditions):
+    """
+    Update every entry of a table whose field is one of the given values,
+    and whose other fields match the given conditions, with one statement
+    per chunk. Returns the updated entries.
+
+    A False condition also matches NULL, flags like foodchecked are not
+    set at registration.
+    """
+    values = list(values)
+    updated = []
+    for start in range(0, len(values), chunk_size):
+        query = supabase.table(table).update(data).in_(field, values[start:start + chunk_size])
+        for condition_field, condition_value in conditions.items():
+            if condition_value is False:
+                query = query.not_.is_(condition_field, "true")
+            else:
+                query = query.eq(condition_field, condition_value)
+        response = query.execute()
+        if not response:
+            return False
+        updated.extend(response.data)
+    return updated
+
+@resilient_read
 def get_everything(table):
     """
     Get everything in a particular table
@@ -140,10 +413,18 @@ def get_everything(table):
             entry["password"] = "******************"
     return data
 
-def get_everything_where(table, field, value):
+@resilient_read
+def get_everything_columns(table, *columns):
     """
-    Get everything in a particular table where a specific field matches a value
+    Get only the given columns of every row in a particular table
     """
+    response = supabase.table(table).select(*columns).execute()
+    data = response.data
+    if len(data) == 0:
+        return False
+    return data
+
+def _everything_where(table, field, value):
     response = (
             supabase.table(table)
             .select("*")
@@ -166,6 +447,25 @@ def get_everything_where(table, field, value):
 
     return data
 
+
+@resilient_read
+def get_everything_where(table, field, value):
+    """
+    Get everything in a particular table where a specific field matches a value
+    """
+    return _everything_where(table, field, value)
+
+
+@resilient_read(stale=True)
+def get_public_where(table, field, value):
+    """
+    Same as get_everything_where, for the public pages: served from the last
+    good result, flagged as stale, when the database is unavailable.
+    """
+    return _everything_where(table, field, value)
+
+
+@resilient_read
 def get_something_where(table, field, value):
     """
     Get everything in a particular table where a specific field matches a value
@@ -182,6 +482,7 @@ def get_something_where(table, field, value):
         return {"message": "Multiple entries found, please refine your query"}
     return data[0]
 
+@resilient_read
 def get_something_where_two_fields(table, field1, value1, field2, value2):
     """
     Get everything in a particular table where two specific fields match their respective values
@@ -210,6 +511,7 @@ def get_something_where_two_fields(table, field1, value1, field2, value2):
 
     return data
 
+@resilient_read
 def get_volunteers_inquiries_where_motivation_is_not_null(table="volunteerinquiry"):
     """
     Get all volunteer inquiries where motivation is not null
@@ -229,6 +531,104 @@ def get_volunteers_inquiries_where_motivation_is_not_null(table="volunteerinquir
             entry["password"] = "******************"
     return data
 
+@resilient_read
+def get_volunteer_inquiries(*columns):
+    """
+    Get the given columns of every volunteer inquiry, oldest first, with
+    email and phone masked.
+    """
+    response = (
+        supabase.table("volunteerinquiry")
+        .select(*columns)
+        .order("created_at", desc=False)
+        .execute()
+    )
+    data = response.data
+    for entry in data:
+        if "email" in entry:
+            entry["email"] = mask_fixed_ends(entry["email"])
+        if "phone" in entry:
+            entry["phone"] = mask_fixed_ends(entry["phone"])
+    return data
+
+STAFF_SESSION_COLUMNS = ("id", "staff_id", "device", "created_at", "last_used_at", "expires_at")
+
+
+@guarded
+def get_staff_session(session_id):
+    """
+    Get a refresh token session, with the hash of its current token.
+    """
+    response = (
+        supabase.table("staff_sessions")
+        .select(*STAFF_SESSION_COLUMNS, "token_hash", "previous_token_hash", "rotated_at", "revoked_at")
+        .eq("id", session_id)
+        .execute()
+    )
+    return response.data[0] if response.data else None
+
+
+@guarded
+def rotate_staff_session(session_id, token_hash, new_token_hash, last_used_at, previous=None):
+    """
+    Replace the token hash of a live session, only if it still holds
+    token_hash, so two concurrent refreshes cannot both succeed. previous is
+    the (token hash, rotated at) pair to keep for the grace window, the
+    replaced token by default.
+    """
+    previous_token_hash, rotated_at = previous or (token_hash, last_used_at)
+    response = (
+        supabase.table("staff_sessions")
+        .update(
+            {
+                "token_hash": new_token_hash,
+                "previous_token_hash": previous_token_hash,
+                "rotated_at": rotated_at,
+                "last_used_at": last_used_at,
+            }
+        )
+        .eq("id", session_id)
+        .eq("token_hash", token_hash)
+        .is_("revoked_at", "null")
+        .execute()
+    )
+    return len(response.data) > 0
+
+
+@guarded
+def revoke_staff_sessions(revoked_at, staff_id, session_id=None):
+    """
+    Revoke one session of a staff member, or all of them.
+    """
+    query = (
+        supabase.table("staff_sessions")
+        .update({"revoked_at": revoked_at})
+        .eq("staff_id", staff_id)
+        .is_("revoked_at", "null")
+    )
+    if session_id is not None:
+        query = query.eq("id", session_id)
+    return len(query.execute().data)
+
+
+@guarded
+def list_staff_sessions(staff_id, now):
+    """
+    Get the live sessions of a staff member, most recently used first.
+    """
+    response = (
+        supabase.table("staff_sessions")
+        .select(*STAFF_SESSION_COLUMNS)
+        .eq("staff_id", staff_id)
+        .is_("revoked_at", "null")
+        .gt("expires_at", now)
+        .order("last_used_at", desc=True)
+        .execute()
+    )
+    return response.data
+
+
+@guarded
 def auth_user(email: str, password: str):
     """
     Authenticates a user with email and password.
@@ -262,6 +662,7 @@ def auth_user(email: str, password: str):
     return user_data
 
 # get everything in table multiple fields
+@resilient_read
 def get_everything_where_multiple_fields(table, **kwargs):
     """
     Get everything in a particular table where multiple fields match their respective values.
@@ -287,6 +688,7 @@ def get_everything_where_multiple_fields(table, **kwargs):
 
     return data
 
+@guarded
 def delete_something(table, id):
     """
     Delete an entry from a specified table by its ID.
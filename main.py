@@ -1,15 +1,20 @@
+import asyncio
 import os
+import tempfile
+import time
 import typing
+from datetime import datetime, timezone
 
-from utils.send_tickets import send_ticket_email
+from utils.send_tickets import send_ticket_email, send_ticket_emails
 
 if not hasattr(typing, "_ClassVar") and hasattr(typing, "ClassVar"):
     typing._ClassVar = typing.ClassVar
 
 
-from fastapi import Depends, FastAPI, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi import BackgroundTasks, Depends, FastAPI, File, HTTPException, Request, Response, UploadFile, WebSocket, WebSocketDisconnect
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.responses import FileResponse, HTMLResponse, JSONResponse, StreamingResponse
 from uuid import UUID, uuid4
 from dotenv import load_dotenv
 
@@ -18,28 +23,83 @@ from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 
 from datas import (
     delete_something,
-    get_everything_where_multiple_fields,
     get_something_where_two_fields,
     get_sponsorteirs,
     get_everything,
     get_everything_where,
+    get_public_where,
+    get_everything_columns,
+    get_existing_values,
+    get_registration_changes,
+    get_columns_by_id,
+    get_staff_session,
+    list_staff_sessions,
+    revoke_staff_sessions,
+    rotate_staff_session,
+    iter_columns_paged,
+    is_unique_violation,
+    load_attendee_index,
+    reconcile_attendance_stats,
+    new_ticket_reference,
+    registration_email_exists,
+    registration_id_by_ref,
+    search_registrations,
     insert_something,
     update_something,
+    update_where_in,
+    upsert_something,
+    exists_where,
     get_volunteers_inquiries_where_motivation_is_not_null,
+    get_volunteer_inquiries,
 )
 from utils.auths import (
     authenticate_user,
     create_access_token,
+    create_refresh_token,
+    decode_refresh_token,
     get_current_user,
     hash_password,
+    hash_token,
+    JWT_EXPIRE_MINUTES,
     _sorted
 )
+from utils.responses import CompressionMiddleware, FastJSONResponse
+from utils.review_stats import review_stats
+from utils.emails import known_emails, normalize_email
+from utils.ticket_tokens import InvalidTicketToken, is_legacy_ticket, verify_ticket
+from utils.checkin_queue import CheckinQueue
+from utils.ticket_refs import normalize_ticket_reference, ticket_refs
+from utils.attendee_search import SEARCH_LIMIT, attendee_index
+from utils.attendance_stats import STATS_RECONCILE_SECONDS, attendance_stats
+from utils.arrivals import CheckinEventLog, arrival_rates, to_timestamp
+from utils.ttl_cache import TTLCache
+from utils.single_flight import single_flight
+from utils.resilience import CircuitOpenError, StaleDataMiddleware, resilience_stats, served_stale
+from utils.admission import AdmissionMiddleware, AdmissionPool
+from utils.idempotency import IdempotencyMiddleware
+from utils.public_snapshot import public_snapshots, snapshot_response
+from utils.speaker_images import SPEAKER_IMAGES, generate_speaker_images, variants_column
+from utils.badges import write_badge_sheet
+from utils.ticket import TICKET_FORMATS, generate_ticket_reference, render_ticket
+from utils.ticket_cache import ticket_cache
+from utils.uploader import cloudinary_uploader
+from utils.attendee_import import (
+    build_registration,
+    chunked,
+    iter_attendee_rows,
+    prepare_import,
+)
 from models import (
+    CheckInBatch,
     CheckInUpdate,
+    TicketVerifyModel,
+    RefreshTokenModel,
     RegistrationInquiry,
     StaffModel,
     ProposalReviewModel,
+    ProposalReviewBatchModel,
     UpdateSpeakerModel,
+    VolunteerStatusModel,
 )
 
 load_dotenv()
@@ -48,6 +108,7 @@ app = FastAPI(
     title="PyCon Togo API",
     description="API for PyCon Togo",
     version="1.1.3",
+    default_response_class=FastJSONResponse,
     contact={
         "name": "PyCon Togo",
         "url": "https://pycontg.pytogo.org/",
@@ -85,13 +146,59 @@ origins = os.getenv("ALLOWED_ORIGINS ", "*")
 
 
 
+# Door scanners first, public pages next, admin dashboards last. The
+# concurrency limits add up to less than the 40 worker threads, so a
+# class at its limit never starves the others of threads.
+ADMISSION_POOLS = [
+    AdmissionPool("door", concurrency=20, queue=200, max_wait=10, retry_after=1),
+    AdmissionPool("public", concurrency=12, queue=100, max_wait=5, retry_after=2),
+    AdmissionPool("admin-bulk", concurrency=4, queue=8, max_wait=3, retry_after=10),
+]
+ADMISSION_RULES = [
+    ("door", "PUT", r"/api/(checkin|foodcheck|checkregistration)/[^/]+"),
+    ("door", "PUT", r"/api/registrations/[^/]+/checkin"),
+    ("door", "POST", r"/api/(checkin/batch|tickets/verify)"),
+    ("door", "GET", r"/api/registrations/(changes|search|by-ref/[^/]+)"),
+    ("admin-bulk", "GET", r"/api/(registrations|staff|waitlist|propreviews|sponsorinquiries|sponsorspaid|badges\.pdf)"),
+    ("admin-bulk", "GET", r"/api/(proposals|volunteer)[^/]*(/ranking)?"),
+    ("admin-bulk", "POST", r"/api/(registrations/import|review/batch|snapshots/publish)"),
+]
+
+# Writes retried by scanners and the registration desk on flaky networks,
+# replayed from their Idempotency-Key instead of running twice. Imports are
+# left out: the middleware buffers bodies, which would undo their streaming
+# parse, and a retried import already skips the emails it registered.
+IDEMPOTENT_ROUTES = [
+    ("POST", r"/api/registrations"),
+    ("POST", r"/token/refresh"),
+    ("POST", r"/api/(checkin/batch|tickets/verify)"),
+    ("PUT", r"/api/(checkin|foodcheck|checkregistration)/[^/]+"),
+    ("PUT", r"/api/registrations/[^/]+/checkin"),
+]
+
+app.add_middleware(IdempotencyMiddleware, routes=IDEMPOTENT_ROUTES)
+app.add_middleware(
+    AdmissionMiddleware, pools=ADMISSION_POOLS, rules=ADMISSION_RULES, default="public"
+)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Data-Stale", "Idempotent-Replayed"],
 )
+app.add_middleware(CompressionMiddleware, minimum_size=1024)
+app.add_middleware(StaleDataMiddleware)
+
+
+@app.exception_handler(CircuitOpenError)
+async def database_unavailable(request: Request, exc: CircuitOpenError):
+    return JSONResponse(
+        content={"message": "Service temporarily unavailable, please retry."},
+        status_code=503,
+        headers={"Retry-After": str(int(exc.retry_after))},
+    )
 
 SPONSOR_ORDER = {
     "headline": 1,
@@ -115,6 +222,59 @@ PROPOSAL_RATE = {
     2: 3,
     1: 4,
 }
+
+
+# Snapshots are built from fresh reads: a coalesced read in flight may
+# predate the change being published, and stale data must not be published
+
+def _speakers_snapshot():
+    accepted_proposals = get_public_where.fresh("proposals", "accepted", True)
+    if not accepted_proposals:
+        return None
+    return _sorted(accepted_proposals, SPEAKER_ORDER, "first_name")
+
+
+def _sponsors_snapshot():
+    sponsors = get_public_where.fresh("sponsorinquiry", "paid", True)
+    if not sponsors:
+        return None
+    return _sorted(sponsors, SPONSOR_ORDER, "level")
+
+
+# Public endpoints served from a published snapshot, built the same way
+# as their live query; an empty result withdraws the snapshot
+PUBLIC_SNAPSHOTS = {
+    "speakers": _speakers_snapshot,
+    "sponsors": _sponsors_snapshot,
+    "sponsor-tiers": get_sponsorteirs.fresh,
+}
+
+
+def publish_public_snapshots(*names):
+    """
+    Rebuild and publish the snapshots of the given public endpoints, all
+    of them by default. Returns the new manifest.
+    """
+    return public_snapshots.publish({name: PUBLIC_SNAPSHOTS[name]() for name in names or PUBLIC_SNAPSHOTS})
+
+
+def _speakers_changed():
+    """
+    Refresh what serves /api/speakers after a speaker changed: the published
+    snapshot, or else the hot copy of the live query. The fresh read also
+    replaces the stale fallback of the live query.
+
+    Only this instance, and those sharing its SNAPSHOT_DIR, see the change
+    at once; the others when their hot copy expires, within SNAPSHOT_TTL.
+    """
+    if public_snapshots.is_published("speakers"):
+        publish_public_snapshots("speakers")
+        return
+    speakers = _speakers_snapshot()
+    if speakers is not None:
+        public_snapshots.put("speakers", speakers)
+
+
 @app.get("/favicon.ico")
 def favicon():
     """
@@ -129,8 +289,141 @@ def favicon():
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 STAFF_SECRET_KEY = os.getenv("STAFF_SECRET_KEY")
 
+def _registration_added(registration):
+    attendee_index.add(registration)
+    attendance_stats.add(registration)
+
+
+def _registrations_updated(ids, **values):
+    attendee_index.update(ids, **values)
+    attendance_stats.update(ids, **values)
+
+
+def _registration_removed(id):
+    attendee_index.remove(id)
+    attendance_stats.remove(id)
+
+
+def _write_checkins(field, scans):
+    """
+    Write queued check-ins, only recording the scans of the registrations
+    the update actually checked: re-scans and retries are not arrivals.
+    """
+    updated = update_where_in("registrations", "id", sorted(scans), {field: True}, **{field: False})
+    updated_ids = {row["id"] for row in updated or []}
+    _registrations_updated(updated_ids, **{field: True})
+    for registration_id in updated_ids:
+        scan = scans.get(registration_id)
+        if scan is not None:
+            _record_scan(registration_id, "checkin", scan["staff"], scan["door"], scan["scanned_at"])
+    return updated
+
+
+checkin_queue = CheckinQueue(_write_checkins)
+checkin_events = CheckinEventLog(lambda events: insert_something("checkin_events", events))
+
+
+def _record_scan(registration_id, kind, current_user, door=None, scanned_at=None):
+    """
+    Log a check-in or food check, and count check-ins as arrivals at the door.
+    """
+    scanned_at = datetime.fromtimestamp(to_timestamp(scanned_at), timezone.utc)
+    checkin_events.append(
+        {
+            "registration_id": str(registration_id),
+            "kind": kind,
+            "door": door,
+            "staff_email": current_user.get("email"),
+            "scanned_at": scanned_at.isoformat(),
+        }
+    )
+    if kind == "checkin":
+        arrival_rates.add(door, scanned_at)
+
+
+BACKGROUND_FLUSH_SECONDS = 5
+ARRIVALS_PUSH_SECONDS = 10
+background_jobs = set()
+
+
+async def _flush_periodically():
+    while True:
+        await asyncio.sleep(BACKGROUND_FLUSH_SECONDS)
+        try:
+            if checkin_queue.due():
+                await run_in_threadpool(checkin_queue.flush)
+            if checkin_events.due():
+                await run_in_threadpool(checkin_events.flush)
+        except Exception as e:
+            print(f"Background flush failed: {e}")
+
+
+def _load_recent_arrivals():
+    since = datetime.fromtimestamp(time.time() - arrival_rates.window_minutes * 60, timezone.utc)
+    arrival_rates.load(
+        event for event in iter_columns_paged(
+            "checkin_events", "kind", "door", "scanned_at", order="scanned_at", since=since.isoformat()
+        )
+        if event["kind"] == "checkin"
+    )
+
+
+async def _push_arrivals_periodically():
+    """
+    Send the arrival rates to the /ws/checkin clients when they change.
+    """
+    try:
+        await run_in_threadpool(_load_recent_arrivals)
+    except Exception as e:
+        print(f"Failed to load recent arrivals: {e}")
+    pushed = None
+    while True:
+        await asyncio.sleep(ARRIVALS_PUSH_SECONDS)
+        if not connected_clients or arrival_rates.version == pushed:
+            continue
+        pushed = arrival_rates.version
+        await _broadcast({"type": "arrivals", **arrival_rates.snapshot()})
+
+
+async def _warm_attendee_index():
+    try:
+        await run_in_threadpool(load_attendee_index)
+    except Exception as e:
+        print(f"Failed to build the attendee search index: {e}")
+
+
+async def _reconcile_periodically():
+    while True:
+        try:
+            await run_in_threadpool(reconcile_attendance_stats)
+        except Exception as e:
+            print(f"Attendance statistics reconciliation failed: {e}")
+        await asyncio.sleep(STATS_RECONCILE_SECONDS)
+
+
+@app.on_event("startup")
+async def start_background_jobs():
+    jobs = (
+        _flush_periodically(),
+        _warm_attendee_index(),
+        _reconcile_periodically(),
+        _push_arrivals_periodically(),
+    )
+    for job in jobs:
+        task = asyncio.create_task(job)
+        background_jobs.add(task)
+        task.add_done_callback(background_jobs.discard)
+
+
+@app.on_event("shutdown")
+def flush_pending_writes():
+    checkin_queue.flush()
+    checkin_events.flush()
+    cloudinary_uploader.close()
+
+
 @app.post("/token")
-async def login(form_data: OAuth2PasswordRequestForm = Depends()):
+async def login(request: Request, form_data: OAuth2PasswordRequestForm = Depends()):
     user_data = await authenticate_user(form_data.username, form_data.password)
 
     if not user_data:
@@ -146,7 +439,182 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends()):
     )
     if not access_token:
         raise HTTPException(status_code=500, detail="Could not create access token")
-    return {"access_token": access_token, "token_type": "bearer"}
+
+    user = {
+        "email": form_data.username,
+        "user_id": user_data["id"],
+        "full_name": user_data["full_name"],
+        "role": user_data["role"],
+    }
+    refresh_token, session_id, token_hash, expires_at = create_refresh_token(user)
+    session = await run_in_threadpool(
+        insert_something,
+        "staff_sessions",
+        {
+            "id": session_id,
+            "staff_id": user_data["id"],
+            "email": form_data.username,
+            "device": (request.headers.get("user-agent") or "")[:200],
+            "token_hash": token_hash,
+            "expires_at": expires_at.isoformat(),
+        },
+    )
+    if not session:
+        raise HTTPException(status_code=500, detail="Could not create session")
+    return {
+        "access_token": access_token,
+        "token_type": "bearer",
+        "expires_in": JWT_EXPIRE_MINUTES * 60,
+        "refresh_token": refresh_token,
+    }
+
+
+# A refresh retried with the token it just replaced, after its response was
+# lost, is accepted this long; the idempotency store only covers retries
+# reaching the same instance
+REFRESH_REUSE_GRACE_SECONDS = 60
+
+
+@app.post("/token/refresh")
+def refresh_access_token(body: RefreshTokenModel):
+    """
+    Exchange a refresh token for a new access token and a new refresh
+    token, without the password. The refresh token is single use: each
+    refresh replaces it, and presenting a replaced one revokes the session,
+    past a short grace window for retries.
+
+    The role and name are read again from the staff table, so a demotion
+    applies at the next refresh and a deleted staff member is logged out.
+    """
+    claims = decode_refresh_token(body.refresh_token)
+    session = get_staff_session(claims["sid"])
+    now = datetime.now(timezone.utc)
+    if not session or session.get("revoked_at"):
+        raise HTTPException(status_code=401, detail="Session revoked or expired")
+
+    token_hash = hash_token(claims["jti"])
+    previous = None
+    if session["token_hash"] != token_hash:
+        rotated_at = session.get("rotated_at")
+        if (
+            token_hash != session.get("previous_token_hash")
+            or not rotated_at
+            or (now - datetime.fromisoformat(rotated_at)).total_seconds() > REFRESH_REUSE_GRACE_SECONDS
+        ):
+            # An already used refresh token: it leaked or was stolen
+            revoke_staff_sessions(now.isoformat(), session["staff_id"], session["id"])
+            raise HTTPException(status_code=401, detail="Session revoked or expired")
+        # Retry of a refresh whose response was lost: replace the token it
+        # never received, keeping the grace window of the first refresh
+        previous = (token_hash, rotated_at)
+        token_hash = session["token_hash"]
+
+    staff = get_columns_by_id("staff", session["staff_id"], "id", "email", "fullname", "role")
+    if not staff:
+        revoke_staff_sessions(now.isoformat(), session["staff_id"])
+        raise HTTPException(status_code=401, detail="Session revoked or expired")
+
+    user = {
+        "email": staff["email"],
+        "user_id": staff["id"],
+        "full_name": staff["fullname"],
+        "role": staff["role"],
+    }
+    refresh_token, _, new_token_hash, _ = create_refresh_token(
+        user,
+        session_id=session["id"],
+        expires_at=datetime.fromtimestamp(claims["exp"], timezone.utc),
+    )
+    if not rotate_staff_session(session["id"], token_hash, new_token_hash, now.isoformat(), previous):
+        raise HTTPException(status_code=401, detail="Session revoked or expired")
+
+    access_token = create_access_token(
+        data={
+            "sub": user["email"],
+            "user_id": user["user_id"],
+            "full_name": user["full_name"],
+            "role": user["role"],
+        }
+    )
+    return {
+        "access_token": access_token,
+        "token_type": "bearer",
+        "expires_in": JWT_EXPIRE_MINUTES * 60,
+        "refresh_token": refresh_token,
+    }
+
+
+@app.post("/token/revoke")
+def revoke_refresh_token(body: RefreshTokenModel):
+    """
+    Log a device out by revoking the session of its refresh token.
+    """
+    claims = decode_refresh_token(body.refresh_token)
+    session = get_staff_session(claims["sid"])
+    if session and session["token_hash"] == hash_token(claims["jti"]):
+        revoke_staff_sessions(
+            datetime.now(timezone.utc).isoformat(), session["staff_id"], session["id"]
+        )
+    return {"message": "Session revoked."}
+
+
+def _session_owner_or_admin(staff_id, current_user):
+    if not current_user:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    staff = get_something_where_two_fields(
+        "staff", "email", current_user.get("email"), "staff_secret_key", STAFF_SECRET_KEY
+    )
+    if not staff or current_user.get("full_name") != staff[0].get("fullname"):
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    if current_user.get("role") != "Admin" and current_user.get("user_id") != staff_id:
+        raise HTTPException(status_code=403, detail="Not authorized to manage these sessions")
+
+
+@app.get("/api/staff/{staff_id}/sessions")
+def api_staff_sessions(staff_id: int, current_user: dict = Depends(get_current_user)):
+    """
+    API endpoint to list the live sessions of a staff member, for
+    themselves or an Admin.
+
+    data schema:
+    - id: UUID
+    - staff_id: int
+    - device: str
+    - created_at: str
+    - last_used_at: str
+    - expires_at: str
+    """
+    _session_owner_or_admin(staff_id, current_user)
+    return FastJSONResponse(
+        list_staff_sessions(staff_id, datetime.now(timezone.utc).isoformat())
+    )
+
+
+@app.delete("/api/staff/{staff_id}/sessions")
+def api_revoke_staff_sessions(staff_id: int, current_user: dict = Depends(get_current_user)):
+    """
+    API endpoint to revoke every session of a staff member, e.g. after a
+    lost scanner device.
+    """
+    _session_owner_or_admin(staff_id, current_user)
+    revoked = revoke_staff_sessions(datetime.now(timezone.utc).isoformat(), staff_id)
+    return {"message": f"{revoked} session(s) revoked.", "revoked": revoked}
+
+
+@app.delete("/api/staff/{staff_id}/sessions/{session_id}")
+def api_revoke_staff_session(
+    staff_id: int, session_id: UUID, current_user: dict = Depends(get_current_user)
+):
+    """
+    API endpoint to revoke one session of a staff member.
+    """
+    _session_owner_or_admin(staff_id, current_user)
+    revoked = revoke_staff_sessions(
+        datetime.now(timezone.utc).isoformat(), staff_id, str(session_id)
+    )
+    if not revoked:
+        return JSONResponse(content={"message": "Session not found."}, status_code=404)
+    return {"message": "Session revoked."}
 
 
 @app.get("/")
@@ -206,8 +674,263 @@ def api_registration(id: str, current_user: dict = Depends(get_current_user)):
         )
 
 
+REGISTRATION_SYNC_COLUMNS = ("id", "fullName", "ticket_ref", "checked", "foodchecked")
+
+
+def _parse_change_cursor(cursor: str):
+    """
+    (transaction id, change sequence number) of a changes cursor. Numeric
+    cursors of the change_seq only feed start over from the beginning.
+    """
+    xid, dot, seq = cursor.partition(".")
+    if not dot:
+        int(cursor)
+        return 0, 0
+    xid, seq = int(xid), int(seq)
+    if xid < 0 or seq < 0:
+        raise ValueError(cursor)
+    return xid, seq
+
+
+@app.get("/api/registrations/changes")
+def api_registration_changes(
+    since: str = "0", limit: int = 1000, current_user: dict = Depends(get_current_user)
+):
+    """
+    API endpoint for scanners to keep a local copy of the attendees.
+
+    Returns the registrations inserted, updated or deleted after the since
+    cursor, oldest first, and the cursor to send on the next call. Start
+    with since=0 and poll with the returned cursor, an opaque string; keep
+    polling right away while has_more is true. Changes are only returned
+    once every transaction before them has committed, so none can land
+    behind a cursor already returned.
+
+    data schema:
+    - cursor: str
+    - has_more: bool
+    - changes: List[{id, fullName, ticket_ref, checked, foodchecked}]
+    - deleted: List[UUID]
+    """
+    if not current_user:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    staff = get_something_where_two_fields(
+        "staff", "email", current_user.get("email"), "staff_secret_key", STAFF_SECRET_KEY
+    )
+    if not staff:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    if current_user.get("role") not in ["Admin", "Registration-manager"] or current_user.get("full_name") != staff[0].get("fullname"):
+        raise HTTPException(
+            status_code=403, detail="Not authorized to view registrations"
+        )
+    try:
+        since_xid, since_seq = _parse_change_cursor(since)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor or limit")
+    if not (1 <= limit <= 5000):
+        raise HTTPException(status_code=400, detail="Invalid cursor or limit")
+
+    feed = get_registration_changes(since_xid, since_seq, limit)
+    rows = feed["rows"]
+
+    changes, tombstones = [], []
+    for row in rows:
+        if row["deleted"]:
+            tombstones.append(row["id"])
+        else:
+            changes.append({column: row.get(column) for column in REGISTRATION_SYNC_COLUMNS})
+
+    has_more = len(rows) == limit
+    if has_more:
+        cursor = f"{rows[-1]['change_xid']}.{rows[-1]['change_seq']}"
+    else:
+        # Caught up: every transaction below the horizon is visible already
+        cursor = f"{max(int(feed['horizon']), since_xid)}.0"
+
+    return FastJSONResponse(
+        {
+            "cursor": cursor,
+            "has_more": has_more,
+            "changes": changes,
+            "deleted": tombstones,
+        }
+    )
+
+
+@app.get("/api/registrations/by-ref/{ref}")
+def api_registration_by_ref(ref: str, current_user: dict = Depends(get_current_user)):
+    """
+    API endpoint to get a registration by its ticket reference.
+
+    The reference can be given with or without the PYCONTG-2025- prefix.
+    """
+    if not current_user:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    staff = get_something_where_two_fields(
+        "staff", "email", current_user.get("email"), "staff_secret_key", STAFF_SECRET_KEY
+    )
+    if not staff:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    if current_user.get("role") not in ["Admin", "Registration-manager"] or current_user.get("full_name") != staff[0].get("fullname"):
+        raise HTTPException(
+            status_code=403, detail="Not authorized to view registrations"
+        )
+
+    registration_id = registration_id_by_ref(normalize_ticket_reference(ref))
+    registration = registration_id and get_everything_where("registrations", "id", registration_id)
+    if not registration:
+        return JSONResponse(
+            content={"message": "No registration found."}, status_code=404
+        )
+    return registration[0]
+
+
+@app.get("/api/metrics")
+def api_metrics(current_user: dict = Depends(get_current_user)):
+    """
+    API endpoint to get the internal metrics of the API.
+
+    data schema:
+    - coalescing: Dict[str, {calls: int, executions: int, coalesced: int, in_flight: int}]
+    - database: {breaker: {state, recent_calls, recent_failures, recent_slow, trips, rejected}, stale_served: int}
+    - admission: Dict[str, {concurrency, active, waiting, admitted, queued, shed}]
+    - snapshots: Dict[str, {file, hash, bytes, published_at}]
+    """
+    if not current_user:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    staff = get_something_where_two_fields(
+        "staff", "email", current_user.get("email"), "staff_secret_key", STAFF_SECRET_KEY
+    )
+    if not staff:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    if current_user.get("role") != "Admin" or current_user.get("full_name") != staff[0].get("fullname"):
+        raise HTTPException(status_code=403, detail="Not authorized to view metrics")
+
+    return FastJSONResponse(
+        {
+            "coalescing": single_flight.stats(),
+            "database": resilience_stats(),
+            "admission": {pool.name: pool.stats() for pool in ADMISSION_POOLS},
+            "snapshots": public_snapshots.manifest(),
+        }
+    )
+
+
+@app.post("/api/snapshots/publish")
+def api_publish_snapshots(current_user: dict = Depends(get_current_user)):
+    """
+    API endpoint to republish the snapshots of the public endpoints
+    (speakers, sponsors, sponsor tiers) after their data changed.
+
+    data schema:
+    - Dict[str, {file: str, hash: str, bytes: int, published_at: str}]
+    """
+    if not current_user:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    staff = get_something_where_two_fields(
+        "staff", "email", current_user.get("email"), "staff_secret_key", STAFF_SECRET_KEY
+    )
+    if not staff:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    if current_user.get("role") != "Admin" or current_user.get("full_name") != staff[0].get("fullname"):
+        raise HTTPException(status_code=403, detail="Not authorized to publish snapshots")
+
+    return publish_public_snapshots()
+
+
+@app.get("/api/stats")
+def api_stats(current_user: dict = Depends(get_current_user)):
+    """
+    API endpoint to get attendance and logistics counts, served from memory.
+
+    data schema:
+    - total: int
+    - checked: int
+    - foodchecked: int
+    - tshirtsize: Dict[str, int]
+    - dietaryrestrictions: Dict[str, int]
+    - country: Dict[str, int]
+    - updated_at: str
+    - reconciled_at: str
+    """
+    if not current_user:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    staff = get_something_where_two_fields(
+        "staff", "email", current_user.get("email"), "staff_secret_key", STAFF_SECRET_KEY
+    )
+    if not staff:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    if current_user.get("role") not in ["Admin", "Registration-manager"] or current_user.get("full_name") != staff[0].get("fullname"):
+        raise HTTPException(
+            status_code=403, detail="Not authorized to view registrations"
+        )
+
+    if not attendance_stats.loaded:
+        reconcile_attendance_stats()
+    return FastJSONResponse(attendance_stats.snapshot())
+
+
+@app.get("/api/stats/arrivals")
+def api_arrival_stats(minutes: int = 60, current_user: dict = Depends(get_current_user)):
+    """
+    API endpoint to get the check-ins per minute and per door over the last
+    minutes, with the current rate and a forecast of the next minutes.
+    The same payload is pushed to /ws/checkin clients with type "arrivals".
+
+    data schema:
+    - generated_at: str
+    - minutes: List[str]
+    - all: {per_minute: List[int], total: int, rate: float, forecast: List[float]}
+    - doors: Dict[str, {per_minute, total, rate, forecast}]
+    """
+    if not current_user:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    staff = get_something_where_two_fields(
+        "staff", "email", current_user.get("email"), "staff_secret_key", STAFF_SECRET_KEY
+    )
+    if not staff:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    if current_user.get("role") not in ["Admin", "Registration-manager"] or current_user.get("full_name") != staff[0].get("fullname"):
+        raise HTTPException(
+            status_code=403, detail="Not authorized to view registrations"
+        )
+
+    return FastJSONResponse(arrival_rates.snapshot(max(minutes, 1)))
+
+
+@app.get("/api/registrations/search")
+def api_search_registrations(
+    q: str, limit: int = SEARCH_LIMIT, current_user: dict = Depends(get_current_user)
+):
+    """
+    API endpoint for the help desk to find attendees by partial name,
+    organization or ticket reference, ignoring case and accents.
+
+    Every word of q must match the start of a word of the attendee.
+
+    data schema:
+    - results: List[{id, fullName, organization, ticket_ref, checked, foodchecked, score}]
+    """
+    if not current_user:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    staff = get_something_where_two_fields(
+        "staff", "email", current_user.get("email"), "staff_secret_key", STAFF_SECRET_KEY
+    )
+    if not staff:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    if current_user.get("role") not in ["Admin", "Registration-manager"] or current_user.get("full_name") != staff[0].get("fullname"):
+        raise HTTPException(
+            status_code=403, detail="Not authorized to view registrations"
+        )
+
+    results = search_registrations(q, max(1, min(limit, 50)))
+    return FastJSONResponse({"results": results})
+
+
 @app.put("/api/checkregistration/{id}")
-def api_check_registration(id: str, current_user: dict = Depends(get_current_user)):
+def api_check_registration(
+    id: str, door: typing.Optional[str] = None, current_user: dict = Depends(get_current_user)
+):
     """
     API endpoint to check a registration by UUID.
 
@@ -252,6 +975,8 @@ def api_check_registration(id: str, current_user: dict = Depends(get_current_use
                 "registrations", registration[0]["id"], {"checked": True}
             )
             if checked:
+                _registrations_updated([registration[0]["id"]], checked=True)
+                _record_scan(registration[0]["id"], "checkin", current_user, door)
                 return JSONResponse(
                     content={"message": "Registration checked successfully."},
                     status_code=200,
@@ -263,16 +988,101 @@ def api_check_registration(id: str, current_user: dict = Depends(get_current_use
                 )
 
 
-    else:
-        return JSONResponse(
-            content={"message": "No registration found."}, status_code=404
+    else:
+        return JSONResponse(
+            content={"message": "No registration found."}, status_code=404
+        )
+
+
+
+SCAN_FLAGS = {"checkin": "checked", "food": "foodchecked"}
+CHECKIN_BATCH_MAX = 500
+
+
+@app.post("/api/checkin/batch")
+def api_check_in_batch(batch: CheckInBatch, current_user: dict = Depends(get_current_user)):
+    """
+    API endpoint to replay the scans a scanner queued while offline.
+
+    The staff member is authenticated once for the whole batch and every
+    kind of scan is applied with one conditional update, so a registration
+    checked meanwhile by another scanner is reported instead of overwritten.
+
+    Outcome of each scan, in the order received:
+    - checked: the check-in or food check was recorded
+    - already_checked: it had already been recorded
+    - duplicate: same registration and kind earlier in the batch
+    - not_found / invalid / forbidden
+    """
+    if not current_user:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    staff = get_something_where_two_fields(
+        "staff", "email", current_user.get("email"), "staff_secret_key", STAFF_SECRET_KEY
+    )
+    if not staff:
+        raise HTTPException(status_code=401, detail="Not authenticated or not a staff member")
+    if current_user.get("full_name") != staff[0].get("fullname"):
+        raise HTTPException(
+            status_code=403, detail="Not authorized to check registrations"
+        )
+    if len(batch.scans) > CHECKIN_BATCH_MAX:
+        raise HTTPException(
+            status_code=400, detail=f"At most {CHECKIN_BATCH_MAX} scans per batch"
         )
+    can_check_in = current_user.get("role") in ["Admin", "Registration-manager"]
+
+    outcomes = []
+    pending = {kind: {} for kind in SCAN_FLAGS}
+    for scan in batch.scans:
+        outcome = {
+            "id": scan.id,
+            "kind": scan.kind,
+            "scanned_at": scan.scanned_at.isoformat() if scan.scanned_at else None,
+        }
+        outcomes.append(outcome)
+        try:
+            registration_id = str(UUID(scan.id, version=4))
+        except ValueError:
+            outcome["status"] = "invalid"
+            continue
+        if scan.kind == "checkin" and not can_check_in:
+            outcome["status"] = "forbidden"
+        elif registration_id in pending[scan.kind]:
+            outcome["status"] = "duplicate"
+        else:
+            pending[scan.kind][registration_id] = outcome
+
+    for kind, scans in pending.items():
+        if not scans:
+            continue
+        flag = SCAN_FLAGS[kind]
+        updated = update_where_in(
+            "registrations", "id", scans.keys(), {flag: True}, **{flag: False}
+        ) or []
+        updated_ids = {row["id"] for row in updated}
+        _registrations_updated(updated_ids, **{flag: True})
+        for registration_id in updated_ids:
+            _record_scan(registration_id, kind, current_user, batch.door, scans[registration_id]["scanned_at"])
+        remaining = [registration_id for registration_id in scans if registration_id not in updated_ids]
+        existing = get_existing_values("registrations", "id", remaining) if remaining else set()
+        for registration_id, outcome in scans.items():
+            if registration_id in updated_ids:
+                outcome["status"] = "checked"
+            elif registration_id in existing:
+                outcome["status"] = "already_checked"
+            else:
+                outcome["status"] = "not_found"
 
+    summary = {}
+    for outcome in outcomes:
+        summary[outcome["status"]] = summary.get(outcome["status"], 0) + 1
+
+    return FastJSONResponse({"summary": summary, "results": outcomes})
 
 
 @app.put("/api/checkin/{id}")
 def api_check_in(
-    id: str, current_user: dict = Depends(get_current_user)
+    id: str, door: typing.Optional[str] = None, current_user: dict = Depends(get_current_user)
 ):
     """
     API endpoint to check a registration by UUID.
@@ -322,6 +1132,8 @@ def api_check_in(
                 "registrations", registration[0]["id"], {"checked": True}
             )
             if checked:
+                _registrations_updated([registration[0]["id"]], checked=True)
+                _record_scan(registration[0]["id"], "checkin", current_user, door)
                 return JSONResponse(
                     content={"message": "Registration checked successfully."},
                     status_code=200,
@@ -341,7 +1153,7 @@ def api_check_in(
 
 @app.put("/api/foodcheck/{id}")
 def api_food_check(
-    id: str, current_user: dict = Depends(get_current_user)
+    id: str, door: typing.Optional[str] = None, current_user: dict = Depends(get_current_user)
 ):
     """API endpoint to check food status of a registration by UUID.
 
@@ -390,6 +1202,8 @@ def api_food_check(
                 "registrations", registration[0]["id"], {"foodchecked": True}
             )
             if checked:
+                _registrations_updated([registration[0]["id"]], foodchecked=True)
+                _record_scan(registration[0]["id"], "food", current_user, door)
                 return JSONResponse(
                     content={"message": "YES: This Attendee can take food."},
                     status_code=200,
@@ -406,9 +1220,119 @@ def api_food_check(
         )
 
 
+@app.post("/api/tickets/verify")
+def api_verify_ticket(
+    verification: TicketVerifyModel,
+    background_tasks: BackgroundTasks,
+    current_user: dict = Depends(get_current_user),
+):
+    """
+    API endpoint to verify the signed token of a ticket QR code.
+
+    The signature is checked locally, without any database lookup, and the
+    staff member is only authenticated by their access token. With
+    checkin, the check-in is queued and written in batches.
+
+    data schema:
+    - valid: bool
+    - id: UUID
+    - ref: str
+    """
+    if not current_user:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    if current_user.get("role") not in ["Admin", "Registration-manager"]:
+        raise HTTPException(
+            status_code=403, detail="Not authorized to check registrations"
+        )
+
+    if is_legacy_ticket(verification.token):
+        registration_id = verification.token.strip()
+        if not exists_where("registrations", "id", registration_id):
+            return JSONResponse(
+                content={"valid": False, "message": "No registration found."},
+                status_code=404,
+            )
+        ticket = {"id": registration_id, "ref": None}
+    else:
+        try:
+            ticket = verify_ticket(verification.token)
+        except InvalidTicketToken as e:
+            return JSONResponse(
+                content={"valid": False, "message": str(e)}, status_code=400
+            )
+
+    if verification.checkin:
+        scan = {
+            "staff": {"email": current_user.get("email")},
+            "door": verification.door,
+            "scanned_at": datetime.now(timezone.utc),
+        }
+        if checkin_queue.put(ticket["id"], scan=scan):
+            background_tasks.add_task(checkin_queue.flush)
+
+    return {"valid": True, **ticket}
+
+
+@app.get("/api/tickets/{filename}")
+def api_ticket(filename: str, request: Request):
+    """
+    API endpoint to download the ticket of a registration, as
+    {id}.png, {id}.min.png, {id}.webp, {id}.pdf, or {id}.scanner.png and
+    {id}.scanner.webp for the QR code alone.
+
+    Tickets are rendered on first request and then served from the disk
+    cache, with ETag and Range support.
+    """
+    id, _, fmt = filename.partition(".")
+    if fmt not in TICKET_FORMATS:
+        return JSONResponse(content={"message": "Unknown ticket format."}, status_code=404)
+    try:
+        uuid_obj = UUID(id, version=4)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid UUID format")
+    registration_id = str(uuid_obj)
+
+    key = ticket_cache.latest(registration_id, fmt)
+    if key is None:
+        registration = get_everything_where("registrations", "id", registration_id)
+        if not registration:
+            return JSONResponse(
+                content={"message": "No registration found."}, status_code=404
+            )
+        registration = registration[0]
+        key, _ = render_ticket(
+            registration_id,
+            registration.get("fullName"),
+            registration.get("ticket_ref") or generate_ticket_reference(registration_id),
+            registration.get("organization"),
+            registration.get("country") or "Togo/Lomé",
+            fmt,
+        )
+
+    etag = f'"{key}"'
+    headers = {"ETag": etag, "Cache-Control": "public, max-age=86400"}
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+
+    path = ticket_cache.get(key, fmt)
+    if path is None:
+        ticket_cache.forget(registration_id)
+        raise HTTPException(status_code=503, detail="Ticket evicted, please retry")
+    return FileResponse(
+        path,
+        media_type=TICKET_FORMATS[fmt]["media_type"],
+        filename=f"ticket-{registration_id}.{fmt}",
+        headers=headers,
+        content_disposition_type="inline",
+    )
+
+
 @app.put("/api/registrations/{id}/checkin")
 def api_check_in_update(
-    id: str, check_in_update: CheckInUpdate, current_user: dict = Depends(get_current_user)
+    id: str,
+    check_in_update: CheckInUpdate,
+    door: typing.Optional[str] = None,
+    current_user: dict = Depends(get_current_user),
 ):
     """
     API endpoint to update check-in status of a registration by UUID.
@@ -447,6 +1371,9 @@ def api_check_in_update(
             "registrations", registration[0]["id"], {"checked": check_in_update.isChecked}
         )
         if updated:
+            _registrations_updated([registration[0]["id"]], checked=check_in_update.isChecked)
+            if check_in_update.isChecked and not registration[0].get("checked"):
+                _record_scan(registration[0]["id"], "checkin", current_user, door)
             return JSONResponse(
                 content={"message": "Check-in status updated successfully."},
                 status_code=200,
@@ -495,7 +1422,7 @@ def get_staff(current_user: dict = Depends(get_current_user)):
 
 
 @app.get("/api/sponsor-tiers")
-def api_sponsor_tiers():
+async def api_sponsor_tiers(request: Request):
     """
     API endpoint to get all sponsor tiers.
 
@@ -508,8 +1435,13 @@ def api_sponsor_tiers():
     - amount_usd: float
     - advantages: List[str]
     """
-    tiers = get_sponsorteirs()
-    return tiers
+    snapshot = await public_snapshots.get_async("sponsor-tiers")
+    if snapshot:
+        return snapshot_response(request, snapshot)
+    tiers = await get_sponsorteirs.run_async()
+    if served_stale():
+        return tiers
+    return snapshot_response(request, public_snapshots.put("sponsor-tiers", tiers))
 
 
 @app.get("/api/volunteerinquiries")
@@ -573,13 +1505,173 @@ def api_volunteer_inquiries(
             content={"message": "No volunteer inquiries found."}, status_code=404
         )
 
-    return inquiries
+    return FastJSONResponse(inquiries)
+
+
+VOLUNTEER_COLUMNS = (
+    "id",
+    "first_name",
+    "last_name",
+    "email",
+    "phone",
+    "country_city",
+    "motivation",
+    "availability_before",
+    "availability_during",
+    "availability_after",
+    "accepted",
+    "experience",
+    "registration",
+    "technical",
+    "logistic",
+    "social",
+    "photography",
+    "status",
+)
+VOLUNTEER_STATUSES = ("accepted", "waiting", "rejected")
+volunteers_cache = TTLCache(ttl=30)
+
+
+@app.get("/api/volunteers")
+def api_volunteers(
+    motivation: bool = None, current_user: dict = Depends(get_current_user)
+):
+    """
+    API endpoint to get the volunteer inquiries grouped by status, with
+    counts, for the volunteer dashboard.
+
+    The table is read once with only the dashboard columns and cached for
+    a few seconds; changing a volunteer's status clears the cache.
+    With motivation=true only inquiries with a motivation are returned,
+    with motivation=false only those without.
+
+    data schema:
+    - counts: {total: int, accepted: int, waiting: int, rejected: int}
+    - groups: {accepted: List[inquiry], waiting: List[inquiry], rejected: List[inquiry]}
+    """
+    if not current_user:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    staff = get_something_where_two_fields(
+        "staff", "email", current_user.get("email"), "staff_secret_key", STAFF_SECRET_KEY
+    )
+    if not staff:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    if current_user.get("role") not in ["Admin", "Volunteer-manager"] or current_user.get("full_name") != staff[0].get("fullname"):
+        raise HTTPException(
+            status_code=403, detail="Not authorized to view volunteer inquiries"
+        )
+
+    inquiries = volunteers_cache.get_or_load(
+        "volunteerinquiry", lambda: get_volunteer_inquiries.fresh(*VOLUNTEER_COLUMNS)
+    )
+    groups = {status: [] for status in VOLUNTEER_STATUSES}
+    for inquiry in inquiries:
+        if motivation is True and not inquiry.get("motivation"):
+            continue
+        if motivation is False and inquiry.get("motivation") != "":
+            continue
+        groups.setdefault(inquiry.get("status") or "waiting", []).append(inquiry)
+
+    counts = {status: len(rows) for status, rows in groups.items()}
+    counts["total"] = sum(counts.values())
+    return FastJSONResponse({"counts": counts, "groups": groups})
+
+
+@app.put("/api/volunteerinquiries/{id}/status")
+def api_volunteer_status(
+    id: int, update: VolunteerStatusModel, current_user: dict = Depends(get_current_user)
+):
+    """
+    API endpoint to accept, reject or put back on hold a volunteer inquiry.
+
+    data schema:
+    - status: accepted | waiting | rejected
+    """
+    if not current_user:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    staff = get_something_where_two_fields(
+        "staff", "email", current_user.get("email"), "staff_secret_key", STAFF_SECRET_KEY
+    )
+    if not staff:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    if current_user.get("role") not in ["Admin", "Volunteer-manager"] or current_user.get("full_name") != staff[0].get("fullname"):
+        raise HTTPException(
+            status_code=403, detail="Not authorized to update volunteer inquiries"
+        )
+
+    if not exists_where("volunteerinquiry", "id", id):
+        return JSONResponse(content={"message": "Not found."}, status_code=404)
+
+    updated = update_something(
+        "volunteerinquiry", id, {"status": update.status, "accepted": update.status == "accepted"}
+    )
+    volunteers_cache.invalidate()
+    if updated:
+        return JSONResponse(
+            content={"message": f"Volunteer inquiry {update.status}."}, status_code=200
+        )
+    return JSONResponse(
+        content={"message": "Failed to update volunteer inquiry."}, status_code=400
+    )
+
+
+REVIEW_CONFLICT_COLUMNS = "proposal_id,reviewer_id"
+
+
+@app.post("/api/review/batch")
+def review_proposals_batch(batch: ProposalReviewBatchModel, current_user: dict = Depends(get_current_user)):
+    """
+    API endpoint to submit a whole session of reviews at once.
+
+    Every review must belong to the authenticated reviewer; a proposal
+    reviewed twice in the same batch keeps its last rating.
+    """
+    if not current_user:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+
+    staff = get_something_where_two_fields(
+        "staff", "email", current_user.get("email"), "staff_secret_key", STAFF_SECRET_KEY
+    )
+    if not staff:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    if current_user.get("role") not in ["Admin", "Program-manager"] or current_user.get("full_name") != staff[0].get("fullname"):
+        raise HTTPException(status_code=403, detail="Not authorized to review")
+    if not batch.reviews:
+        raise HTTPException(status_code=400, detail="No reviews to submit")
+
+    reviews = {}
+    for proposal in batch.reviews:
+        if not proposal.reviewer_id:
+            raise HTTPException(status_code=400, detail="Reviewer ID is required")
+        if current_user.get("user_id") != proposal.reviewer_id and current_user.get("full_name") != proposal.reviewer:
+            raise HTTPException(
+                status_code=403, detail=f"Not authorized to review proposal {proposal.proposal_id}"
+            )
+        reviews[proposal.proposal_id] = proposal.dict()
+
+    reviewed = upsert_something(
+        "proposalreviews", list(reviews.values()), REVIEW_CONFLICT_COLUMNS
+    )
+    if not reviewed:
+        raise HTTPException(status_code=500, detail="Failed to review the proposals")
+    for review in reviews.values():
+        review_stats.add(review)
+
+    return JSONResponse(
+        content={
+            "message": "Proposals reviewed successfully.",
+            "reviewed": sorted(reviews),
+        },
+        status_code=201,
+    )
 
 
 @app.post("/api/review/{id}")
 def review_proposal(id: int, proposal: ProposalReviewModel, current_user: dict = Depends(get_current_user)):
     """
     API endpoint to review proposal
+
+    A reviewer submitting the same proposal again updates their review.
     """
     if not current_user:
         raise HTTPException(status_code=401, detail="Not authenticated")
@@ -602,16 +1694,12 @@ def review_proposal(id: int, proposal: ProposalReviewModel, current_user: dict =
         raise HTTPException(
             status_code=400, detail="Proposal ID in URL does not match proposal ID in body"
         )
-    exist = get_everything_where_multiple_fields(
-        "proposalreviews", proposal_id=proposal.proposal_id, reviewer_id=proposal.reviewer_id
+    reviewed = upsert_something(
+        "proposalreviews", proposal.dict(), REVIEW_CONFLICT_COLUMNS
     )
-    if exist:
-        raise HTTPException(
-            status_code=400, detail="Proposal already reviewed by this reviewer"
-        )
-    reviewed = insert_something("proposalreviews", proposal.dict())
     if not reviewed:
         raise HTTPException(status_code=500, detail="Failed to review the proposal")
+    review_stats.add(proposal.dict())
 
     return JSONResponse(
         content={"message": "Proposal reviewed successfully."},
@@ -640,6 +1728,17 @@ def api_delete(itemType, itemId, current_user: dict = Depends(get_current_user))
         raise HTTPException(status_code=403, detail="Not authorized to delete staff")
 
     deleted = delete_something(itemType,id)
+    if deleted and itemType == "proposalreviews":
+        review_stats.reset()
+    if deleted and itemType == "registrations":
+        known_emails.invalidate()
+        ticket_refs.invalidate()
+        ticket_cache.forget(str(id))
+        _registration_removed(id)
+    if deleted and itemType == "volunteerinquiry":
+        volunteers_cache.invalidate()
+    if deleted and itemType == "staff":
+        revoke_staff_sessions(datetime.now(timezone.utc).isoformat(), id)
     if deleted:
         return JSONResponse(
             content={"message": f"{itemType} member deleted successfully."},
@@ -826,7 +1925,7 @@ def api_registrations(current_user: dict = Depends(get_current_user)):
             content={"message": "No registrations found."}, status_code=404
         )
 
-    return registrations
+    return FastJSONResponse(registrations)
 
 
 @app.get("/api/sponsorinquiries")
@@ -865,7 +1964,7 @@ def api_sponsor_inquiries(current_user: dict = Depends(get_current_user)):
             content={"message": "No sponsor inquiries found."}, status_code=404
         )
 
-    return inquiries
+    return FastJSONResponse(inquiries)
 
 
 @app.get("/api/sponsorspaid")
@@ -925,7 +2024,7 @@ def api_proposals(current_user: dict = Depends(get_current_user)):
     proposals = get_everything("proposals")
     if not proposals:
         return JSONResponse(content={"message": "No proposals found."}, status_code=404)
-    return proposals
+    return FastJSONResponse(proposals)
 
 @app.put("/api/proposals/{id}/accept")
 def api_accept_proposal(id: int, current_user: dict = Depends(get_current_user)):
@@ -1019,14 +2118,79 @@ def api_proposals_reconsideration(current_user: dict = Depends(get_current_user)
     if current_user.get("role") not in ["Admin", "Program-manager"] or current_user.get("full_name") != staff[0].get("fullname"):
         raise HTTPException(status_code=403, detail="Not authorized to view proposals")
     proposals = get_everything("temp_speakers")
-    sorted_proposals = _sorted(proposals, SPEAKER_ORDER, "rate")
     if not proposals:
         return JSONResponse(content={"message": "No proposals found."}, status_code=404)
-    
+    sorted_proposals = _sorted(proposals, PROPOSAL_RATE, "rate")
+
     return sorted_proposals 
 
+
+@app.get("/api/proposals/ranking")
+def api_proposals_ranking(current_user: dict = Depends(get_current_user)):
+    """
+    API endpoint to get proposals ranked by their review aggregates.
+
+    data schema:
+    - proposal_id: int
+    - title: str
+    - first_name: str
+    - last_name: str
+    - format: str
+    - count: int
+    - mean: float
+    - variance: float
+    - reviewers: List[int]
+    """
+    if not current_user:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+
+    staff = get_something_where_two_fields(
+        "staff", "email", current_user.get("email"), "staff_secret_key", STAFF_SECRET_KEY
+    )
+    if not staff:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+
+    if current_user.get("role") not in ["Admin", "Program-manager"] or current_user.get("full_name") != staff[0].get("fullname"):
+        raise HTTPException(status_code=403, detail="Not authorized to view proposals")
+
+    if not review_stats.loaded:
+        review_stats.load(get_everything.fresh("proposalreviews"))
+
+    proposals = get_everything_columns(
+        "proposals", "id", "title", "first_name", "last_name", "format", "status"
+    ) or []
+    proposals_by_id = {proposal["id"]: proposal for proposal in proposals}
+
+    ranking = []
+    for rank, row in enumerate(review_stats.ranking(), start=1):
+        proposal = proposals_by_id.get(row["proposal_id"], {})
+        ranking.append(
+            {
+                "rank": rank,
+                "proposal_id": row["proposal_id"],
+                "title": proposal.get("title"),
+                "first_name": proposal.get("first_name"),
+                "last_name": proposal.get("last_name"),
+                "format": proposal.get("format"),
+                "status": proposal.get("status"),
+                "count": row["count"],
+                "mean": row["mean"],
+                "variance": row["variance"],
+                "reviewers": row["reviewers"],
+            }
+        )
+    if not ranking:
+        return JSONResponse(content={"message": "No proposal reviews found."}, status_code=404)
+
+    return FastJSONResponse(
+        {
+            "ranking": ranking,
+            "coverage": review_stats.coverage(len(proposals_by_id)),
+        }
+    )
+
 @app.get("/api/speakers")
-def api_proposals_accepted():
+async def api_proposals_accepted(request: Request):
     """
     API endpoint to get all accepted proposals.
 
@@ -1045,13 +2209,18 @@ def api_proposals_accepted():
     - technical_needs: str
     - accepted: bool
     """
-    accepted_proposals = get_everything_where("proposals", "accepted", True)
+    snapshot = await public_snapshots.get_async("speakers")
+    if snapshot:
+        return snapshot_response(request, snapshot)
+    accepted_proposals = await get_public_where.run_async("proposals", "accepted", True)
     if not accepted_proposals:
         return JSONResponse(
             content={"message": "No accepted proposals found."}, status_code=404
         )
     sorted_proposals = _sorted(accepted_proposals, SPEAKER_ORDER,"first_name")
-    return sorted_proposals
+    if served_stale():
+        return sorted_proposals
+    return snapshot_response(request, public_snapshots.put("speakers", sorted_proposals))
 
 @app.get("/api/propreviews")
 def api_proposal_reviews(current_user: dict = Depends(get_current_user)):
@@ -1080,8 +2249,10 @@ def api_proposal_reviews(current_user: dict = Depends(get_current_user)):
     reviews = get_everything("proposalreviews")
     if not reviews:
         return JSONResponse(content={"message": "No proposal reviews found."}, status_code=404)
+    if not review_stats.loaded:
+        review_stats.load(reviews)
     
-    return reviews
+    return FastJSONResponse(reviews)
 
 
 
@@ -1105,7 +2276,7 @@ def api_waitlist(current_user: dict = Depends(get_current_user)):
 
 # get sponsors who has paid
 @app.get("/api/sponsors")
-def api_sponsors():
+async def api_sponsors(request: Request):
     """
     API endpoint to get all sponsors who have paid.
 
@@ -1121,7 +2292,10 @@ def api_sponsors():
     - paid: bool
     - accepted: bool
     """
-    sponsors = get_everything_where("sponsorinquiry", "paid", True)
+    snapshot = await public_snapshots.get_async("sponsors")
+    if snapshot:
+        return snapshot_response(request, snapshot)
+    sponsors = await get_public_where.run_async("sponsorinquiry", "paid", True)
     if not sponsors:
         return JSONResponse(content={"message": "No sponsors found."}, status_code=404)
     sponsors_sorted = _sorted(
@@ -1129,7 +2303,9 @@ def api_sponsors():
             SPONSOR_ORDER,
             "level"
         )
-    return sponsors_sorted
+    if served_stale():
+        return sponsors_sorted
+    return snapshot_response(request, public_snapshots.put("sponsors", sponsors_sorted))
 
 
 @app.get("/api/volunteerinquiries/{id}")
@@ -1238,11 +2414,8 @@ def api_register_attendee(
         )
     
 
-    existing_registration = get_everything_where(
-        "registrations", "email", registration.email
-    )
-
-    if existing_registration:
+    email_normalized = normalize_email(registration.email)
+    if registration_email_exists(email_normalized):
         raise HTTPException(
             status_code=400, detail="An attendee with this email already exists"
         )
@@ -1251,6 +2424,7 @@ def api_register_attendee(
         "id": _id,
         "fullName": registration.fullName,
         "email": registration.email,
+        "email_normalized": email_normalized,
         "phone": registration.phone,
         "organization": registration.organization,
         "country": registration.country,
@@ -1261,18 +2435,43 @@ def api_register_attendee(
         "checked": registration.checked,
     }
 
-    added = insert_something("registrations", registration_data)
+    for _ in range(3):
+        registration_data["ticket_ref"] = new_ticket_reference()
+        try:
+            added = insert_something("registrations", registration_data)
+            break
+        except Exception as e:
+            if is_unique_violation(e) and "ticket_ref" in str(e):
+                # Allocated by another instance meanwhile, draw a new one
+                ticket_refs.invalidate()
+                continue
+            if is_unique_violation(e):
+                known_emails.add(email_normalized)
+                raise HTTPException(
+                    status_code=400, detail="An attendee with this email already exists"
+                )
+            raise
+    else:
+        raise HTTPException(status_code=500, detail="Failed to allocate a ticket reference")
 
     if not added:
         raise HTTPException(status_code=500, detail="Failed to register attendee")
+    known_emails.add(email_normalized)
+    ticket_refs.add(registration_data["ticket_ref"], registration_data["id"])
+    _registration_added(registration_data)
     try:
         send_ticket_email(
             registration.fullName,
             registration.email,
             registration_data["id"],
+            ref=registration_data["ticket_ref"],
         )
         return JSONResponse(
-        content={"message": "Attendee registered successfully.", "id": registration_data["id"]},
+        content={
+            "message": "Attendee registered successfully.",
+            "id": registration_data["id"],
+            "ticket_ref": registration_data["ticket_ref"],
+        },
         status_code=201,
     )
     except Exception as e:
@@ -1285,40 +2484,270 @@ def api_register_attendee(
 
 
 
+def _import_one(entry, registration):
+    """
+    Insert one registration of an import whose chunk failed, setting the
+    report entry to already_registered or failed when it cannot be added.
+    """
+    try:
+        if insert_something("registrations", registration):
+            return True
+    except Exception as e:
+        print(f"Failed to insert registration from line {entry['line']}: {e}")
+    entry.pop("id", None)
+    entry.pop("ticket_ref", None)
+    try:
+        exists = get_existing_values("registrations", "email_normalized", [registration["email_normalized"]])
+    except Exception as e:
+        print(f"Failed to check registration from line {entry['line']}: {e}")
+        exists = False
+    entry["status"] = "already_registered" if exists else "failed"
+    return False
+
+
+@app.post("/api/registrations/import")
+def api_import_attendees(
+    background_tasks: BackgroundTasks,
+    file: UploadFile = File(...),
+    send_tickets: bool = True,
+    current_user: dict = Depends(get_current_user),
+):
+    """
+    API endpoint to register attendees in bulk from a CSV or XLSX file.
+
+    The header row must contain at least a name and an email column.
+    Returns one report entry per row with its status: registered,
+    duplicate, already_registered, invalid or failed.
+    """
+    if not current_user:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+
+    staff = get_something_where_two_fields(
+        "staff", "email", current_user.get("email"), "staff_secret_key", STAFF_SECRET_KEY
+    )
+    if not staff:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    if current_user.get("role") not in ["Admin", "Registration-manager"] or current_user.get("full_name") != staff[0].get("fullname"):
+        raise HTTPException(
+            status_code=403, detail="Not authorized to register attendees"
+        )
+
+    try:
+        report, candidates = prepare_import(iter_attendee_rows(file.file, file.filename))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # Always asked to the database: the in-process set may be stale or miss
+    # the attendees registered through another instance
+    existing = get_existing_values("registrations", "email_normalized", candidates.keys()) if candidates else set()
+    entries = {entry["line"]: entry for entry in report}
+    to_insert = []
+    for email, candidate in candidates.items():
+        entry = entries[candidate["line"]]
+        if email in existing:
+            entry["status"] = "already_registered"
+            continue
+        registration = build_registration(str(uuid4()), candidate["fields"])
+        registration["ticket_ref"] = new_ticket_reference()
+        # Reserve the reference so the next rows of the file cannot draw it
+        ticket_refs.add(registration["ticket_ref"], registration["id"])
+        entry["id"] = registration["id"]
+        entry["ticket_ref"] = registration["ticket_ref"]
+        to_insert.append((entry, registration))
+
+    registered = []
+    for chunk in chunked(to_insert):
+        try:
+            added = insert_something("registrations", [registration for _, registration in chunk])
+        except Exception as e:
+            print(f"Failed to insert registrations: {e}")
+            added = False
+        if not added:
+            # Usually one email registered meanwhile elsewhere breaking the
+            # unique index: retry row by row so only that one is reported
+            known_emails.invalidate()
+            ticket_refs.invalidate()
+        for entry, registration in chunk:
+            if not added and not _import_one(entry, registration):
+                continue
+            entry["status"] = "registered"
+            registered.append(registration)
+            known_emails.add(registration["email_normalized"])
+            _registration_added(registration)
+
+    if send_tickets and registered:
+        background_tasks.add_task(send_ticket_emails, registered)
+
+    summary = {}
+    for entry in report:
+        summary[entry["status"]] = summary.get(entry["status"], 0) + 1
+
+    return FastJSONResponse(
+        content={"summary": summary, "rows": report},
+        status_code=201 if registered else 200,
+    )
+
+
+BADGE_STREAM_CHUNK = 64 * 1024
+
+
+@app.get("/api/badges.pdf")
+def api_badges(
+    columns: int = 2, rows: int = 4, current_user: dict = Depends(get_current_user)
+):
+    """
+    API endpoint to download the printable badges of every attendee, as one
+    A4 PDF with columns x rows badges per page.
+    """
+    if not current_user:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+
+    staff = get_something_where_two_fields(
+        "staff", "email", current_user.get("email"), "staff_secret_key", STAFF_SECRET_KEY
+    )
+    if not staff:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    if current_user.get("role") not in ["Admin", "Registration-manager"] or current_user.get("full_name") != staff[0].get("fullname"):
+        raise HTTPException(
+            status_code=403, detail="Not authorized to view registrations"
+        )
+    if not (1 <= columns <= 4 and 1 <= rows <= 8):
+        raise HTTPException(status_code=400, detail="Invalid badge layout")
+
+    def badge_sheet():
+        registrations = iter_columns_paged(
+            "registrations", "id", "fullName", "organization", "ticket_ref"
+        )
+        with tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024) as sheet:
+            write_badge_sheet(registrations, sheet, columns=columns, rows=rows)
+            sheet.seek(0)
+            while chunk := sheet.read(BADGE_STREAM_CHUNK):
+                yield chunk
+
+    return StreamingResponse(
+        badge_sheet(),
+        media_type="application/pdf",
+        headers={"Content-Disposition": 'attachment; filename="pycontg-2025-badges.pdf"'},
+    )
+
+
+def _refresh_speaker_images(speaker_id, field, url):
+    try:
+        variants = generate_speaker_images(speaker_id, field, url)
+    except Exception as e:
+        print(f"Could not build the {field} derivatives of speaker {speaker_id}: {e}")
+        return
+    # Only stored if the image was not changed again in the meantime
+    if update_where_in("proposals", "id", [speaker_id], {variants_column(field): variants}, **{field: url}):
+        _speakers_changed()
+
+
 @app.patch("/api/speakers/{speaker_id}")
-async def update_speaker(speaker_id: int, update: UpdateSpeakerModel):
+def update_speaker(
+    speaker_id: int,
+    update: UpdateSpeakerModel,
+    background_tasks: BackgroundTasks,
+    current_user: dict = Depends(get_current_user),
+):
+    """
+    API endpoint to update the profile of a speaker. Only the fields sent
+    and actually different from the stored values are written.
+
+    When photo_url or banner_url change, WebP derivatives (avatar sizes,
+    banner widths) are built in the background and stored in
+    photo_variants / banner_variants as {size: url}.
+
+    data schema:
+    - speaker_id: int
+    - updated: Dict[str, Any]
+    """
+    if not current_user:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    staff = get_something_where_two_fields(
+        "staff", "email", current_user.get("email"), "staff_secret_key", STAFF_SECRET_KEY
+    )
+    if not staff:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    if current_user.get("role") not in ["Admin", "Program-manager"] or current_user.get("full_name") != staff[0].get("fullname"):
+        raise HTTPException(status_code=403, detail="Not authorized to update speakers")
+
     update_data = update.dict(exclude_unset=True)
-    
     if not update_data:
         raise HTTPException(status_code=400, detail="Aucune donnée à mettre à jour.")
 
-    # Simule une mise à jour en base de données
-    print(f"Updating speaker {speaker_id} with: {update_data}")
+    current = get_columns_by_id("proposals", speaker_id, *update_data)
+    if current is None:
+        raise HTTPException(status_code=404, detail="Speaker not found")
+    changes = {field: value for field, value in update_data.items() if current.get(field) != value}
+    if not changes:
+        return {"speaker_id": speaker_id, "updated": {}}
+
+    images = [field for field in SPEAKER_IMAGES if field in changes]
+    data = dict(changes)
+    for field in images:
+        # The derivatives of the previous image no longer match
+        data[variants_column(field)] = None
+    if not update_something("proposals", speaker_id, data):
+        raise HTTPException(status_code=500, detail="Could not update speaker")
 
-    return {"speaker_id": speaker_id, "updated": update_data}
+    _speakers_changed()
+    for field in images:
+        if changes[field]:
+            background_tasks.add_task(_refresh_speaker_images, speaker_id, field, changes[field])
+
+    return {"speaker_id": speaker_id, "updated": changes}
 
 
 connected_clients: typing.List[WebSocket] = []
 
 
+async def _broadcast(data, sender=None):
+    for client in list(connected_clients):
+        if client == sender:
+            continue
+        try:
+            await client.send_json(data)
+        except Exception:
+            if client in connected_clients:
+                connected_clients.remove(client)
+
+
 @app.websocket("/ws/checkin")
-async def websocket_checkin(websocket: WebSocket):
+async def websocket_checkin(websocket: WebSocket, token: str = ""):
+    """
+    Live check-in feed of the registration desk. Browsers cannot set headers
+    on a websocket, so the access token is sent as the token query parameter.
+    """
+    try:
+        current_user = await get_current_user(token)
+    except HTTPException:
+        current_user = None
+    if not current_user or current_user.get("role") not in ["Admin", "Registration-manager"]:
+        await websocket.close(code=1008)
+        return
     await websocket.accept()
     connected_clients.append(websocket)
     try:
+        await websocket.send_json({"type": "arrivals", **arrival_rates.snapshot()})
         while True:
             data = await websocket.receive_json()
             # optionnel: filtrer ou valider les données reçues
             # puis broadcaster à tous les autres
-            for client in connected_clients:
-                if client != websocket:
-                    await client.send_json(data)
+            await _broadcast(data, sender=websocket)
 
     except WebSocketDisconnect:
-        connected_clients.remove(websocket)
+        if websocket in connected_clients:
+            connected_clients.remove(websocket)
 
 
 if __name__ == "__main__":
-    import uvicorn
+    import sys
+
+    if sys.argv[1:] == ["publish"]:
+        # python main.py publish
+        for name, entry in publish_public_snapshots().items():
+            print(f"{name}: {entry['file']} ({entry['bytes']} bytes)")
+    else:
+        import uvicorn
 
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+        uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,13 @@
+-- One review per reviewer and proposal, required by the upsert in
+-- POST /api/review/{id} and POST /api/review/batch.
+
+-- Keep the most recent review when duplicates already exist.
+delete from proposalreviews a
+using proposalreviews b
+where a.proposal_id = b.proposal_id
+  and a.reviewer_id = b.reviewer_id
+  and a.id < b.id;
+
+alter table proposalreviews
+  add constraint proposalreviews_proposal_reviewer_key
+  unique (proposal_id, reviewer_id);
@@ -0,0 +1,14 @@
+-- Normalized email used for registration duplicate checks, see
+-- utils/emails.py normalize_email (default EMAIL_PLUS_POLICY=keep).
+
+alter table registrations add column if not exists email_normalized text;
+
+update registrations
+set email_normalized = lower(trim(email))
+where email_normalized is null;
+
+-- Duplicates must be resolved before the unique index can be created:
+--   select email_normalized, count(*) from registrations
+--   group by email_normalized having count(*) > 1;
+create unique index if not exists registrations_email_normalized_key
+  on registrations (email_normalized);
@@ -0,0 +1,15 @@
+-- Ticket reference allocated at registration, see utils/ticket_refs.py.
+
+alter table registrations add column if not exists ticket_ref text;
+
+-- Tickets already sent carry the reference derived from the UUID
+update registrations
+set ticket_ref = 'PYCONTG-2025-' || upper(left(id::text, 6))
+where ticket_ref is null;
+
+-- Colliding legacy references must be reallocated before the unique index
+-- can be created:
+--   select ticket_ref, count(*) from registrations
+--   group by ticket_ref having count(*) > 1;
+create unique index if not exists registrations_ticket_ref_key
+  on registrations (ticket_ref);
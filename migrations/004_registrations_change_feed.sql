@@ -0,0 +1,59 @@
+-- Change feed of registrations for GET /api/registrations/changes: every
+-- insert and update takes the next value of a sequence, deletes leave a
+-- tombstone numbered from the same sequence.
+
+create sequence if not exists registrations_change_seq;
+
+alter table registrations add column if not exists updated_at timestamptz default now();
+alter table registrations add column if not exists change_seq bigint;
+
+with ordered as (
+  select id, row_number() over (order by created_at, id) as seq
+  from registrations
+  where change_seq is null
+)
+update registrations r
+set change_seq = ordered.seq + (select coalesce(max(change_seq), 0) from registrations)
+from ordered
+where r.id = ordered.id;
+
+select setval('registrations_change_seq', greatest((select coalesce(max(change_seq), 0) from registrations), 1));
+
+create index if not exists registrations_change_seq_idx on registrations (change_seq);
+
+create table if not exists registration_tombstones (
+  id uuid primary key,
+  change_seq bigint not null,
+  deleted_at timestamptz not null default now()
+);
+
+create index if not exists registration_tombstones_change_seq_idx
+  on registration_tombstones (change_seq);
+
+create or replace function registrations_touch() returns trigger as $$
+begin
+  new.change_seq := nextval('registrations_change_seq');
+  new.updated_at := now();
+  return new;
+end;
+$$ language plpgsql;
+
+drop trigger if exists registrations_touch on registrations;
+create trigger registrations_touch
+  before insert or update on registrations
+  for each row execute function registrations_touch();
+
+create or replace function registrations_tombstone() returns trigger as $$
+begin
+  insert into registration_tombstones (id, change_seq)
+  values (old.id, nextval('registrations_change_seq'))
+  on conflict (id) do update
+    set change_seq = excluded.change_seq, deleted_at = now();
+  return old;
+end;
+$$ language plpgsql;
+
+drop trigger if exists registrations_tombstone on registrations;
+create trigger registrations_tombstone
+  after delete on registrations
+  for each row execute function registrations_tombstone();
@@ -0,0 +1,15 @@
+-- Append-only log of check-ins and food checks, written in batches by the
+-- API, for arrival rates per door.
+
+create table if not exists checkin_events (
+  id bigint generated always as identity primary key,
+  registration_id uuid not null,
+  kind text not null check (kind in ('checkin', 'food')),
+  door text,
+  staff_email text,
+  scanned_at timestamptz not null,
+  recorded_at timestamptz not null default now()
+);
+
+create index if not exists checkin_events_scanned_at_idx
+  on checkin_events (scanned_at);
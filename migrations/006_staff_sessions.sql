@@ -0,0 +1,17 @@
+-- Refresh token sessions of staff members. Only the SHA-256 of the
+-- current refresh token is stored; every refresh replaces it.
+
+create table if not exists staff_sessions (
+  id uuid primary key,
+  staff_id bigint not null,
+  email text not null,
+  device text,
+  token_hash text not null,
+  created_at timestamptz not null default now(),
+  last_used_at timestamptz not null default now(),
+  expires_at timestamptz not null,
+  revoked_at timestamptz
+);
+
+create index if not exists staff_sessions_staff_id_idx
+  on staff_sessions (staff_id) where revoked_at is null;
@@ -0,0 +1,14 @@
+-- Speaker profile fields edited through PATCH /api/speakers/{id}, and the
+-- WebP derivatives of the speaker images, {size: url}, see
+-- utils/speaker_images.py.
+
+alter table proposals add column if not exists fullname text;
+alter table proposals add column if not exists short_bio text;
+alter table proposals add column if not exists company text;
+alter table proposals add column if not exists country text;
+alter table proposals add column if not exists social_link text;
+alter table proposals add column if not exists social_platform text;
+alter table proposals add column if not exists photo_url text;
+alter table proposals add column if not exists banner_url text;
+alter table proposals add column if not exists photo_variants jsonb;
+alter table proposals add column if not exists banner_variants jsonb;
@@ -0,0 +1,72 @@
+-- Commit-safe cursor for GET /api/registrations/changes.
+--
+-- change_seq is taken when the statement runs, not when its transaction
+-- commits: a transaction committing late can land below a cursor already
+-- handed out, and scanners would miss that change. Every change now also
+-- records the id of its transaction, and the feed only returns changes of
+-- transactions older than the oldest one still running, ordered by
+-- (change_xid, change_seq). Once a cursor passes a transaction id, every
+-- transaction below it has finished and nothing can land behind it.
+
+alter table registrations add column if not exists change_xid xid8;
+alter table registration_tombstones add column if not exists change_xid xid8;
+
+update registrations set change_xid = '0' where change_xid is null;
+update registration_tombstones set change_xid = '0' where change_xid is null;
+
+create index if not exists registrations_change_xid_idx
+  on registrations (change_xid, change_seq);
+create index if not exists registration_tombstones_change_xid_idx
+  on registration_tombstones (change_xid, change_seq);
+
+create or replace function registrations_touch() returns trigger as $$
+begin
+  new.change_xid := pg_current_xact_id();
+  new.change_seq := nextval('registrations_change_seq');
+  new.updated_at := now();
+  return new;
+end;
+$$ language plpgsql;
+
+create or replace function registrations_tombstone() returns trigger as $$
+begin
+  insert into registration_tombstones (id, change_seq, change_xid)
+  values (old.id, nextval('registrations_change_seq'), pg_current_xact_id())
+  on conflict (id) do update
+    set change_seq = excluded.change_seq,
+        change_xid = excluded.change_xid,
+        deleted_at = now();
+  return old;
+end;
+$$ language plpgsql;
+
+-- Changes after the (since_xid, since_seq) cursor, oldest first, and the
+-- horizon: the oldest transaction still running, below which every change
+-- is visible. Columns match REGISTRATION_SYNC_COLUMNS in main.py.
+create or replace function registration_changes(since_xid text, since_seq bigint, max_rows int)
+returns jsonb language sql stable as $$
+  with horizon as (
+    select pg_snapshot_xmin(pg_current_snapshot()) as xmin
+  ),
+  events as (
+    select r.id, r."fullName", r.ticket_ref, r.checked, r.foodchecked,
+           r.change_xid, r.change_seq, false as deleted
+    from registrations r, horizon h
+    where (r.change_xid, r.change_seq) > (since_xid::xid8, since_seq)
+      and r.change_xid < h.xmin
+    union all
+    select t.id, null, null, null, null, t.change_xid, t.change_seq, true
+    from registration_tombstones t, horizon h
+    where (t.change_xid, t.change_seq) > (since_xid::xid8, since_seq)
+      and t.change_xid < h.xmin
+    order by change_xid, change_seq
+    limit max_rows
+  )
+  select jsonb_build_object(
+    'horizon', (select xmin::text from horizon),
+    'rows', coalesce(
+      (select jsonb_agg(to_jsonb(e) order by e.change_xid, e.change_seq) from events e),
+      '[]'::jsonb
+    )
+  )
+$$;
@@ -0,0 +1,6 @@
+-- Hash of the refresh token a session replaced last, and when: a client
+-- whose refresh response was lost retries with that token, which is
+-- accepted for a short grace window instead of being taken for a reuse.
+
+alter table staff_sessions add column if not exists previous_token_hash text;
+alter table staff_sessions add column if not exists rotated_at timestamptz;
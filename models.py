@@ -1,4 +1,5 @@
-from typing import Optional
+from datetime import datetime
+from typing import Literal, Optional
 from uuid import UUID, uuid4
 from pydantic import BaseModel, Field
 from fastapi import UploadFile, File
@@ -6,6 +7,29 @@ from fastapi import UploadFile, File
 class CheckInUpdate(BaseModel):
     isChecked: bool
 
+class QueuedScan(BaseModel):
+    id: str = Field(..., title="ID", description="Registration UUID")
+    kind: Literal["checkin", "food"] = Field(
+        "checkin", title="Kind", description="Entrance check-in or food check"
+    )
+    scanned_at: Optional[datetime] = Field(
+        None, title="Scanned at", description="When the scanner read the ticket"
+    )
+
+class CheckInBatch(BaseModel):
+    scans: list[QueuedScan] = Field(..., title="Scans", description="Scans queued by a scanner")
+    door: Optional[str] = Field(None, title="Door", description="Door the scanner is posted at")
+
+class TicketVerifyModel(BaseModel):
+    token: str = Field(..., title="Token", description="Content of the ticket QR code")
+    checkin: bool = Field(
+        False, title="Check in", description="Also check the attendee in"
+    )
+    door: Optional[str] = Field(None, title="Door", description="Door the scanner is posted at")
+
+class RefreshTokenModel(BaseModel):
+    refresh_token: str = Field(..., title="Refresh token")
+
 class StaffModel(BaseModel):
     fullname: str
     email: str
@@ -69,6 +93,12 @@ class DeleteModel(BaseModel):
     )
 
 
+class VolunteerStatusModel(BaseModel):
+    status: Literal["accepted", "waiting", "rejected"] = Field(
+        ..., title="Status", description="New status of the volunteer inquiry"
+    )
+
+
 class ProposalReviewModel(BaseModel):
     reviewer_id: int = Field(..., title="REVIEWER_ID")
     reviewer: str = Field(..., title="Reviewer Fullname")
@@ -77,6 +107,11 @@ class ProposalReviewModel(BaseModel):
     comment: str = Field(..., title="Comment")
 
 
+class ProposalReviewBatchModel(BaseModel):
+    reviews: list[ProposalReviewModel] = Field(
+        ..., title="Reviews", description="Reviews submitted by one reviewer in a session"
+    )
+
 
 class UpdateSpeakerModel(BaseModel):
     fullname: Optional[str] = None
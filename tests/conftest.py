@@ -0,0 +1,11 @@
+import os
+
+# The repository root is a package whose __init__ creates the Supabase
+# client, and main reads its settings at import time. The tests never reach
+# Supabase, they only need the settings to be present
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_KEY", "test.key.signature")
+os.environ.setdefault("JWT_SECRET", "test-jwt-secret-of-at-least-32-bytes")
+os.environ.setdefault("JWT_ALGORITHM", "HS256")
+os.environ.setdefault("JWT_EXPIRE_MINUTES", "15")
+os.environ.setdefault("TICKET_SIGNING_KEY", "test-ticket-key")
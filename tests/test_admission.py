@@ -0,0 +1,103 @@
+import asyncio
+
+from fastapi import BackgroundTasks, FastAPI
+
+from utils.admission import AdmissionMiddleware, AdmissionPool
+
+
+def _scope(path):
+    return {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [],
+        "client": ("127.0.0.1", 1234),
+        "server": ("testserver", 80),
+    }
+
+
+async def _request(app, path):
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    await app(_scope(path), receive, send)
+    return messages
+
+
+def test_background_tasks_do_not_hold_the_slot():
+    async def run():
+        started = asyncio.Event()
+        finish = asyncio.Event()
+
+        async def bulk_work():
+            started.set()
+            await finish.wait()
+
+        inner = FastAPI()
+
+        @inner.post("/api/bulk")
+        async def bulk(background_tasks: BackgroundTasks):
+            background_tasks.add_task(bulk_work)
+            return {"queued": True}
+
+        @inner.post("/api/quick")
+        async def quick():
+            return {"ok": True}
+
+        pool = AdmissionPool("admin-bulk", concurrency=1, queue=0, max_wait=1, retry_after=10)
+        app = AdmissionMiddleware(inner, [pool], [], default="admin-bulk")
+
+        first = asyncio.create_task(_request(app, "/api/bulk"))
+        await started.wait()
+        # The first response is sent and its background task still running
+        assert pool.active == 0
+
+        second = await asyncio.wait_for(_request(app, "/api/quick"), 1)
+        assert second[0]["status"] == 200
+
+        finish.set()
+        await first
+        assert pool.active == 0
+        assert pool.counts["shed"] == 0
+
+    asyncio.run(run())
+
+
+def test_slot_is_held_until_the_response_is_sent():
+    async def run():
+        release = asyncio.Event()
+        inner = FastAPI()
+
+        @inner.post("/api/slow")
+        async def slow():
+            await release.wait()
+            return {"ok": True}
+
+        pool = AdmissionPool("admin-bulk", concurrency=1, queue=0, max_wait=1, retry_after=10)
+        app = AdmissionMiddleware(inner, [pool], [], default="admin-bulk")
+
+        first = asyncio.create_task(_request(app, "/api/slow"))
+        await asyncio.sleep(0.05)
+        assert pool.active == 1
+
+        shed = await _request(app, "/api/slow")
+        assert shed[0]["status"] == 503
+        assert (b"retry-after", b"10") in shed[0]["headers"]
+
+        release.set()
+        messages = await first
+        assert messages[0]["status"] == 200
+        assert pool.active == 0
+
+    asyncio.run(run())
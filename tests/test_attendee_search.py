@@ -0,0 +1,71 @@
+import threading
+import time
+
+import datas
+from utils.attendee_search import AttendeeIndex
+
+
+ROWS = [
+    {"id": "1", "fullName": "Kossi Agbéko", "organization": "PyTogo", "ticket_ref": "PYCONTG-2025-000001"},
+    {"id": "2", "fullName": "Ama Mensah", "organization": "Lomé Dev", "ticket_ref": "PYCONTG-2025-000002"},
+]
+
+
+def test_accent_insensitive_prefix_search():
+    index = AttendeeIndex()
+    index.load(ROWS)
+    assert [row["id"] for row in index.search("agbe", 10)] == ["1"]
+    assert [row["id"] for row in index.search("lome", 10)] == ["2"]
+
+
+def test_stale_index_is_served_while_one_reload_runs(monkeypatch):
+    index = AttendeeIndex(ttl=60)
+    index.load(ROWS[:1])
+    index._loaded_at -= 120
+    monkeypatch.setattr(datas, "attendee_index", index)
+
+    release = threading.Event()
+    calls = []
+
+    def iter_columns_paged(table, *columns):
+        calls.append(table)
+        release.wait(5)
+        return ROWS
+
+    monkeypatch.setattr(datas, "iter_columns_paged", iter_columns_paged)
+
+    threads = [threading.Thread(target=datas.search_registrations, args=("kossi", 10)) for _ in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(1)
+        assert not thread.is_alive()
+    assert [row["id"] for row in datas.search_registrations("ama", 10)] == []
+
+    release.set()
+    for _ in range(100):
+        if index.warm:
+            break
+        time.sleep(0.01)
+    assert calls == ["registrations"]
+    assert [row["id"] for row in datas.search_registrations("ama", 10)] == ["2"]
+
+
+def test_cold_callers_share_one_load(monkeypatch):
+    index = AttendeeIndex()
+    monkeypatch.setattr(datas, "attendee_index", index)
+    calls = []
+
+    def iter_columns_paged(table, *columns):
+        calls.append(table)
+        time.sleep(0.05)
+        return ROWS
+
+    monkeypatch.setattr(datas, "iter_columns_paged", iter_columns_paged)
+    threads = [threading.Thread(target=datas.load_attendee_index) for _ in range(10)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert calls == ["registrations"]
+    assert index.warm
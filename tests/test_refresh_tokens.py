@@ -0,0 +1,154 @@
+from datetime import datetime, timedelta, timezone
+
+import jwt
+import pytest
+from fastapi import HTTPException
+
+import main
+from models import RefreshTokenModel
+from utils.auths import JWT_ALGORITHM, JWT_SECRET, create_refresh_token
+
+
+STAFF = {"id": 7, "email": "desk@pycon.tg", "fullname": "Desk Staff", "role": "Registration-manager"}
+
+
+class FakeSessions:
+    """
+    The staff_sessions and staff tables, as the refresh route uses them.
+    """
+
+    def __init__(self):
+        self.sessions = {}
+        self.staff = {STAFF["id"]: dict(STAFF)}
+
+    def get_staff_session(self, session_id):
+        session = self.sessions.get(session_id)
+        return dict(session) if session else None
+
+    def rotate_staff_session(self, session_id, token_hash, new_token_hash, last_used_at, previous=None):
+        session = self.sessions.get(session_id)
+        if session is None or session["token_hash"] != token_hash or session["revoked_at"]:
+            return False
+        session["previous_token_hash"], session["rotated_at"] = previous or (token_hash, last_used_at)
+        session["token_hash"] = new_token_hash
+        return True
+
+    def revoke_staff_sessions(self, revoked_at, staff_id, session_id=None):
+        revoked = 0
+        for session in self.sessions.values():
+            if session["staff_id"] == staff_id and not session["revoked_at"]:
+                if session_id is None or session["id"] == session_id:
+                    session["revoked_at"] = revoked_at
+                    revoked += 1
+        return revoked
+
+    def get_columns_by_id(self, table, id, *columns):
+        row = self.staff.get(id)
+        return {column: row[column] for column in columns} if row else None
+
+    def login(self):
+        user = {"email": STAFF["email"], "user_id": STAFF["id"], "full_name": STAFF["fullname"], "role": STAFF["role"]}
+        token, session_id, token_hash, _ = create_refresh_token(user)
+        self.sessions[session_id] = {
+            "id": session_id,
+            "staff_id": STAFF["id"],
+            "token_hash": token_hash,
+            "previous_token_hash": None,
+            "rotated_at": None,
+            "revoked_at": None,
+        }
+        return token, session_id
+
+
+@pytest.fixture
+def sessions(monkeypatch):
+    fake = FakeSessions()
+    for name in ("get_staff_session", "rotate_staff_session", "revoke_staff_sessions", "get_columns_by_id"):
+        monkeypatch.setattr(main, name, getattr(fake, name))
+    return fake
+
+
+def refresh(token):
+    return main.refresh_access_token(RefreshTokenModel(refresh_token=token))
+
+
+def claims(token):
+    return jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
+
+
+def test_refresh_rotates_the_token(sessions):
+    token, session_id = sessions.login()
+    first = refresh(token)
+    assert first["refresh_token"] != token
+    assert claims(first["refresh_token"])["sid"] == session_id
+
+    second = refresh(first["refresh_token"])
+    assert claims(second["access_token"])["sub"] == STAFF["email"]
+    assert not sessions.sessions[session_id]["revoked_at"]
+
+
+def test_retry_within_the_grace_window_is_accepted(sessions):
+    token, session_id = sessions.login()
+    lost = refresh(token)
+    # The response was lost, the client retries with the token it still holds
+    retried = refresh(token)
+    assert retried["refresh_token"] != lost["refresh_token"]
+    assert not sessions.sessions[session_id]["revoked_at"]
+    # The retry keeps the grace window of the first refresh
+    assert sessions.sessions[session_id]["rotated_at"] is not None
+
+    # Only the newest token lives on
+    refresh(retried["refresh_token"])
+    with pytest.raises(HTTPException) as e:
+        refresh(lost["refresh_token"])
+    assert e.value.status_code == 401
+
+
+def test_reuse_after_the_grace_window_revokes_the_session(sessions):
+    token, session_id = sessions.login()
+    refresh(token)
+    session = sessions.sessions[session_id]
+    session["rotated_at"] = (
+        datetime.now(timezone.utc) - timedelta(seconds=main.REFRESH_REUSE_GRACE_SECONDS + 1)
+    ).isoformat()
+
+    with pytest.raises(HTTPException) as e:
+        refresh(token)
+    assert e.value.status_code == 401
+    assert session["revoked_at"]
+
+
+def test_reuse_of_an_older_token_revokes_the_session(sessions):
+    token, session_id = sessions.login()
+    second = refresh(token)["refresh_token"]
+    refresh(second)
+    with pytest.raises(HTTPException):
+        refresh(token)
+    assert sessions.sessions[session_id]["revoked_at"]
+
+
+def test_refresh_reloads_the_role(sessions):
+    token, _ = sessions.login()
+    sessions.staff[STAFF["id"]]["role"] = "Volunteer"
+    result = refresh(token)
+    assert claims(result["access_token"])["role"] == "Volunteer"
+    assert claims(result["refresh_token"])["role"] == "Volunteer"
+
+
+def test_deleted_staff_is_logged_out(sessions):
+    token, session_id = sessions.login()
+    _, other_session = sessions.login()
+    del sessions.staff[STAFF["id"]]
+    with pytest.raises(HTTPException) as e:
+        refresh(token)
+    assert e.value.status_code == 401
+    assert sessions.sessions[session_id]["revoked_at"]
+    assert sessions.sessions[other_session]["revoked_at"]
+
+
+def test_revoked_session_cannot_refresh(sessions):
+    token, session_id = sessions.login()
+    sessions.revoke_staff_sessions(datetime.now(timezone.utc).isoformat(), STAFF["id"], session_id)
+    with pytest.raises(HTTPException) as e:
+        refresh(token)
+    assert e.value.status_code == 401
@@ -0,0 +1,38 @@
+import pytest
+
+import datas
+from utils.resilience import CircuitOpenError, supabase_breaker
+
+
+class UnreachableSupabase:
+    def __init__(self):
+        self.calls = 0
+
+    def table(self, name):
+        self.calls += 1
+        raise AssertionError("Supabase called while the circuit is open")
+
+
+@pytest.fixture
+def open_circuit(monkeypatch):
+    supabase = UnreachableSupabase()
+    monkeypatch.setattr(datas, "supabase", supabase)
+    supabase_breaker._open()
+    yield supabase
+    supabase_breaker.state = "closed"
+    supabase_breaker._opened_at = None
+
+
+@pytest.mark.parametrize(
+    "read",
+    [
+        lambda: list(datas.iter_columns_paged("registrations", "id")),
+        lambda: datas.get_column_values("registrations", "email_normalized"),
+        lambda: datas._registration_id_by_ref_query("PYCONTG-2025-000001"),
+        lambda: datas.exists_where("registrations", "email_normalized", "a@x.tg"),
+    ],
+)
+def test_reads_fail_fast_while_the_circuit_is_open(open_circuit, read):
+    with pytest.raises(CircuitOpenError):
+        read()
+    assert open_circuit.calls == 0
@@ -0,0 +1,38 @@
+from utils.review_stats import ReviewAggregator
+
+
+def _review(proposal_id, reviewer_id, rate):
+    return {"proposal_id": proposal_id, "reviewer_id": reviewer_id, "rate": rate}
+
+
+def test_load_and_add():
+    stats = ReviewAggregator()
+    stats.load([_review(1, "a", 4), _review(1, "b", 2)])
+    stats.add(_review(1, "c", 3))
+    stats.add(_review(1, "a", 5))
+    proposal = stats.proposal(1)
+    assert proposal["count"] == 3
+    assert proposal["mean"] == round(10 / 3, 3)
+    assert proposal["reviewers"] == ["a", "b", "c"]
+
+
+def test_expires_after_ttl():
+    stats = ReviewAggregator(ttl=0)
+    stats.load([_review(1, "a", 4)])
+    assert not stats.loaded
+
+
+def test_reload_replaces_drifted_state():
+    stats = ReviewAggregator()
+    stats.load([_review(1, "a", 4)])
+    # Another worker added b and removed a
+    stats.load([_review(1, "b", 1)])
+    assert stats.proposal(1)["reviewers"] == ["b"]
+    assert stats.ranking() == [{"proposal_id": 1, **stats.proposal(1)}]
+
+
+def test_add_before_load_is_left_to_the_load():
+    stats = ReviewAggregator()
+    stats.add(_review(1, "a", 4))
+    assert not stats.loaded
+    assert stats.proposal(1) is None
@@ -0,0 +1,35 @@
+from utils.ttl_cache import TTLCache
+
+
+def test_get_or_load_caches_until_invalidated():
+    cache = TTLCache(ttl=60)
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return len(calls)
+
+    assert cache.get_or_load("key", loader) == 1
+    assert cache.get_or_load("key", loader) == 1
+    cache.invalidate()
+    assert cache.get_or_load("key", loader) == 2
+
+
+def test_entries_expire():
+    cache = TTLCache(ttl=0)
+    cache.put("key", "value")
+    assert cache.get("key") is None
+
+
+def test_load_started_before_invalidate_is_not_stored():
+    cache = TTLCache(ttl=60)
+
+    def stale_loader():
+        # A write lands and invalidates the cache while this read is running
+        cache.invalidate()
+        return ["stale"]
+
+    assert cache.get_or_load("key", stale_loader) == ["stale"]
+    assert cache.get("key") is None
+    assert cache.get_or_load("key", lambda: ["fresh"]) == ["fresh"]
+    assert cache.get("key") == ["fresh"]
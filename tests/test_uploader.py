@@ -0,0 +1,116 @@
+import asyncio
+import json
+import re
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from utils import uploader as uploader_module
+from utils.uploader import CloudinaryUploader, UploadError
+
+
+class FakeCloudinary(ThreadingHTTPServer):
+    """
+    Local fake of the Cloudinary upload API. The first ``failures`` attempts
+    of each public id get a 503, and the largest number of uploads handled
+    at once is recorded.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, failures=1, delay=0.05):
+        super().__init__(("127.0.0.1", 0), FakeCloudinaryHandler)
+        self.failures = failures
+        self.delay = delay
+        self.attempts = Counter()
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+
+class FakeCloudinaryHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        public_id = re.search(rb'name="public_id"\r\n\r\n([^\r]+)', body).group(1).decode()
+        server = self.server
+        with server.lock:
+            server.attempts[public_id] += 1
+            attempt = server.attempts[public_id]
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+        time.sleep(server.delay)
+        with server.lock:
+            server.in_flight -= 1
+        if attempt <= server.failures:
+            self._reply(503, {})
+        else:
+            self._reply(200, {"public_id": public_id, "secure_url": f"https://fake{self.path}/{public_id}"})
+
+    def _reply(self, status, content):
+        body = json.dumps(content).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def fake_cloudinary(monkeypatch):
+    monkeypatch.setattr(uploader_module, "RETRY_BASE_DELAY", 0.01)
+    servers = []
+
+    def start(**kwargs):
+        server = FakeCloudinary(**kwargs)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        uploader = CloudinaryUploader(
+            cloud_name="demo",
+            api_key="key",
+            api_secret="secret",
+            api_url=f"http://127.0.0.1:{server.server_port}",
+            concurrency=4,
+            retries=2,
+        )
+        return server, uploader
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def test_upload_many_retries_and_keeps_order(fake_cloudinary):
+    server, uploader = fake_cloudinary(failures=1)
+    uploads = [(b"x" * 10_000, f"tickets/{i}") for i in range(20)]
+    try:
+        results = asyncio.run(uploader.upload_many(uploads, folder="pycon2025"))
+    finally:
+        uploader.close()
+
+    assert [result["public_id"] for result in results] == [f"tickets/{i}" for i in range(20)]
+    assert [result["secure_url"] for result in results] == [
+        f"https://fake/demo/image/upload/tickets/{i}" for i in range(20)
+    ]
+    # Every upload failed once then succeeded
+    assert set(server.attempts.values()) == {2}
+    assert 1 < server.max_in_flight <= 4
+
+
+def test_upload_many_sync_reports_exhausted_retries(fake_cloudinary):
+    server, uploader = fake_cloudinary(failures=3, delay=0)
+    try:
+        results = uploader.upload_many_sync([(b"x", "tickets/a"), (b"y", "tickets/b")], folder="pycon2025")
+    finally:
+        uploader.close()
+
+    assert all(isinstance(result, UploadError) for result in results)
+    assert server.attempts == {"tickets/a": 3, "tickets/b": 3}
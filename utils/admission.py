@@ -0,0 +1,147 @@
+import asyncio
+import re
+from collections import Counter, deque
+
+from utils.responses import FastJSONResponse
+
+
+class Overloaded(Exception):
+    pass
+
+
+class AdmissionPool:
+    """
+    Concurrency limit of one traffic class, with a bounded wait queue.
+
+    At most ``concurrency`` requests run at once; up to ``queue`` more wait
+    for a slot, first come first served, for at most ``max_wait`` seconds.
+    Anything beyond is rejected at once rather than piling up.
+    """
+
+    def __init__(self, name, concurrency, queue, max_wait, retry_after):
+        self.name = name
+        self.concurrency = concurrency
+        self.queue = queue
+        self.max_wait = max_wait
+        self.retry_after = retry_after
+        self.active = 0
+        self._waiters = deque()
+        self.counts = Counter()
+
+    async def acquire(self):
+        if self.active < self.concurrency and not self._waiters:
+            self.active += 1
+            self.counts["admitted"] += 1
+            return
+        if len(self._waiters) >= self.queue:
+            self.counts["shed"] += 1
+            raise Overloaded(self.name)
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), self.max_wait)
+        except asyncio.TimeoutError:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just as the wait expired
+                self.release()
+            else:
+                waiter.cancel()
+            self.counts["shed"] += 1
+            raise Overloaded(self.name)
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            else:
+                waiter.cancel()
+            raise
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+        self.counts["admitted"] += 1
+        self.counts["queued"] += 1
+
+    def release(self):
+        # Hand the slot over to the next waiter, active stays the same
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+    def stats(self):
+        return {
+            "concurrency": self.concurrency,
+            "active": self.active,
+            "waiting": len(self._waiters),
+            **self.counts,
+        }
+
+
+class AdmissionMiddleware:
+    """
+    ASGI middleware giving each class of requests its own pool, so a burst
+    of dashboard reads cannot take the worker threads and database
+    connections the door scanners need.
+
+    ``rules`` is a list of (class, method, path regex), the first match
+    wins and unmatched requests go to ``default``. A request shed by its
+    pool gets a 503 with Retry-After. The slot is held until the response
+    is sent, background tasks run after it do not count against the pool.
+    """
+
+    def __init__(self, app, pools, rules, default):
+        self.app = app
+        self.pools = {pool.name: pool for pool in pools}
+        self.rules = [(name, method, re.compile(pattern)) for name, method, pattern in rules]
+        self.default = default
+
+    def classify(self, method, path):
+        for name, rule_method, pattern in self.rules:
+            if (rule_method is None or rule_method == method) and pattern.fullmatch(path):
+                return name
+        return self.default
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        pool = self.pools[self.classify(scope["method"], scope["path"])]
+        try:
+            await pool.acquire()
+        except Overloaded:
+            response = FastJSONResponse(
+                {"message": "Server busy, please retry."},
+                status_code=503,
+                headers={"Retry-After": str(pool.retry_after)},
+            )
+            await response(scope, receive, send)
+            return
+        released = False
+
+        def release():
+            nonlocal released
+            if not released:
+                released = True
+                pool.release()
+
+        async def send_releasing(message):
+            try:
+                await send(message)
+            finally:
+                # The slot is given back with the last body chunk, not when
+                # the app returns: Starlette runs the BackgroundTasks of a
+                # response inside the app call, and a bulk email run would
+                # otherwise hold the slot for its whole length
+                if message["type"] == "http.response.body" and not message.get("more_body", False):
+                    release()
+
+        try:
+            await self.app(scope, receive, send_releasing)
+        finally:
+            release()
+
+    def stats(self):
+        return {name: pool.stats() for name, pool in self.pools.items()}
@@ -0,0 +1,182 @@
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+
+
+ARRIVALS_WINDOW_MINUTES = 60
+ARRIVALS_HORIZON_MINUTES = 15
+# Minutes averaged for the current rate
+ARRIVALS_RATE_MINUTES = 5
+UNKNOWN_DOOR = "unknown"
+
+EVENT_LOG_MAX_PENDING = 10_000
+
+
+def to_timestamp(value=None) -> float:
+    """
+    Epoch seconds of a datetime or ISO string, naive values being UTC.
+    """
+    if value is None:
+        return time.time()
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def _iso(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat()
+
+
+class CheckinEventLog:
+    """
+    Append-only log of check-in events waiting to be inserted.
+
+    Events are written in batches of up to ``batch_size`` rows, at the
+    latest ``max_delay`` seconds after the oldest one was recorded. Failed
+    batches are kept for the next flush, dropping the oldest events past
+    EVENT_LOG_MAX_PENDING so an unreachable database cannot exhaust memory.
+    """
+
+    def __init__(self, writer, batch_size: int = 100, max_delay: float = 5.0):
+        self.writer = writer
+        self.batch_size = batch_size
+        self.max_delay = max_delay
+        self._lock = threading.Lock()
+        self._pending = []
+        self._oldest = None
+
+    def append(self, event: dict):
+        """
+        Record an event, returns True when the log is due for a flush.
+        """
+        with self._lock:
+            self._pending.append(event)
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+        return self.due()
+
+    def due(self):
+        with self._lock:
+            if self._oldest is None:
+                return False
+            return len(self._pending) >= self.batch_size or time.monotonic() - self._oldest >= self.max_delay
+
+    def __len__(self):
+        return len(self._pending)
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, []
+            self._oldest = None
+        written = 0
+        for start in range(0, len(pending), self.batch_size):
+            batch = pending[start:start + self.batch_size]
+            try:
+                self.writer(batch)
+                written += len(batch)
+            except Exception as e:
+                print(f"Failed to write {len(pending) - start} check-in events: {e}")
+                with self._lock:
+                    self._pending = pending[start:] + self._pending
+                    dropped = len(self._pending) - EVENT_LOG_MAX_PENDING
+                    if dropped > 0:
+                        print(f"Dropping {dropped} check-in events")
+                        del self._pending[:dropped]
+                    if self._oldest is None:
+                        self._oldest = time.monotonic()
+                break
+        return written
+
+
+def holt_forecast(series, horizon: int, alpha: float = 0.5, beta: float = 0.3):
+    """
+    Forecast the next values of a series with Holt's linear smoothing.
+    """
+    if not series:
+        return [0.0] * horizon
+    level, trend = float(series[0]), 0.0
+    for value in series[1:]:
+        previous = level
+        level = alpha * value + (1 - alpha) * (level + trend)
+        trend = beta * (level - previous) + (1 - beta) * trend
+    return [round(max(level + step * trend, 0.0), 2) for step in range(1, horizon + 1)]
+
+
+class ArrivalRates:
+    """
+    Per-minute arrival counts per door over a rolling window.
+
+    Each minute is one Counter of doors, so recording an arrival is a dict
+    increment and minutes falling out of the window are dropped on write.
+    Arrivals scanned offline are counted in the minute they were scanned.
+    """
+
+    def __init__(
+        self,
+        window_minutes: int = ARRIVALS_WINDOW_MINUTES,
+        horizon_minutes: int = ARRIVALS_HORIZON_MINUTES,
+    ):
+        self.window_minutes = window_minutes
+        self.horizon_minutes = horizon_minutes
+        self._lock = threading.Lock()
+        self._minutes = {}
+        self.version = 0
+
+    def add(self, door=None, at=None):
+        minute = int(to_timestamp(at) // 60)
+        current = int(time.time() // 60)
+        if minute <= current - self.window_minutes:
+            return
+        with self._lock:
+            self._minutes.setdefault(minute, Counter())[door or UNKNOWN_DOOR] += 1
+            for old in [m for m in self._minutes if m <= current - self.window_minutes]:
+                del self._minutes[old]
+            self.version += 1
+
+    def load(self, events):
+        """
+        Replace the window with the given events, each with door and scanned_at.
+        """
+        current = int(time.time() // 60)
+        minutes = {}
+        for event in events:
+            minute = int(to_timestamp(event["scanned_at"]) // 60)
+            if current - self.window_minutes < minute <= current:
+                minutes.setdefault(minute, Counter())[event.get("door") or UNKNOWN_DOOR] += 1
+        with self._lock:
+            self._minutes = minutes
+            self.version += 1
+
+    def _summary(self, series):
+        recent = series[-ARRIVALS_RATE_MINUTES:]
+        return {
+            "per_minute": series,
+            "total": sum(series),
+            "rate": round(sum(recent) / len(recent), 2),
+            "forecast": holt_forecast(series, self.horizon_minutes),
+        }
+
+    def snapshot(self, minutes=None):
+        """
+        Arrivals of the last minutes, oldest first, per door and for all
+        doors, with the current per-minute rate and a forecast of the next
+        ``horizon_minutes``. The current minute is still filling up.
+        """
+        minutes = min(minutes or self.window_minutes, self.window_minutes)
+        current = int(time.time() // 60)
+        span = range(current - minutes + 1, current + 1)
+        with self._lock:
+            counts = [self._minutes.get(minute, Counter()) for minute in span]
+        doors = sorted(set().union(*counts))
+        return {
+            "generated_at": _iso(time.time()),
+            "minutes": [_iso(minute * 60) for minute in span],
+            "all": self._summary([sum(count.values()) for count in counts]),
+            "doors": {door: self._summary([count[door] for count in counts]) for door in doors},
+        }
+
+
+arrival_rates = ArrivalRates()
@@ -0,0 +1,124 @@
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+
+
+STATS_RECONCILE_SECONDS = 300
+
+# Columns counted by value
+BREAKDOWN_FIELDS = ("tshirtsize", "dietaryrestrictions", "country")
+# Columns counted when true
+FLAG_FIELDS = ("checked", "foodchecked")
+STATS_COLUMNS = ("id",) + BREAKDOWN_FIELDS + FLAG_FIELDS
+
+UNSPECIFIED = "unspecified"
+
+
+def _value(field, value):
+    if field in FLAG_FIELDS:
+        return bool(value)
+    value = (value or "").strip() if isinstance(value, str) else value
+    return value or UNSPECIFIED
+
+
+class AttendanceStats:
+    """
+    In-memory attendance and logistics counters over the registrations.
+
+    The counted values of every registration are kept next to the counters,
+    so applying the same check-in twice, or a check-in for a registration
+    loaded later, cannot make them drift. A periodic reload from the
+    database corrects anything written behind the API's back.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._rows = {}
+        self._counters = {field: Counter() for field in BREAKDOWN_FIELDS + FLAG_FIELDS}
+        self._loaded_at = None
+        self._updated_at = None
+
+    @property
+    def loaded(self):
+        return self._loaded_at is not None
+
+    def _count(self, values, sign):
+        for field, value in values.items():
+            self._counters[field][value] += sign
+
+    def load(self, rows):
+        """
+        Replace the counters with the given rows, returns the fields whose
+        counts changed.
+        """
+        loaded = {}
+        counters = {field: Counter() for field in self._counters}
+        for row in rows:
+            values = {field: _value(field, row.get(field)) for field in self._counters}
+            loaded[str(row["id"])] = values
+            for field, value in values.items():
+                counters[field][value] += 1
+        with self._lock:
+            drift = [
+                field for field in counters
+                if +counters[field] != +self._counters[field]
+            ] if self.loaded else []
+            self._rows, self._counters = loaded, counters
+            self._loaded_at = self._updated_at = time.time()
+        return drift
+
+    def add(self, row):
+        """
+        Count a new registration, or recount an updated one.
+        """
+        registration_id = str(row["id"])
+        values = {field: _value(field, row.get(field)) for field in self._counters}
+        with self._lock:
+            previous = self._rows.get(registration_id)
+            if previous is not None:
+                self._count(previous, -1)
+            self._rows[registration_id] = values
+            self._count(values, 1)
+            self._updated_at = time.time()
+
+    def remove(self, registration_id):
+        with self._lock:
+            previous = self._rows.pop(str(registration_id), None)
+            if previous is not None:
+                self._count(previous, -1)
+                self._updated_at = time.time()
+
+    def update(self, registration_ids, **values):
+        """
+        Change counted fields, such as checked, of known registrations.
+        """
+        values = {field: _value(field, value) for field, value in values.items()}
+        with self._lock:
+            for registration_id in registration_ids:
+                row = self._rows.get(str(registration_id))
+                if row is None:
+                    continue
+                for field, value in values.items():
+                    if row[field] != value:
+                        self._counters[field][row[field]] -= 1
+                        self._counters[field][value] += 1
+                        row[field] = value
+            self._updated_at = time.time()
+
+    def snapshot(self):
+        def iso(timestamp):
+            return datetime.fromtimestamp(timestamp, timezone.utc).isoformat() if timestamp else None
+
+        with self._lock:
+            stats = {"total": len(self._rows)}
+            for field in FLAG_FIELDS:
+                stats[field] = self._counters[field][True]
+            for field in BREAKDOWN_FIELDS:
+                stats[field] = dict(sorted((+self._counters[field]).items(), key=lambda item: -item[1]))
+            stats["updated_at"] = iso(self._updated_at)
+            stats["reconciled_at"] = iso(self._loaded_at)
+        return stats
+
+
+attendance_stats = AttendanceStats()
@@ -0,0 +1,147 @@
+import csv
+import io
+import os
+
+from utils.emails import is_valid_email, normalize_email
+
+
+# Spreadsheet header -> registrations column
+COLUMN_ALIASES = {
+    "fullname": "fullName",
+    "full_name": "fullName",
+    "full name": "fullName",
+    "name": "fullName",
+    "nom": "fullName",
+    "email": "email",
+    "e-mail": "email",
+    "mail": "email",
+    "phone": "phone",
+    "telephone": "phone",
+    "téléphone": "phone",
+    "organization": "organization",
+    "organisation": "organization",
+    "company": "organization",
+    "country": "country",
+    "pays": "country",
+    "tshirtsize": "tshirtsize",
+    "tshirt": "tshirtsize",
+    "t-shirt": "tshirtsize",
+    "dietaryrestrictions": "dietaryrestrictions",
+    "dietary": "dietaryrestrictions",
+}
+
+REGISTRATION_DEFAULTS = {
+    "phone": "90000000",
+    "organization": None,
+    "country": "Togo",
+    "tshirtsize": None,
+    "dietaryrestrictions": None,
+    "newsletter": True,
+    "codeofconduct": True,
+    "checked": False,
+}
+
+INSERT_CHUNK_SIZE = 500
+
+
+def _map_header(header):
+    return [COLUMN_ALIASES.get(str(h or "").strip().lower()) for h in header]
+
+
+def _rows_from_csv(file):
+    text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+    try:
+        # Spreadsheets exported with a French locale use ";" as separator
+        header = text.readline()
+        text.seek(0)
+        delimiter = max(",;\t", key=header.count)
+        yield from csv.reader(text, delimiter=delimiter)
+    finally:
+        text.detach()
+
+
+def _rows_from_xlsx(file):
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(file, read_only=True, data_only=True)
+    try:
+        for row in workbook.active.iter_rows(values_only=True):
+            yield ["" if value is None else str(value) for value in row]
+    finally:
+        workbook.close()
+
+
+def iter_attendee_rows(file, filename: str):
+    """
+    Stream attendee rows out of an uploaded CSV or XLSX file.
+
+    Yields (line number, registration fields) tuples, the header row is
+    used to map columns and is not yielded.
+    """
+    extension = os.path.splitext(filename or "")[1].lower()
+    if extension in (".xlsx", ".xlsm"):
+        rows = _rows_from_xlsx(file)
+    elif extension in (".csv", ".txt", ""):
+        rows = _rows_from_csv(file)
+    else:
+        raise ValueError(f"Unsupported file type: {extension}")
+
+    columns = None
+    for line, row in enumerate(rows, start=1):
+        if columns is None:
+            columns = _map_header(row)
+            if "email" not in columns or "fullName" not in columns:
+                raise ValueError("The file must have a name and an email column")
+            continue
+        if not any(str(value).strip() for value in row):
+            continue
+        fields = {}
+        for column, value in zip(columns, row):
+            if column and str(value).strip():
+                fields[column] = str(value).strip()
+        yield line, fields
+
+
+def prepare_import(rows):
+    """
+    Validate and dedupe the parsed rows in memory.
+
+    Returns the report entries and the candidate registrations keyed by
+    normalized email. Every entry of the report has a line number, an email
+    and a status; candidates are still "pending" until checked against the
+    database and inserted.
+    """
+    report = []
+    candidates = {}
+    for line, fields in rows:
+        email = normalize_email(fields.get("email", ""))
+        entry = {"line": line, "email": email, "fullName": fields.get("fullName")}
+        if not fields.get("fullName"):
+            entry["status"] = "invalid"
+            entry["detail"] = "Missing name"
+        elif not is_valid_email(email):
+            entry["status"] = "invalid"
+            entry["detail"] = "Invalid email"
+        elif email in candidates:
+            entry["status"] = "duplicate"
+            entry["detail"] = f"Same email as line {candidates[email]['line']}"
+        else:
+            entry["status"] = "pending"
+            candidates[email] = {
+                "line": line,
+                "fields": {**fields, "email": fields["email"], "email_normalized": email},
+            }
+        report.append(entry)
+    return report, candidates
+
+
+def build_registration(_id: str, fields: dict) -> dict:
+    registration = dict(REGISTRATION_DEFAULTS)
+    registration.update(fields)
+    registration["id"] = _id
+    return registration
+
+
+def chunked(items: list, size: int = INSERT_CHUNK_SIZE):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
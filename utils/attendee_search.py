@@ -0,0 +1,234 @@
+import heapq
+import re
+import threading
+import time
+import unicodedata
+from bisect import bisect_left, insort
+
+from utils.ticket_refs import REF_PREFIX
+
+
+SEARCH_INDEX_TTL = 600
+SEARCH_LIMIT = 10
+
+SEARCH_COLUMNS = ("id", "fullName", "organization", "ticket_ref", "checked", "foodchecked")
+
+# Weight of a match in each field, a reference or a name beats an organization
+FIELD_WEIGHTS = {"ticket_ref": 3, "fullName": 2, "organization": 1}
+
+_separators = re.compile(r"[^0-9a-z]+")
+
+
+def fold(text: str) -> str:
+    """
+    Lowercase text without accents, so "Kossi Agbéko" matches "agbeko".
+    """
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return text.lower().replace("œ", "oe").replace("æ", "ae")
+
+
+def tokenize(text: str):
+    return [token for token in _separators.split(fold(text)) if token]
+
+
+def _ref_tokens(ref: str):
+    ref = (ref or "").strip().upper()
+    if ref.startswith(REF_PREFIX):
+        ref = ref[len(REF_PREFIX):]
+    return tokenize(ref)
+
+
+class AttendeeIndex:
+    """
+    In-process prefix index of the attendees' names, organizations and
+    ticket references, for the help desk search.
+
+    Every distinct folded token is kept in a sorted list, so the tokens
+    starting with a query word are one contiguous slice found by bisection,
+    and each token maps to the registrations holding it with the weight of
+    the field it comes from. Warmed with one paged query, updated on insert,
+    check-in and delete, and reloaded every ``ttl`` seconds.
+    """
+
+    def __init__(self, ttl: int = SEARCH_INDEX_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._tokens = []
+        # token -> {registration id: weight}
+        self._postings = {}
+        # registration id -> (summary, {token: weight}, tie-break key)
+        self._attendees = {}
+        self._loaded_at = None
+
+    @property
+    def loaded(self):
+        return self._loaded_at is not None
+
+    @property
+    def warm(self):
+        return self._loaded_at is not None and time.monotonic() - self._loaded_at < self.ttl
+
+    def invalidate(self):
+        with self._lock:
+            self._loaded_at = None
+
+    def load(self, rows):
+        postings, attendees = {}, {}
+        for row in rows:
+            entry = self._entry(row)
+            registration_id = entry[0]["id"]
+            attendees[registration_id] = entry
+            for token, weight in entry[1].items():
+                postings.setdefault(token, {})[registration_id] = weight
+        tokens = sorted(postings)
+        with self._lock:
+            self._tokens, self._postings, self._attendees = tokens, postings, attendees
+            self._loaded_at = time.monotonic()
+
+    @staticmethod
+    def _entry(row):
+        summary = {column: row.get(column) for column in SEARCH_COLUMNS}
+        summary["id"] = str(summary["id"])
+        weights = {}
+        for field, weight in FIELD_WEIGHTS.items():
+            field_tokens = _ref_tokens(row.get(field)) if field == "ticket_ref" else tokenize(row.get(field))
+            for token in field_tokens:
+                weights[token] = max(weights.get(token, 0), weight)
+        name = fold(summary.get("fullName"))
+        return summary, weights, (len(name), name)
+
+    def add(self, row):
+        """
+        Index a new registration, or re-index an updated one.
+        """
+        entry = self._entry(row)
+        registration_id = entry[0]["id"]
+        with self._lock:
+            self._remove(registration_id)
+            self._attendees[registration_id] = entry
+            for token, weight in entry[1].items():
+                if token not in self._postings:
+                    self._postings[token] = {}
+                    insort(self._tokens, token)
+                self._postings[token][registration_id] = weight
+
+    def remove(self, registration_id):
+        with self._lock:
+            self._remove(str(registration_id))
+
+    def _remove(self, registration_id):
+        entry = self._attendees.pop(registration_id, None)
+        if entry is None:
+            return
+        for token in entry[1]:
+            ids = self._postings.get(token)
+            if ids is None:
+                continue
+            ids.pop(registration_id, None)
+            if not ids:
+                del self._postings[token]
+                del self._tokens[bisect_left(self._tokens, token)]
+
+    def update(self, registration_ids, **flags):
+        """
+        Set flags such as checked or foodchecked on indexed registrations.
+        """
+        with self._lock:
+            for registration_id in registration_ids:
+                entry = self._attendees.get(str(registration_id))
+                if entry is not None:
+                    entry[0].update(flags)
+
+    def _matching_tokens(self, word):
+        start = bisect_left(self._tokens, word)
+        end = bisect_left(self._tokens, word + "\x7f", start)
+        return self._tokens[start:end]
+
+    def search(self, query: str, limit: int = SEARCH_LIMIT):
+        """
+        Registrations matching every word of the query, as a prefix of one
+        of their tokens, best matches first.
+
+        A word scores the weight of the field it matches, doubled on a whole
+        token match; ties go to the shortest name.
+        """
+        query = (query or "").strip()
+        if query.upper().startswith(REF_PREFIX):
+            query = query[len(REF_PREFIX):]
+        words = list(dict.fromkeys(tokenize(query)))
+        if not words:
+            return []
+
+        with self._lock:
+            # Score the word matching the fewest tokens from the postings,
+            # the other words are only checked on its candidates
+            matches = sorted(((self._matching_tokens(word), word) for word in words), key=lambda m: len(m[0]))
+            tokens, word = matches[0]
+            scores = {}
+            for token in tokens:
+                factor = 2 if token == word else 1
+                for registration_id, weight in self._postings[token].items():
+                    if weight * factor > scores.get(registration_id, 0):
+                        scores[registration_id] = weight * factor
+
+            for _, word in matches[1:]:
+                for registration_id in list(scores):
+                    weights = self._attendees[registration_id][1]
+                    best = weights.get(word, 0) * 2
+                    for token, weight in weights.items():
+                        if weight > best and token.startswith(word):
+                            best = weight
+                    if best:
+                        scores[registration_id] += best
+                    else:
+                        del scores[registration_id]
+
+            attendees = self._attendees
+            best = heapq.nsmallest(
+                limit,
+                scores.items(),
+                key=lambda item: (-item[1], attendees[item[0]][2]),
+            )
+            return [dict(attendees[registration_id][0], score=score) for registration_id, score in best]
+
+    def __len__(self):
+        return len(self._attendees)
+
+
+attendee_index = AttendeeIndex()
+
+
+if __name__ == "__main__":
+    import random
+
+    syllables = ["ko", "ssi", "a", "ma", "gbé", "men", "sah", "la", "wson", "kpo", "dar", "do", "ssou", "é", "lo", "ï", "se", "jé", "rô", "me", "yé", "va", "tcha", "fi"]
+    organizations = ["Python Togo", "Université de Lomé", "Société Générale", "", "Ecole Polytechnique"]
+    random.seed(1)
+
+    def name():
+        return "".join(random.choice(syllables) for _ in range(random.randint(2, 4))).capitalize()
+
+    rows = [
+        {
+            "id": f"5c663cb9-5b6c-4ff6-a2cf-{i:012d}",
+            "fullName": f"{name()} {name()}",
+            "organization": random.choice(organizations),
+            "ticket_ref": f"{REF_PREFIX}{i:06X}",
+        }
+        for i in range(10_000)
+    ]
+
+    index = AttendeeIndex()
+    start = time.perf_counter()
+    index.load(rows)
+    print(f"indexed {len(index)} attendees, {len(index._tokens)} tokens in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    for query in [rows[42]["fullName"], rows[7]["fullName"].split()[1][:4], "kossi men", "Lomé", "0001F", "PYCONTG-2025-0001F", "k"]:
+        runs = 200
+        start = time.perf_counter()
+        for _ in range(runs):
+            results = index.search(query)
+        elapsed = (time.perf_counter() - start) / runs * 1000
+        top = results[0]["fullName"] if results else "-"
+        print(f"{query!r:24} {elapsed:.3f} ms, top: {top}")
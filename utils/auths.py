@@ -1,7 +1,10 @@
 
 
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+import hashlib
 import os
+import secrets
+from uuid import uuid4
 
 import bcrypt
 from dotenv import load_dotenv
@@ -17,6 +20,7 @@ load_dotenv()
 JWT_SECRET = os.getenv("JWT_SECRET")
 JWT_ALGORITHM = os.getenv("JWT_ALGORITHM")
 JWT_EXPIRE_MINUTES = int(os.getenv("JWT_EXPIRE_MINUTES"))
+REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "14"))
 
 async def authenticate_user(email: str, password: str):
     user = auth_user(email, password)
@@ -42,6 +46,56 @@ def create_access_token(data: dict, expires_delta: timedelta = None):
     return jwt.encode(to_encode, JWT_SECRET, algorithm=JWT_ALGORITHM)
 
 
+def hash_token(secret: str) -> str:
+    """
+    Hash of a refresh token secret as stored. Secrets are 256 random bits,
+    so a plain SHA-256 is enough, unlike passwords.
+    """
+    return hashlib.sha256(secret.encode("utf-8")).hexdigest()
+
+
+def create_refresh_token(user: dict, session_id: str = None, expires_at: datetime = None):
+    """
+    Create a refresh token for a session, new unless session_id is given.
+
+    The token is a JWT carrying the session id and a random secret; only
+    the hash of the secret is stored with the session, and replaced on
+    every refresh. Returns the token, the session id, the hash of the
+    secret and the expiry of the session.
+    """
+    session_id = session_id or str(uuid4())
+    expires_at = expires_at or datetime.now(timezone.utc) + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
+    secret = secrets.token_urlsafe(32)
+    token = jwt.encode(
+        {
+            "typ": "refresh",
+            "sid": session_id,
+            "jti": secret,
+            "sub": user["email"],
+            "user_id": user["user_id"],
+            "full_name": user["full_name"],
+            "role": user["role"],
+            "exp": expires_at,
+        },
+        JWT_SECRET,
+        algorithm=JWT_ALGORITHM,
+    )
+    return token, session_id, hash_token(secret), expires_at
+
+
+def decode_refresh_token(token: str) -> dict:
+    """
+    Check a refresh token's signature and expiry, returns its claims.
+    """
+    try:
+        payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
+    except Exception:
+        raise HTTPException(status_code=401, detail="Invalid refresh token")
+    if payload.get("typ") != "refresh" or not payload.get("sid") or not payload.get("jti"):
+        raise HTTPException(status_code=401, detail="Invalid refresh token")
+    return payload
+
+
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
 
@@ -49,6 +103,8 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
     credentials_exception = HTTPException(status_code=401, detail="Invalid credentials")
     try:
         payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
+        if payload.get("typ") == "refresh":
+            raise credentials_exception
         return {
             "email": payload.get("sub"),
             "user_id": payload.get("user_id"),
@@ -0,0 +1,170 @@
+import time
+
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.utils import ImageReader
+from reportlab.pdfgen import canvas
+
+from utils.qr import QR_BORDER, qr_matrix
+from utils.ticket_tokens import sign_ticket
+
+
+BADGE_COLUMNS = 2
+BADGE_ROWS = 4
+PAGE_MARGIN = 20
+BADGE_PADDING = 12
+QR_SIZE = 110
+LOGO_PATH = "static/images/pythontogo.png"
+LOGO_SIZE = (60, 60)
+
+LOGO_FORM = "pycontg-logo"
+
+
+def _fit(text, font, size, width, c):
+    """
+    Shrink the font size until the text fits the badge width.
+    """
+    while size > 8 and c.stringWidth(text, font, size) > width:
+        size -= 1
+    return size
+
+
+def _draw_qr(c, value, x, y, size):
+    """
+    Draw a QR code as vector shapes, one rectangle per horizontal run of
+    dark modules, all filled with a single path.
+    """
+    # The badge margins already provide the quiet zone
+    matrix = [row[QR_BORDER:-QR_BORDER] for row in qr_matrix(value)[QR_BORDER:-QR_BORDER]]
+    module = size / len(matrix)
+
+    path = c.beginPath()
+    for row_index, row in enumerate(matrix):
+        top = y + size - (row_index + 1) * module
+        start = None
+        for column, dark in enumerate(row + (False,)):
+            if dark and start is None:
+                start = column
+            elif not dark and start is not None:
+                path.rect(x + start * module, top, (column - start) * module, module)
+                start = None
+    c.setFillGray(0)
+    c.drawPath(path, stroke=0, fill=1)
+
+
+def _define_logo_form(c):
+    """
+    Draw the logo once into a form XObject every badge then references.
+    """
+    logo = ImageReader(LOGO_PATH)
+    c.beginForm(LOGO_FORM)
+    c.drawImage(logo, 0, 0, *LOGO_SIZE, mask="auto", preserveAspectRatio=True)
+    c.endForm()
+
+
+def _draw_badge(c, registration, x, y, width, height):
+    c.setStrokeGray(0.8)
+    c.setLineWidth(0.5)
+    c.rect(x, y, width, height)
+
+    left = x + BADGE_PADDING
+    top = y + height - BADGE_PADDING
+    text_width = width - QR_SIZE - 3 * BADGE_PADDING
+
+    c.saveState()
+    c.translate(left, top - LOGO_SIZE[1])
+    c.doForm(LOGO_FORM)
+    c.restoreState()
+
+    c.setFillGray(0)
+    c.setFont("Helvetica-Bold", 10)
+    c.drawString(left + LOGO_SIZE[0] + 8, top - 24, "PyCon Togo 2025")
+
+    name = registration.get("fullName") or ""
+    size = _fit(name, "Helvetica-Bold", 20, text_width, c)
+    c.setFont("Helvetica-Bold", size)
+    c.drawString(left, y + height / 2 - 10, name)
+
+    organization = registration.get("organization") or ""
+    if organization:
+        size = _fit(organization, "Helvetica", 12, text_width, c)
+        c.setFont("Helvetica", size)
+        c.drawString(left, y + height / 2 - 30, organization)
+
+    ref = registration.get("ticket_ref") or ""
+    c.setFont("Helvetica", 9)
+    c.drawString(left, y + BADGE_PADDING, ref)
+
+    _draw_qr(
+        c,
+        sign_ticket(registration["id"], ref) if ref else str(registration["id"]),
+        x + width - QR_SIZE - BADGE_PADDING,
+        y + (height - QR_SIZE) / 2,
+        QR_SIZE,
+    )
+
+
+def write_badge_sheet(registrations, out, columns=BADGE_COLUMNS, rows=BADGE_ROWS):
+    """
+    Write a multi-page A4 PDF with columns x rows badges per page to out.
+
+    registrations can be any iterable, rows are consumed one page at a
+    time so they can be streamed from the database. Every page is
+    compressed and the logo is shared between all badges, so the document
+    stays small whatever the attendee count.
+
+    Returns the number of pages written.
+    """
+    page_width, page_height = A4
+    badge_width = (page_width - 2 * PAGE_MARGIN) / columns
+    badge_height = (page_height - 2 * PAGE_MARGIN) / rows
+    per_page = columns * rows
+
+    c = canvas.Canvas(out, pagesize=A4, pageCompression=1)
+    c.setTitle("PyCon Togo 2025 badges")
+    _define_logo_form(c)
+
+    pages = 0
+    slot = 0
+    for registration in registrations:
+        column, row = slot % columns, slot // columns
+        _draw_badge(
+            c,
+            registration,
+            PAGE_MARGIN + column * badge_width,
+            page_height - PAGE_MARGIN - (row + 1) * badge_height,
+            badge_width,
+            badge_height,
+        )
+        slot += 1
+        if slot == per_page:
+            c.showPage()
+            pages += 1
+            slot = 0
+    if slot or not pages:
+        c.showPage()
+        pages += 1
+    c.save()
+    return pages
+
+
+if __name__ == "__main__":
+    import os
+    import sys
+
+    os.environ.setdefault("TICKET_SIGNING_KEY", "benchmark")
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    attendees = (
+        {
+            "id": f"5c663cb9-5b6c-4ff6-a2cf-{i:012d}",
+            "fullName": f"Attendee Number {i}",
+            "organization": "Python Togo" if i % 3 else "",
+            "ticket_ref": f"PYCONTG-2025-{i:06d}",
+        }
+        for i in range(count)
+    )
+    start = time.perf_counter()
+    with open("badges_benchmark.pdf", "wb") as f:
+        pages = write_badge_sheet(attendees, f)
+    elapsed = time.perf_counter() - start
+    size = os.path.getsize("badges_benchmark.pdf")
+    print(f"{count} badges, {pages} pages in {elapsed:.2f} s ({pages / elapsed:.1f} pages/s), {size / 1024:.0f} KiB")
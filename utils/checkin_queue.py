@@ -0,0 +1,62 @@
+import threading
+import time
+
+
+class CheckinQueue:
+    """
+    Check-ins waiting to be written to the database.
+
+    Scans validated offline only need the flag to be set eventually, so they
+    are collected here and written with one set-based update per flush.
+    The writer gets the field and a {registration id: scan} dict, scan being
+    whatever was queued with the first scan of that registration.
+    """
+
+    def __init__(self, writer, batch_size: int = 50, max_delay: float = 5.0):
+        self.writer = writer
+        self.batch_size = batch_size
+        self.max_delay = max_delay
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._oldest = None
+
+    def put(self, registration_id: str, field: str = "checked", scan=None):
+        """
+        Queue a check-in, returns True when the queue is due for a flush.
+        """
+        with self._lock:
+            self._pending.setdefault(field, {}).setdefault(registration_id, scan)
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+        return self.due()
+
+    def due(self):
+        with self._lock:
+            if self._oldest is None:
+                return False
+            size = sum(len(ids) for ids in self._pending.values())
+            return size >= self.batch_size or time.monotonic() - self._oldest >= self.max_delay
+
+    def __len__(self):
+        with self._lock:
+            return sum(len(ids) for ids in self._pending.values())
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._oldest = None
+        written = 0
+        for field, ids in pending.items():
+            if not ids:
+                continue
+            try:
+                self.writer(field, ids)
+                written += len(ids)
+            except Exception as e:
+                print(f"Failed to write {len(ids)} deferred {field} updates: {e}")
+                with self._lock:
+                    # Scans queued meanwhile are newer, keep the first ones
+                    self._pending[field] = {**self._pending.get(field, {}), **ids}
+                    if self._oldest is None:
+                        self._oldest = time.monotonic()
+        return written
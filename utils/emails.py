@@ -0,0 +1,78 @@
+import os
+import threading
+import time
+
+from dotenv import load_dotenv
+
+
+load_dotenv()
+
+# "keep": john+pycon@x.tg and john@x.tg are two attendees
+# "strip": the +tag is dropped, both are the same attendee
+EMAIL_PLUS_POLICY = os.getenv("EMAIL_PLUS_POLICY", "keep")
+KNOWN_EMAILS_TTL = int(os.getenv("KNOWN_EMAILS_TTL", "600"))
+
+
+def normalize_email(email: str, plus_policy: str = EMAIL_PLUS_POLICY) -> str:
+    """
+    Normalize an email address for duplicate detection: surrounding
+    whitespace removed, lower-cased and, with the "strip" policy,
+    plus-addressing tag removed.
+    """
+    if not email:
+        return ""
+    email = email.strip().lower()
+    if plus_policy == "strip":
+        local, at, domain = email.partition("@")
+        if at:
+            email = local.split("+", 1)[0] + at + domain
+    return email
+
+
+def is_valid_email(email: str) -> bool:
+    local, _, domain = email.partition("@")
+    return bool(local) and "." in domain and " " not in email
+
+
+class KnownEmails:
+    """
+    In-process set of the normalized emails already registered.
+
+    Warmed with one narrow query and refreshed every ``ttl`` seconds. A hit
+    means the attendee exists; a miss on a warm set lets the caller skip the
+    duplicate query, the unique index on ``email_normalized`` still rejects
+    an email registered meanwhile by another instance.
+    """
+
+    def __init__(self, ttl: int = KNOWN_EMAILS_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._emails = set()
+        self._loaded_at = None
+
+    @property
+    def warm(self):
+        return self._loaded_at is not None and time.monotonic() - self._loaded_at < self.ttl
+
+    def load(self, emails):
+        emails = {email for email in emails if email}
+        with self._lock:
+            self._emails = emails
+            self._loaded_at = time.monotonic()
+
+    def invalidate(self):
+        with self._lock:
+            self._loaded_at = None
+
+    def add(self, email: str):
+        with self._lock:
+            self._emails.add(email)
+
+    def __contains__(self, email: str):
+        return email in self._emails
+
+    def __len__(self):
+        return len(self._emails)
+
+
+known_emails = KnownEmails()
@@ -0,0 +1,173 @@
+import asyncio
+import hashlib
+import os
+import re
+import time
+from collections import OrderedDict
+
+from dotenv import load_dotenv
+
+from utils.responses import FastJSONResponse
+
+
+load_dotenv()
+
+IDEMPOTENCY_TTL = int(os.getenv("IDEMPOTENCY_TTL", str(24 * 3600)))
+IDEMPOTENCY_MAX_KEYS = 10_000
+IDEMPOTENCY_MAX_BODY = 1024 * 1024
+
+
+class _Entry:
+    __slots__ = ("fingerprint", "done", "response", "stored_at")
+
+    def __init__(self, fingerprint):
+        self.fingerprint = fingerprint
+        self.done = asyncio.Event()
+        self.response = None
+        self.stored_at = time.monotonic()
+
+
+class IdempotencyStore:
+    """
+    In-process TTL store of the responses of requests sent with an
+    Idempotency-Key, least recently stored keys evicted first.
+    """
+
+    def __init__(self, ttl: int = IDEMPOTENCY_TTL, max_keys: int = IDEMPOTENCY_MAX_KEYS):
+        self.ttl = ttl
+        self.max_keys = max_keys
+        self._entries = OrderedDict()
+
+    def claim(self, key, fingerprint):
+        """
+        Entry of key and whether the caller owns its execution.
+        """
+        entry = self._entries.get(key)
+        if entry is not None and entry.done.is_set() and time.monotonic() - entry.stored_at >= self.ttl:
+            del self._entries[key]
+            entry = None
+        if entry is not None:
+            return entry, False
+        entry = self._entries[key] = _Entry(fingerprint)
+        while len(self._entries) > self.max_keys:
+            self._entries.popitem(last=False)
+        return entry, True
+
+    def complete(self, key, entry, response):
+        entry.response = response
+        entry.stored_at = time.monotonic()
+        entry.done.set()
+
+    def abandon(self, key, entry):
+        """
+        Forget a key whose execution failed, so a retry runs it again.
+        """
+        if self._entries.get(key) is entry:
+            del self._entries[key]
+        entry.done.set()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class IdempotencyMiddleware:
+    """
+    ASGI middleware replaying the stored response of a write retried with
+    the same Idempotency-Key header, without running the route again.
+
+    Only requests matching ``routes``, a list of (method, path regex), and
+    carrying the header are concerned. Keys are scoped to the caller's
+    Authorization header, method and path. A duplicate arriving while the
+    first execution is still running waits for its response; reusing a key
+    with a different body is rejected with 422. Server errors are not
+    stored, so they can be retried.
+    """
+
+    def __init__(self, app, routes, store=None):
+        self.app = app
+        self.routes = [(method, re.compile(pattern)) for method, pattern in routes]
+        self.store = store or IdempotencyStore()
+
+    def _applies(self, method, path):
+        return any(method == m and pattern.fullmatch(path) for m, pattern in self.routes)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self._applies(scope["method"], scope["path"]):
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope["headers"])
+        idempotency_key = headers.get(b"idempotency-key")
+        if not idempotency_key:
+            await self.app(scope, receive, send)
+            return
+
+        body = b""
+        more_body = True
+        while more_body:
+            message = await receive()
+            body += message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if len(body) > IDEMPOTENCY_MAX_BODY:
+                await FastJSONResponse({"message": "Request body too large."}, status_code=413)(scope, receive, send)
+                return
+
+        caller = hashlib.sha256(headers.get(b"authorization", b"")).hexdigest()
+        key = (caller, scope["method"], scope["path"], idempotency_key)
+        fingerprint = hashlib.sha256(scope.get("query_string", b"") + b"\0" + body).hexdigest()
+
+        while True:
+            entry, owner = self.store.claim(key, fingerprint)
+            if owner:
+                break
+            if entry.fingerprint != fingerprint:
+                await FastJSONResponse(
+                    {"message": "Idempotency-Key already used with a different request."},
+                    status_code=422,
+                )(scope, receive, send)
+                return
+            await entry.done.wait()
+            if entry.response is not None:
+                await self._replay(entry.response, send)
+                return
+            # The first execution failed, run it again
+
+        replayed = False
+
+        async def replay_receive():
+            nonlocal replayed
+            if replayed:
+                return await receive()
+            replayed = True
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        start, chunks = None, []
+
+        async def capture_send(message):
+            nonlocal start
+            if message["type"] == "http.response.start":
+                start = message
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, replay_receive, capture_send)
+        except BaseException:
+            self.store.abandon(key, entry)
+            raise
+        if start is None or start["status"] >= 500:
+            self.store.abandon(key, entry)
+        else:
+            self.store.complete(key, entry, (start["status"], start.get("headers", []), b"".join(chunks)))
+
+    @staticmethod
+    async def _replay(response, send):
+        status, headers, body = response
+        await send(
+            {
+                "type": "http.response.start",
+                "status": status,
+                "headers": list(headers) + [(b"idempotent-replayed", b"true")],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,282 @@
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+
+import orjson
+from dotenv import load_dotenv
+from fastapi import Request, Response
+from fastapi.concurrency import run_in_threadpool
+
+from utils.responses import COMPRESSION_MINIMUM_SIZE, ORJSON_OPTIONS, compress_body, negotiate_encoding
+
+
+load_dotenv()
+
+SNAPSHOT_DIR = os.getenv(
+    "SNAPSHOT_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "static", "snapshots"),
+)
+SNAPSHOT_CHECK_SECONDS = 2
+# Longest a hot copy is served before the route goes back to the live query,
+# so instances that cannot see a publish (read-only or separate disks)
+# still converge
+SNAPSHOT_TTL = int(os.getenv("SNAPSHOT_TTL", "300"))
+SNAPSHOT_MAX_AGE = 60
+# Versions kept on disk per snapshot, so a client holding the previous
+# hashed file name can still fetch it for a while
+SNAPSHOT_KEEP = 2
+MANIFEST = "manifest.json"
+
+
+class Snapshot:
+    """
+    JSON body of a public endpoint, with its compressed variants built once
+    on first use. published_at is None for the hot copies put back from a
+    live query, which are never written to disk.
+    """
+
+    __slots__ = ("name", "digest", "body", "published_at", "loaded_at", "_encoded")
+
+    def __init__(self, name, digest, body, published_at):
+        self.name = name
+        self.digest = digest
+        self.body = body
+        self.published_at = published_at
+        self.loaded_at = time.monotonic()
+        self._encoded = {}
+
+    @classmethod
+    def of(cls, name, content, published_at=None):
+        body = orjson.dumps(content, option=ORJSON_OPTIONS)
+        digest = hashlib.sha256(body).hexdigest()[:16]
+        return cls(name, digest, body, published_at)
+
+    @property
+    def etag(self):
+        return f'"{self.digest}"'
+
+    def encoded(self, encoding):
+        body = self._encoded.get(encoding)
+        if body is None:
+            body = self._encoded[encoding] = compress_body(self.body, encoding)
+        return body
+
+
+def _write_atomic(path, data: bytes):
+    directory = os.path.dirname(path)
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+class SnapshotStore:
+    """
+    Presorted JSON snapshots of the public endpoints, written to
+    ``directory`` as ``<name>.<hash>.json`` next to a manifest naming the
+    current file of each.
+
+    Routes read the hot in-memory copy. Every ``check_every`` seconds at
+    most, the manifest is looked at again and the snapshots whose hash
+    changed are reloaded, so a publish from the command line or another
+    worker sharing the directory is picked up without a restart. A hot copy
+    older than ``ttl`` is no longer served: the route runs its live query
+    and puts the result back as the new hot copy.
+
+    Publishing only reaches every instance at once when they share a
+    writable ``directory``. Otherwise, as on a read-only deployment, the
+    other instances pick the change up when their hot copy expires, within
+    ``ttl`` seconds.
+    """
+
+    def __init__(self, directory=SNAPSHOT_DIR, check_every=SNAPSHOT_CHECK_SECONDS, ttl=SNAPSHOT_TTL):
+        self.directory = directory
+        self.check_every = check_every
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._snapshots = {}
+        self._manifest_stamp = None
+        self._checked_at = float("-inf")
+        self.reloads = 0
+
+    def get(self, name):
+        """
+        Current snapshot of name, None when it was never published or is
+        older than the TTL.
+        """
+        if time.monotonic() - self._checked_at >= self.check_every:
+            self._refresh()
+        return self._current(name)
+
+    async def get_async(self, name):
+        """
+        Same as get(), reading the manifest and files in the thread pool
+        rather than on the event loop.
+        """
+        if time.monotonic() - self._checked_at >= self.check_every:
+            await run_in_threadpool(self._refresh)
+        return self._current(name)
+
+    def _current(self, name):
+        snapshot = self._snapshots.get(name)
+        if snapshot is None or time.monotonic() - snapshot.loaded_at >= self.ttl:
+            return None
+        return snapshot
+
+    def is_published(self, name):
+        snapshot = self._snapshots.get(name)
+        return snapshot is not None and snapshot.published_at is not None
+
+    def put(self, name, content) -> Snapshot:
+        """
+        Replace the hot copy of name with the result of its live query, in
+        memory only.
+        """
+        snapshot = Snapshot.of(name, content)
+        with self._lock:
+            current = self._snapshots.get(name)
+            if current is not None and current.digest == snapshot.digest:
+                # Same content, keep its compressed variants
+                current.loaded_at = snapshot.loaded_at
+                return current
+            self._snapshots = {**self._snapshots, name: snapshot}
+        return snapshot
+
+    def _refresh(self):
+        manifest_path = os.path.join(self.directory, MANIFEST)
+        with self._lock:
+            self._checked_at = time.monotonic()
+            try:
+                stat = os.stat(manifest_path)
+                stamp = (stat.st_mtime_ns, stat.st_size)
+            except FileNotFoundError:
+                stamp = None
+            if stamp == self._manifest_stamp:
+                return
+            try:
+                with open(manifest_path, "rb") as f:
+                    manifest = orjson.loads(f.read())
+                snapshots = {}
+                for name, entry in manifest.items():
+                    current = self._snapshots.get(name)
+                    if current is not None and current.digest == entry["hash"]:
+                        # Published again as is, valid for another TTL
+                        current.loaded_at = time.monotonic()
+                        current.published_at = entry["published_at"]
+                        snapshots[name] = current
+                        continue
+                    with open(os.path.join(self.directory, entry["file"]), "rb") as f:
+                        body = f.read()
+                    if hashlib.sha256(body).hexdigest()[:16] != entry["hash"]:
+                        raise ValueError(f"{entry['file']} does not match its hash")
+                    snapshots[name] = Snapshot(name, entry["hash"], body, entry["published_at"])
+            except (OSError, ValueError, KeyError) as e:
+                # Half written publish or a pruned file, keep serving the hot copy
+                print(f"Could not reload public snapshots: {e}")
+                return
+            self._snapshots = snapshots
+            self._manifest_stamp = stamp
+            self.reloads += 1
+
+    def publish(self, payloads: dict) -> dict:
+        """
+        Serialize and publish the given snapshots, ``{name: content}``. A
+        None content withdraws the snapshot, so its route falls back to the
+        live query. Other published snapshots are kept as they are.
+
+        The hot copy is swapped even if the files cannot be written, the
+        other workers then keep serving the previous version.
+        """
+        published_at = datetime.now(timezone.utc).isoformat()
+        with self._lock:
+            snapshots = dict(self._snapshots)
+            for name, content in payloads.items():
+                if content is None:
+                    snapshots.pop(name, None)
+                    continue
+                snapshot = Snapshot.of(name, content, published_at)
+                current = snapshots.get(name)
+                if current is None or current.digest != snapshot.digest or current.published_at is None:
+                    snapshots[name] = snapshot
+                else:
+                    current.loaded_at = snapshot.loaded_at
+            try:
+                self._write({name: s for name, s in snapshots.items() if s.published_at is not None})
+            except OSError as e:
+                print(f"Could not write public snapshots to {self.directory}: {e}")
+            self._snapshots = snapshots
+            self._checked_at = time.monotonic()
+        return self.manifest()
+
+    def _write(self, snapshots):
+        os.makedirs(self.directory, exist_ok=True)
+        for snapshot in snapshots.values():
+            path = os.path.join(self.directory, f"{snapshot.name}.{snapshot.digest}.json")
+            if not os.path.exists(path):
+                _write_atomic(path, snapshot.body)
+        manifest = orjson.dumps(self._manifest(snapshots), option=orjson.OPT_INDENT_2)
+        manifest_path = os.path.join(self.directory, MANIFEST)
+        _write_atomic(manifest_path, manifest)
+        stat = os.stat(manifest_path)
+        self._manifest_stamp = (stat.st_mtime_ns, stat.st_size)
+        self._prune(snapshots)
+
+    def _prune(self, snapshots):
+        versions = {}
+        for filename in os.listdir(self.directory):
+            name, dot, rest = filename.partition(".")
+            if not dot or filename == MANIFEST or not rest.endswith(".json"):
+                continue
+            path = os.path.join(self.directory, filename)
+            versions.setdefault(name, []).append((os.stat(path).st_mtime_ns, path))
+        for name, files in versions.items():
+            current = snapshots.get(name)
+            keep = SNAPSHOT_KEEP if current is not None else 0
+            files.sort(reverse=True)
+            for _, path in files[keep:]:
+                if current is None or not path.endswith(f".{current.digest}.json"):
+                    os.unlink(path)
+
+    @staticmethod
+    def _manifest(snapshots):
+        return {
+            name: {
+                "file": f"{name}.{snapshot.digest}.json",
+                "hash": snapshot.digest,
+                "bytes": len(snapshot.body),
+                "published_at": snapshot.published_at,
+            }
+            for name, snapshot in sorted(snapshots.items())
+        }
+
+    def manifest(self):
+        return self._manifest({name: s for name, s in self._snapshots.items() if s.published_at is not None})
+
+
+def snapshot_response(request: Request, snapshot: Snapshot) -> Response:
+    """
+    Serve the snapshot bytes as they are: 304 when the client already has
+    this version, otherwise the body precompressed for its Accept-Encoding.
+    """
+    headers = {
+        "ETag": snapshot.etag,
+        "Cache-Control": f"public, max-age={SNAPSHOT_MAX_AGE}",
+        "Vary": "Accept-Encoding",
+    }
+    if request.headers.get("if-none-match") == snapshot.etag:
+        return Response(status_code=304, headers=headers)
+    encoding = negotiate_encoding(request.headers.get("accept-encoding", ""))
+    if encoding is None or len(snapshot.body) < COMPRESSION_MINIMUM_SIZE:
+        return Response(snapshot.body, media_type="application/json", headers=headers)
+    headers["Content-Encoding"] = encoding
+    return Response(snapshot.encoded(encoding), media_type="application/json", headers=headers)
+
+
+public_snapshots = SnapshotStore()
@@ -0,0 +1,120 @@
+import threading
+from functools import lru_cache
+
+import qrcode
+from qrcode.constants import ERROR_CORRECT_H, ERROR_CORRECT_L, ERROR_CORRECT_M, ERROR_CORRECT_Q
+from qrcode.exceptions import DataOverflowError
+from PIL import Image
+
+
+# Quiet zone required around the code, in modules
+QR_BORDER = 4
+# Largest version (21 + 4 * (version - 1) modules) worth trading error
+# correction for; past it modules get too small for door scanners
+QR_MAX_VERSION = 4
+QR_CACHE_SIZE = 2048
+
+ERROR_CORRECTION_LEVELS = (ERROR_CORRECT_H, ERROR_CORRECT_Q, ERROR_CORRECT_M, ERROR_CORRECT_L)
+
+_encoders = threading.local()
+
+
+def _encoder():
+    """
+    One QRCode encoder per thread, cleared and reused for every payload.
+    """
+    encoder = getattr(_encoders, "encoder", None)
+    if encoder is None:
+        encoder = _encoders.encoder = qrcode.QRCode(border=QR_BORDER, box_size=1)
+    return encoder
+
+
+@lru_cache(maxsize=QR_CACHE_SIZE)
+def qr_matrix(payload: str):
+    """
+    Module matrix of a payload, quiet zone included.
+
+    Uses the highest error correction level that keeps the code within
+    QR_MAX_VERSION, or the lowest one when the payload needs a larger code.
+    Only the version is computed for the levels tried, the modules and the
+    mask are only built for the chosen one.
+    """
+    encoder = _encoder()
+    for error_correction in ERROR_CORRECTION_LEVELS:
+        encoder.clear()
+        encoder.version = None
+        encoder.error_correction = error_correction
+        encoder.add_data(payload)
+        try:
+            version = encoder.best_fit()
+        except DataOverflowError:
+            continue
+        if version <= QR_MAX_VERSION or error_correction == ERROR_CORRECT_L:
+            encoder.make(fit=False)
+            return tuple(tuple(row) for row in encoder.get_matrix())
+    raise ValueError("Payload too large for a QR code")
+
+
+def render_qr(payload: str, size: int) -> Image.Image:
+    """
+    Render a payload as a grayscale QR code of size x size pixels.
+
+    Every module is drawn as a whole number of pixels, with no resampling,
+    and the code is centered with extra quiet zone when size is not a
+    multiple of the module count. Only the module matrix is cached, the
+    rendered tickets themselves are kept by the ticket cache.
+    """
+    matrix = qr_matrix(payload)
+    modules = len(matrix)
+    scale = max(size // modules, 1)
+
+    pixels = bytes(0 if dark else 255 for row in matrix for dark in row)
+    code = Image.frombytes("L", (modules, modules), pixels)
+    code = code.resize((modules * scale, modules * scale), Image.NEAREST)
+    if code.width == size:
+        return code
+
+    img = Image.new("L", (max(size, code.width), max(size, code.width)), 255)
+    offset = (img.width - code.width) // 2
+    img.paste(code, (offset, offset))
+    return img
+
+
+def render_qr_batch(payloads, size: int):
+    """
+    Render several payloads at the same size, reusing this thread's
+    encoder and the matrix cache.
+    """
+    return [render_qr(payload, size) for payload in payloads]
+
+
+if __name__ == "__main__":
+    import os
+    import time
+
+    from utils.ticket_tokens import sign_ticket
+
+    os.environ.setdefault("TICKET_SIGNING_KEY", "benchmark")
+    payloads = [
+        sign_ticket(f"5c663cb9-5b6c-4ff6-a2cf-{i:012d}", f"PYCONTG-2025-{i:06d}")
+        for i in range(300)
+    ]
+
+    start = time.perf_counter()
+    for payload in payloads:
+        qrcode.make(payload).resize((230, 230))
+    legacy = time.perf_counter() - start
+
+    start = time.perf_counter()
+    render_qr_batch(payloads, 230)
+    cold = time.perf_counter() - start
+
+    start = time.perf_counter()
+    render_qr_batch(payloads, 230)
+    warm = time.perf_counter() - start
+
+    version = (len(qr_matrix(payloads[0])) - 2 * QR_BORDER - 17) // 4
+    print(f"version {version}, {len(qr_matrix(payloads[0]))} modules with quiet zone")
+    print(f"qrcode.make + resize : {legacy / len(payloads) * 1000:.2f} ms/code")
+    print(f"render_qr (cold)     : {cold / len(payloads) * 1000:.2f} ms/code")
+    print(f"render_qr (warm)     : {warm / len(payloads) * 1000:.3f} ms/code")
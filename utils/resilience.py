@@ -0,0 +1,314 @@
+"""
+Resilience around Supabase calls.
+
+- a circuit breaker fails calls fast while Supabase is erroring or slow,
+  instead of letting every request hang on it;
+- idempotent reads are retried on transient errors with jittered backoff;
+- public reads remember their last good result, served flagged as stale
+  when the call cannot be made, so public pages keep working during an
+  outage. Never for authentication or reads deciding a write, where an
+  outdated row would grant access or report a write that did not happen.
+
+The per-call deadline itself is the PostgREST client timeout, see config.py.
+"""
+
+import asyncio
+import functools
+import random
+import threading
+import time
+from collections import OrderedDict, deque
+from contextvars import ContextVar
+
+import httpx
+from postgrest.exceptions import APIError
+
+from utils.single_flight import coalesced, copy_result
+
+
+BREAKER_WINDOW = 20
+BREAKER_MIN_CALLS = 10
+BREAKER_FAILURE_RATIO = 0.5
+BREAKER_SLOW_RATIO = 0.8
+BREAKER_OPEN_SECONDS = 15
+SLOW_CALL_SECONDS = 2.0
+
+READ_RETRIES = 2
+RETRY_BASE_DELAY = 0.2
+LAST_GOOD_SIZE = 512
+
+# Server side codes worth retrying: statement timeout, connection
+# exceptions, insufficient resources, and gateway errors
+TRANSIENT_CODES = ("57014", "08", "53", "500", "502", "503", "504")
+
+
+class CircuitOpenError(Exception):
+    def __init__(self, retry_after: float):
+        super().__init__("Database temporarily unavailable")
+        self.retry_after = retry_after
+
+
+def is_transient(error) -> bool:
+    if isinstance(error, (httpx.TransportError, CircuitOpenError)):
+        return True
+    if isinstance(error, APIError):
+        code = str(error.code or "")
+        return any(code.startswith(prefix) for prefix in TRANSIENT_CODES)
+    return False
+
+
+class CircuitBreaker:
+    """
+    Breaker over the outcome of the last ``window`` calls.
+
+    Opens when at least ``failure_ratio`` of them failed with a transient
+    error, or ``slow_ratio`` of them took over ``slow_call`` seconds. After
+    ``open_seconds`` one probe call is let through: its success closes the
+    breaker, its failure opens it again.
+    """
+
+    def __init__(
+        self,
+        window=BREAKER_WINDOW,
+        min_calls=BREAKER_MIN_CALLS,
+        failure_ratio=BREAKER_FAILURE_RATIO,
+        slow_ratio=BREAKER_SLOW_RATIO,
+        slow_call=SLOW_CALL_SECONDS,
+        open_seconds=BREAKER_OPEN_SECONDS,
+    ):
+        self.min_calls = min_calls
+        self.failure_ratio = failure_ratio
+        self.slow_ratio = slow_ratio
+        self.slow_call = slow_call
+        self.open_seconds = open_seconds
+        self._lock = threading.Lock()
+        # (failed, slow) of the last calls
+        self._outcomes = deque(maxlen=window)
+        self._opened_at = None
+        self._probing = False
+        self.state = "closed"
+        self.trips = 0
+        self.rejected = 0
+
+    def allow(self):
+        """
+        Raise CircuitOpenError unless a call may be made now.
+        """
+        with self._lock:
+            if self.state == "closed":
+                return
+            remaining = self._opened_at + self.open_seconds - time.monotonic()
+            if remaining <= 0 and not self._probing:
+                self.state = "half_open"
+                self._probing = True
+                return
+            self.rejected += 1
+            raise CircuitOpenError(max(remaining, 1))
+
+    def record(self, duration: float, error=None):
+        failed = error is not None and is_transient(error)
+        slow = duration >= self.slow_call
+        with self._lock:
+            if self.state == "half_open":
+                self._probing = False
+                if failed or slow:
+                    self._open()
+                else:
+                    self.state = "closed"
+                    self._outcomes.clear()
+                return
+            self._outcomes.append((failed, slow))
+            calls = len(self._outcomes)
+            if self.state == "closed" and calls >= self.min_calls:
+                failures = sum(1 for f, _ in self._outcomes if f)
+                slows = sum(1 for _, s in self._outcomes if s)
+                if failures / calls >= self.failure_ratio or slows / calls >= self.slow_ratio:
+                    self._open()
+
+    def _open(self):
+        self.state = "open"
+        self._opened_at = time.monotonic()
+        self._outcomes.clear()
+        self.trips += 1
+        print("Supabase circuit breaker opened")
+
+    def call(self, fn, *args, **kwargs):
+        self.allow()
+        start = time.monotonic()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            self.record(time.monotonic() - start, e)
+            raise
+        self.record(time.monotonic() - start)
+        return result
+
+    def stats(self):
+        with self._lock:
+            calls = len(self._outcomes)
+            return {
+                "state": self.state,
+                "recent_calls": calls,
+                "recent_failures": sum(1 for f, _ in self._outcomes if f),
+                "recent_slow": sum(1 for _, s in self._outcomes if s),
+                "trips": self.trips,
+                "rejected": self.rejected,
+            }
+
+
+supabase_breaker = CircuitBreaker()
+
+# Set per request by StaleDataMiddleware, filled with the names of the
+# reads served from the last good result
+_stale_reads = ContextVar("stale_reads", default=None)
+
+
+class _LastGood:
+    def __init__(self, size=LAST_GOOD_SIZE):
+        self.size = size
+        self._lock = threading.Lock()
+        self._results = OrderedDict()
+        self.served = 0
+
+    def put(self, key, result):
+        with self._lock:
+            self._results[key] = copy_result(result)
+            self._results.move_to_end(key)
+            while len(self._results) > self.size:
+                self._results.popitem(last=False)
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._results:
+                raise KeyError(key)
+            self.served += 1
+            result = self._results[key]
+        stale = _stale_reads.get()
+        if stale is not None:
+            stale.append(key[0])
+        return copy_result(result)
+
+
+last_good = _LastGood()
+
+
+def _backoff(attempt):
+    return random.uniform(0, RETRY_BASE_DELAY * 2 ** attempt)
+
+
+def guarded(function):
+    """
+    Decorator running a Supabase call through the circuit breaker, for
+    writes: no retry, no fallback.
+    """
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        return supabase_breaker.call(function, *args, **kwargs)
+
+    return wrapper
+
+
+def resilient_read(function=None, *, stale=False):
+    """
+    Decorator for idempotent reads: concurrent identical calls are
+    coalesced, transient failures retried with jitter, and with stale, for
+    public reads only, the last good result is returned when the call still
+    fails.
+    ``function.run_async`` is the async variant, and ``function.fresh``
+    makes the call on its own, for reads that must see a write just made.
+    """
+    if function is None:
+        return functools.partial(resilient_read, stale=stale)
+
+    direct = guarded(function)
+    shared = coalesced(direct)
+
+    def fallback(args, kwargs, error):
+        if stale:
+            try:
+                return last_good.get((function.__name__, args, tuple(sorted(kwargs.items()))))
+            except (KeyError, TypeError):
+                pass
+        raise error
+
+    def remember(args, kwargs, result):
+        if stale:
+            try:
+                last_good.put((function.__name__, args, tuple(sorted(kwargs.items()))), result)
+            except TypeError:
+                pass
+        return result
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        for attempt in range(READ_RETRIES + 1):
+            try:
+                return remember(args, kwargs, shared(*args, **kwargs))
+            except Exception as e:
+                if not is_transient(e):
+                    raise
+                if isinstance(e, CircuitOpenError) or attempt == READ_RETRIES:
+                    return fallback(args, kwargs, e)
+            time.sleep(_backoff(attempt))
+
+    async def run_async(*args, **kwargs):
+        for attempt in range(READ_RETRIES + 1):
+            try:
+                return remember(args, kwargs, await shared.run_async(*args, **kwargs))
+            except Exception as e:
+                if not is_transient(e):
+                    raise
+                if isinstance(e, CircuitOpenError) or attempt == READ_RETRIES:
+                    return fallback(args, kwargs, e)
+            await asyncio.sleep(_backoff(attempt))
+
+    def fresh(*args, **kwargs):
+        # Not joined with the calls in flight, which may predate the write,
+        # and no stale fallback
+        return remember(args, kwargs, direct(*args, **kwargs))
+
+    wrapper.run_async = run_async
+    wrapper.fresh = fresh
+    return wrapper
+
+
+def served_stale() -> bool:
+    """
+    Whether the current request was answered from a stale read so far.
+    """
+    return bool(_stale_reads.get())
+
+
+class StaleDataMiddleware:
+    """
+    ASGI middleware flagging responses built from stale reads with
+    ``X-Data-Stale: true`` and a ``Warning: 110`` header.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stale = []
+        token = _stale_reads.set(stale)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and stale:
+                headers = list(message.get("headers", []))
+                headers.append((b"x-data-stale", b"true"))
+                headers.append((b"warning", b'110 - "Response is Stale"'))
+                message = dict(message, headers=headers)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _stale_reads.reset(token)
+
+
+def resilience_stats():
+    return {"breaker": supabase_breaker.stats(), "stale_served": last_good.served}
@@ -0,0 +1,225 @@
+import gzip
+import json
+import time
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, gzip is always available
+    brotli = None
+
+
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_UUID
+
+COMPRESSION_MINIMUM_SIZE = 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 4
+
+# Already compressed or partial content, compressing them again is wasted work
+UNCOMPRESSIBLE_TYPES = ("image/", "application/pdf", "application/zip", "font/")
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response rendered with orjson.
+
+    Returning it directly from a route skips FastAPI's ``jsonable_encoder``
+    pass, which is the expensive part for the plain dict rows that come back
+    from Supabase. Anything orjson cannot serialize natively goes through
+    ``jsonable_encoder`` as before.
+    """
+
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        try:
+            return orjson.dumps(content, option=ORJSON_OPTIONS)
+        except TypeError:
+            return orjson.dumps(jsonable_encoder(content), option=ORJSON_OPTIONS)
+
+
+def _accepted_encodings(accept_encoding: str) -> dict:
+    """
+    Parse an Accept-Encoding header into a {coding: qvalue} dict.
+    """
+    encodings = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        encodings[coding] = q
+    return encodings
+
+
+def negotiate_encoding(accept_encoding: str):
+    """
+    Pick the best content coding the client accepts, brotli first.
+    Returns None when the body should be sent as is.
+    """
+    encodings = _accepted_encodings(accept_encoding)
+    wildcard = encodings.get("*", 0.0)
+    candidates = ["br", "gzip"] if brotli is not None else ["gzip"]
+    best, best_q = None, 0.0
+    for coding in candidates:
+        q = encodings.get(coding, wildcard)
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+def compress_body(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL)
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware compressing buffered responses with brotli or gzip,
+    depending on the client's Accept-Encoding, once they reach
+    ``minimum_size`` bytes.
+
+    Streaming responses, range responses and already encoded bodies are
+    passed through untouched.
+    """
+
+    def __init__(self, app, minimum_size: int = COMPRESSION_MINIMUM_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start_message, passthrough
+
+            if message["type"] == "http.response.start":
+                start_message = message
+                headers = Headers(raw=message["headers"])
+                content_type = headers.get("content-type", "")
+                passthrough = (
+                    "content-encoding" in headers
+                    or "content-range" in headers
+                    or content_type.startswith(UNCOMPRESSIBLE_TYPES)
+                )
+                return
+
+            if message["type"] != "http.response.body" or start_message is None:
+                await send(message)
+                return
+
+            if passthrough or message.get("more_body", False):
+                # Streaming body, or one we must not touch: flush headers as is
+                if start_message is not None:
+                    await send(start_message)
+                    start_message = None
+                passthrough = True
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            headers = MutableHeaders(raw=start_message["headers"])
+            if len(body) >= self.minimum_size:
+                body = compress_body(body, encoding)
+                headers["Content-Encoding"] = encoding
+                headers["Content-Length"] = str(len(body))
+                headers.add_vary_header("Accept-Encoding")
+            await send(start_message)
+            start_message = None
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_wrapper)
+
+
+def _sample_rows(table: str, count: int) -> list:
+    """
+    Synthetic rows shaped like the registrations and proposals tables.
+    """
+    if table == "registrations":
+        return [
+            {
+                "id": f"5c663cb9-5b6c-4ff6-a2cf-{i:012d}",
+                "created_at": "2025-07-14T09:12:45.123456+00:00",
+                "fullName": f"Attendee Number {i}",
+                "email": "at***m",
+                "phone": "90***1",
+                "organization": "Python Togo" if i % 3 else "",
+                "country": "Togo/Lomé",
+                "tshirtsize": "L",
+                "dietaryrestrictions": "None",
+                "newsletter": True,
+                "codeofconduct": True,
+                "checked": i % 2 == 0,
+                "foodchecked": False,
+            }
+            for i in range(count)
+        ]
+    return [
+        {
+            "id": i,
+            "created_at": "2025-05-02T18:40:03.654321+00:00",
+            "format": "talk",
+            "first_name": "Speaker",
+            "last_name": f"Number {i}",
+            "email": "sp***r",
+            "phone": "90***1",
+            "title": f"An introduction to something interesting #{i}",
+            "level": "beginner",
+            "talk_abstract": "Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * 8,
+            "talk_outline": "1. Intro 2. Body 3. Conclusion " * 6,
+            "bio": "Python developer and community organizer. " * 5,
+            "needs": False,
+            "technical_needs": "",
+            "accepted": i % 4 == 0,
+        }
+        for i in range(count)
+    ]
+
+
+def _timeit(func, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+if __name__ == "__main__":
+    for table in ("registrations", "proposals"):
+        for count in (1000, 5000):
+            rows = _sample_rows(table, count)
+            std = _timeit(lambda: json.dumps(jsonable_encoder(rows)).encode("utf-8"))
+            fast = _timeit(lambda: FastJSONResponse(rows).body)
+            body = FastJSONResponse(rows).body
+            gz = compress_body(body, "gzip")
+            print(f"{table} x{count}")
+            print(f"  jsonable_encoder + json : {std:8.2f} ms")
+            print(f"  orjson                  : {fast:8.2f} ms")
+            print(f"  raw bytes               : {len(body):8d}")
+            print(f"  gzip bytes              : {len(gz):8d}  ({_timeit(lambda: compress_body(body, 'gzip')):.2f} ms)")
+            if brotli is not None:
+                br = compress_body(body, "br")
+                print(f"  brotli bytes            : {len(br):8d}  ({_timeit(lambda: compress_body(body, 'br')):.2f} ms)")
@@ -0,0 +1,149 @@
+import threading
+import time
+
+
+REVIEW_STATS_TTL = 300
+
+
+class ProposalStats:
+    """
+    Running rating statistics for a single proposal (Welford's algorithm).
+    """
+
+    __slots__ = ("count", "mean", "m2", "ratings")
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.ratings = {}
+
+    def add(self, reviewer_id, rate):
+        if reviewer_id in self.ratings:
+            self.remove(reviewer_id)
+        self.ratings[reviewer_id] = rate
+        self.count += 1
+        delta = rate - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (rate - self.mean)
+
+    def remove(self, reviewer_id):
+        rate = self.ratings.pop(reviewer_id, None)
+        if rate is None:
+            return
+        if self.count == 1:
+            self.count, self.mean, self.m2 = 0, 0.0, 0.0
+            return
+        old_mean = self.mean
+        self.count -= 1
+        self.mean = (old_mean * (self.count + 1) - rate) / self.count
+        self.m2 = max(self.m2 - (rate - old_mean) * (rate - self.mean), 0.0)
+
+    @property
+    def variance(self):
+        return self.m2 / self.count if self.count else 0.0
+
+    def as_dict(self):
+        return {
+            "count": self.count,
+            "mean": round(self.mean, 3),
+            "variance": round(self.variance, 3),
+            "reviewers": sorted(self.ratings),
+        }
+
+
+class ReviewAggregator:
+    """
+    In-memory aggregation of proposal reviews.
+
+    Loaded from the ``proposalreviews`` rows and kept up to date by the
+    review routes of this process, so ranking proposals does not rescan the
+    table on every request. Reloaded every ``ttl`` seconds, which brings in
+    the reviews written by other workers or outside the routes.
+    """
+
+    def __init__(self, ttl: int = REVIEW_STATS_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._stats = {}
+        self._reviewers = {}
+        self._loaded_at = None
+
+    @property
+    def loaded(self):
+        return self._loaded_at is not None and time.monotonic() - self._loaded_at < self.ttl
+
+    def load(self, reviews):
+        with self._lock:
+            self._stats = {}
+            self._reviewers = {}
+            for review in reviews or []:
+                self._add(review)
+            self._loaded_at = time.monotonic()
+
+    def reset(self):
+        with self._lock:
+            self._stats = {}
+            self._reviewers = {}
+            self._loaded_at = None
+
+    def add(self, review: dict):
+        # Not loaded, the next load reads this review from the table
+        with self._lock:
+            if self._loaded_at is not None:
+                self._add(review)
+
+    def _add(self, review):
+        proposal_id = review.get("proposal_id")
+        reviewer_id = review.get("reviewer_id")
+        rate = review.get("rate")
+        if proposal_id is None or reviewer_id is None or rate is None:
+            return
+        self._stats.setdefault(proposal_id, ProposalStats()).add(reviewer_id, rate)
+        if review.get("reviewer"):
+            self._reviewers[reviewer_id] = review["reviewer"]
+        else:
+            self._reviewers.setdefault(reviewer_id, None)
+
+    def proposal(self, proposal_id):
+        with self._lock:
+            stats = self._stats.get(proposal_id)
+            return stats.as_dict() if stats else None
+
+    def coverage(self, total_proposals: int = None):
+        """
+        Number of proposals reviewed by each reviewer, and the share of all
+        proposals it represents when ``total_proposals`` is known.
+        """
+        with self._lock:
+            counts = {reviewer_id: 0 for reviewer_id in self._reviewers}
+            for stats in self._stats.values():
+                for reviewer_id in stats.ratings:
+                    counts[reviewer_id] = counts.get(reviewer_id, 0) + 1
+            total = total_proposals or len(self._stats)
+            return [
+                {
+                    "reviewer_id": reviewer_id,
+                    "reviewer": self._reviewers.get(reviewer_id),
+                    "reviewed": reviewed,
+                    "coverage": round(reviewed / total, 3) if total else 0.0,
+                }
+                for reviewer_id, reviewed in sorted(
+                    counts.items(), key=lambda item: item[1], reverse=True
+                )
+            ]
+
+    def ranking(self):
+        """
+        Proposals ordered by mean rate, then by number of reviews.
+        """
+        with self._lock:
+            rows = [
+                {"proposal_id": proposal_id, **stats.as_dict()}
+                for proposal_id, stats in self._stats.items()
+                if stats.count
+            ]
+        return sorted(rows, key=lambda row: (-row["mean"], -row["count"], row["variance"]))
+
+
+review_stats = ReviewAggregator()
@@ -1,6 +1,6 @@
 
 from utils.email_templates import render_email_template
-from utils.ticket import  ticket_system
+from utils.ticket import  ticket_system, ticket_system_many
 from email.message import EmailMessage
 from email.utils import formataddr
 import os
@@ -12,9 +12,10 @@ SENDER_EMAIL_PASSWORD = os.environ.get("SENDER_EMAIL_PASSWORD")
 SMTP_SERVER = os.environ.get("SMTP_SERVER")
 SMTP_SERVER_PORT = os.environ.get("SMTP_SERVER_PORT")
 
-def send_ticket_email(participant_name, participant_email, participant_id, organization="", country_city="Togo/Lomé"):
+def send_ticket_email(participant_name, participant_email, participant_id, organization="", country_city="Togo/Lomé", ref=None, ticket_url=None):
     msg = EmailMessage()
-    ticket_url = ticket_system(data=participant_id, name=participant_name, organization=organization, country_city=country_city)
+    if ticket_url is None:
+        ticket_url = ticket_system(data=participant_id, name=participant_name, organization=organization, country_city=country_city, ref=ref)
     msg['Subject'] = "🎫 Your Ticket | Votre ticket pour le PyCon Togo 2025"
     msg['From'] = formataddr(('PyCon Togo Organizing Team', SENDER_EMAIL))
     msg['To'] = participant_email
@@ -46,6 +47,33 @@ def send_ticket_email(participant_name, participant_email, participant_id, organ
         server.login(SENDER_EMAIL, SENDER_EMAIL_PASSWORD)
         server.send_message(msg)
 
+def send_ticket_emails(registrations):
+    """
+    Send the tickets of several registrations. Tickets are rendered and
+    uploaded concurrently first, then the emails are sent one after the
+    other; a failure is reported and does not stop the others.
+    """
+    sent, failed = 0, 0
+    ticket_urls = ticket_system_many(registrations)
+    for registration, ticket_url in zip(registrations, ticket_urls):
+        try:
+            if isinstance(ticket_url, Exception):
+                raise ticket_url
+            send_ticket_email(
+                registration["fullName"],
+                registration["email"],
+                registration["id"],
+                registration.get("organization") or "",
+                ref=registration.get("ticket_ref"),
+                ticket_url=ticket_url,
+            )
+            sent += 1
+        except Exception as e:
+            failed += 1
+            print(f"Failed to send ticket email to {registration['id']}: {e}")
+    print(f"Ticket emails sent: {sent}, failed: {failed}")
+    return sent, failed
+
 if __name__ == "__main__":
     data = "5c663cb9-5b6c-4ff6-a2cf-0c87f2f5127c"  # Example participant ID
     name = "tester 1"
@@ -0,0 +1,151 @@
+import asyncio
+import functools
+import threading
+from collections import Counter, defaultdict
+from concurrent.futures import Future
+
+
+def copy_result(result):
+    """
+    Copy of a shared result deep enough that a caller sorting the list or
+    changing a row does not affect the other callers.
+    """
+    if isinstance(result, list):
+        return [dict(row) if isinstance(row, dict) else row for row in result]
+    if isinstance(result, dict):
+        return dict(result)
+    return result
+
+
+class SingleFlight:
+    """
+    Collapse concurrent identical calls into one.
+
+    The first caller of a key runs the function, the callers arriving while
+    it is in flight wait for its result instead of running it again. Sync
+    callers block on the shared future, async callers await it without
+    holding a thread, and both kinds share the same in-flight calls.
+    Every caller, the leader included, gets its own copy of the result, so
+    none can change it while the others are still copying it. Nothing is
+    cached once the call returns.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._stats = defaultdict(Counter)
+
+    def _join(self, key):
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+            self._stats[key[0]]["executions" if leader else "coalesced"] += 1
+        return future, leader
+
+    def _run(self, key, future, fn):
+        try:
+            future.set_result(fn())
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+    def do(self, key, fn):
+        """
+        Result of fn(), shared with the identical calls in flight.
+        key is a tuple whose first item names the call in the metrics.
+        """
+        future, leader = self._join(key)
+        if leader:
+            self._run(key, future, fn)
+        return copy_result(future.result())
+
+    async def do_async(self, key, fn):
+        """
+        Same as do(), for coroutines: the leader runs fn in the default
+        executor and every caller awaits the shared future.
+        """
+        future, leader = self._join(key)
+        if leader:
+            asyncio.get_running_loop().run_in_executor(None, self._run, key, future, fn)
+        # Shielded so a cancelled caller does not cancel the others' call
+        result = await asyncio.shield(asyncio.wrap_future(future))
+        return copy_result(result)
+
+    def stats(self):
+        with self._lock:
+            return {
+                name: {
+                    "calls": counts["executions"] + counts["coalesced"],
+                    "executions": counts["executions"],
+                    "coalesced": counts["coalesced"],
+                    "in_flight": sum(1 for key in self._calls if key[0] == name),
+                }
+                for name, counts in self._stats.items()
+            }
+
+
+single_flight = SingleFlight()
+
+
+def coalesced(function):
+    """
+    Decorator sharing one execution of a read between concurrent identical
+    calls. The async variant is available as ``function.run_async``.
+    """
+    def key(args, kwargs):
+        try:
+            call_key = (function.__name__, args, tuple(sorted(kwargs.items())))
+            hash(call_key)
+        except TypeError:
+            return None
+        return call_key
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        call_key = key(args, kwargs)
+        if call_key is None:
+            return function(*args, **kwargs)
+        return single_flight.do(call_key, lambda: function(*args, **kwargs))
+
+    async def run_async(*args, **kwargs):
+        call_key = key(args, kwargs)
+        if call_key is None:
+            return await asyncio.get_running_loop().run_in_executor(
+                None, functools.partial(function, *args, **kwargs)
+            )
+        return await single_flight.do_async(call_key, lambda: function(*args, **kwargs))
+
+    wrapper.run_async = run_async
+    return wrapper
+
+
+if __name__ == "__main__":
+    import time
+
+    calls = Counter()
+
+    @coalesced
+    def slow_query(table):
+        calls[table] += 1
+        time.sleep(0.2)
+        return [{"table": table}]
+
+    threads = [threading.Thread(target=slow_query, args=("speakers",)) for _ in range(100)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    print(f"100 threads: {calls['speakers']} query in {time.perf_counter() - start:.2f} s")
+
+    async def main():
+        start = time.perf_counter()
+        await asyncio.gather(*(slow_query.run_async("sponsors") for _ in range(500)))
+        print(f"500 coroutines: {calls['sponsors']} query in {time.perf_counter() - start:.2f} s")
+
+    asyncio.run(main())
+    print(single_flight.stats())
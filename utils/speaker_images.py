@@ -0,0 +1,169 @@
+import hashlib
+import ipaddress
+import os
+import socket
+from io import BytesIO
+from urllib.parse import urljoin, urlsplit
+
+import cloudinary.utils
+import httpx
+from PIL import Image, ImageOps
+
+from utils.ticket import CLOUDINARY_FOLDER
+from utils.uploader import cloudinary_uploader
+
+
+# Square avatars for the speaker cards and page, banners resized to the
+# widths of the page layout; never upscaled
+AVATAR_SIZES = (96, 256, 512)
+BANNER_WIDTHS = (640, 1280)
+SPEAKER_IMAGES = {
+    "photo_url": ("avatar", AVATAR_SIZES),
+    "banner_url": ("banner", BANNER_WIDTHS),
+}
+WEBP_QUALITY = 80
+WEBP_METHOD = 4
+IMAGE_FETCH_TIMEOUT = float(os.getenv("IMAGE_FETCH_TIMEOUT", "20"))
+IMAGE_MAX_BYTES = 20 * 1024 * 1024
+IMAGE_MAX_REDIRECTS = 3
+# Decompression bomb guard, about 8000 x 6000 pixels
+IMAGE_MAX_PIXELS = 50_000_000
+
+
+class ImageError(Exception):
+    pass
+
+
+def variants_column(field):
+    """
+    Column storing the derivatives of an image column, photo_url -> photo_variants.
+    """
+    return field.rsplit("_", 1)[0] + "_variants"
+
+
+def _check_public_url(url: str):
+    """
+    Refuse anything but https URLs of public hosts: image URLs are entered
+    by staff, and the server must not be made to fetch internal addresses
+    such as the cloud metadata service.
+    """
+    parts = urlsplit(url)
+    if parts.scheme != "https" or not parts.hostname:
+        raise ImageError(f"Only https image URLs are fetched: {url}")
+    try:
+        addresses = socket.getaddrinfo(parts.hostname, parts.port or 443, proto=socket.IPPROTO_TCP)
+    except socket.gaierror as e:
+        raise ImageError(f"Cannot resolve {parts.hostname}: {e}") from e
+    for *_, sockaddr in addresses:
+        address = ipaddress.ip_address(sockaddr[0])
+        if not address.is_global:
+            raise ImageError(f"{parts.hostname} resolves to a non public address")
+
+
+def fetch_image(url: str) -> bytes:
+    """
+    Download an image, following at most IMAGE_MAX_REDIRECTS redirects,
+    every hop being checked like the URL itself.
+    """
+    for _ in range(IMAGE_MAX_REDIRECTS + 1):
+        _check_public_url(url)
+        with httpx.stream("GET", url, timeout=IMAGE_FETCH_TIMEOUT, follow_redirects=False) as response:
+            if response.is_redirect:
+                url = urljoin(url, response.headers["location"])
+                continue
+            if response.status_code != 200:
+                raise ImageError(f"GET {url}: HTTP {response.status_code}")
+            content = bytearray()
+            for chunk in response.iter_bytes():
+                content += chunk
+                if len(content) > IMAGE_MAX_BYTES:
+                    raise ImageError(f"{url} is larger than {IMAGE_MAX_BYTES} bytes")
+            return bytes(content)
+    raise ImageError(f"Too many redirects fetching {url}")
+
+
+def _open(content: bytes, covering) -> Image.Image:
+    try:
+        img = Image.open(BytesIO(content))
+        if img.width * img.height > IMAGE_MAX_PIXELS:
+            raise ImageError(f"Image of {img.width}x{img.height} pixels is too large")
+        # JPEGs are decoded straight at the smallest scale still covering
+        # the largest derivative, much faster than decoding then resizing
+        img.draft("RGB", covering)
+        # Phone pictures are often stored sideways with an EXIF orientation
+        img = ImageOps.exif_transpose(img)
+    except (OSError, Image.DecompressionBombError) as e:
+        raise ImageError(f"Not a readable image: {e}") from e
+    return img.convert("RGBA" if img.mode in ("RGBA", "LA", "P") else "RGB")
+
+
+def _encode_webp(img: Image.Image) -> bytes:
+    buffer = BytesIO()
+    img.save(buffer, format="WEBP", quality=WEBP_QUALITY, method=WEBP_METHOD)
+    return buffer.getvalue()
+
+
+def image_derivatives(content: bytes, kind: str, sizes) -> dict:
+    """
+    WebP derivatives of an image, {size: bytes}: centred square crops for
+    avatars, same aspect ratio resizes for banners.
+    """
+    largest = max(sizes)
+    img = _open(content, (largest, largest) if kind == "avatar" else (largest, 1))
+    derivatives = {}
+    for size in sizes:
+        if kind == "avatar":
+            side = min(size, img.width, img.height)
+            resized = ImageOps.fit(img, (side, side), Image.LANCZOS)
+        else:
+            width = min(size, img.width)
+            resized = img.resize((width, round(img.height * width / img.width)), Image.LANCZOS)
+        derivatives[size] = _encode_webp(resized)
+    return derivatives
+
+
+def _cloudinary_url(public_id):
+    url, _ = cloudinary.utils.cloudinary_url(
+        f"{CLOUDINARY_FOLDER}/{public_id}", secure=True, format="webp", resource_type="image"
+    )
+    return url
+
+
+def generate_speaker_images(speaker_id, field, url) -> dict:
+    """
+    Download the image of a speaker's photo_url or banner_url, build its
+    derivatives and upload them to Cloudinary. Returns {size: url}.
+
+    Public ids carry the hash of the source, so regenerating the
+    derivatives of the same image reuses the uploaded ones.
+    """
+    kind, sizes = SPEAKER_IMAGES[field]
+    content = fetch_image(url)
+    digest = hashlib.sha256(content).hexdigest()[:16]
+    uploads = []
+    for size, derivative in image_derivatives(content, kind, sizes).items():
+        public_id = f"speakers/{speaker_id}/{kind}-{size}-{digest}"
+        uploads.append((derivative, public_id, _cloudinary_url(public_id)))
+    results = cloudinary_uploader.upload_many_sync(uploads, CLOUDINARY_FOLDER)
+    variants = {}
+    for size, result in zip(sizes, results):
+        if isinstance(result, Exception):
+            raise result
+        variants[str(size)] = result["secure_url"]
+    return variants
+
+
+if __name__ == "__main__":
+    import time
+
+    source = Image.new("RGB", (3000, 2000))
+    source.putdata([(x % 256, y % 256, (x * y) % 256) for y in range(2000) for x in range(3000)])
+    buffer = BytesIO()
+    source.save(buffer, format="JPEG", quality=92)
+    content = buffer.getvalue()
+    print(f"original jpeg: {len(content)} bytes")
+    for kind, sizes in SPEAKER_IMAGES.values():
+        start = time.perf_counter()
+        derivatives = image_derivatives(content, kind, sizes)
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"{kind}: " + ", ".join(f"{size}: {len(data)} bytes" for size, data in derivatives.items()) + f" ({elapsed:.0f} ms)")
@@ -1,15 +1,17 @@
 
-import qrcode
 import os
 import cloudinary
-import cloudinary.uploader
+import cloudinary.utils
 from io import BytesIO
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import A6
 from PIL import Image, ImageDraw, ImageFont
 
 from dotenv import load_dotenv
 
+from utils.qr import render_qr
+from utils.ticket_cache import content_key, ticket_cache
+from utils.ticket_tokens import sign_ticket
+from utils.uploader import cloudinary_uploader
+
 
 load_dotenv()
 
@@ -23,12 +25,43 @@ cloudinary.config(
 
 
 
+CLOUDINARY_FOLDER = "pycon2025"
+# Upload rendered tickets to Cloudinary and link them in emails, otherwise
+# emails link the API's own ticket route under TICKET_BASE_URL
+CLOUDINARY_MIRROR = os.getenv("CLOUDINARY_MIRROR", "true").lower() == "true"
+TICKET_BASE_URL = os.getenv("TICKET_BASE_URL", "")
+
+# Bump when the ticket layout changes so cached renderings are not reused
+TICKET_LAYOUT_VERSION = 1
+# Output formats of a ticket, by file extension:
+# - png: full ticket, RGB, for printing
+# - min.png: full ticket, 64 colours palette, for emails and mobile data
+# - webp: full ticket, lossless WebP
+# - pdf: full ticket, for printing
+# - scanner.png / scanner.webp: only the QR code and the reference
+TICKET_FORMATS = {
+    "png": {"media_type": "image/png", "variant": "full", "encoding": "png"},
+    "min.png": {"media_type": "image/png", "variant": "full", "encoding": "palette"},
+    "webp": {"media_type": "image/webp", "variant": "full", "encoding": "webp"},
+    "pdf": {"media_type": "application/pdf", "variant": "full", "encoding": "pdf"},
+    "scanner.png": {"media_type": "image/png", "variant": "scanner", "encoding": "palette"},
+    "scanner.webp": {"media_type": "image/webp", "variant": "scanner", "encoding": "webp"},
+}
+TICKET_EMAIL_FORMAT = os.getenv("TICKET_EMAIL_FORMAT", "min.png")
+
+PALETTE_COLORS = 64
+PNG_COMPRESS_LEVEL = 6
+# Lossless WebP: quality is the compression effort, method 2 with effort 0
+# is several times faster than the defaults for a few % more bytes
+WEBP_METHOD = 2
+WEBP_EFFORT = 0
+
+
 FONT_PATH = "static/fonts/Roboto-VariableFont_wdth,wght.ttf" 
 font_title = ImageFont.truetype(FONT_PATH, 50)
 font_text = ImageFont.truetype(FONT_PATH, 30)
 
 from PIL import Image, ImageDraw, ImageFont
-import qrcode
 
 
 def generate_ticket_image(data, name, ref, organization, country_city="Togo/Lomé"):
@@ -45,7 +78,7 @@ def generate_ticket_image(data, name, ref, organization, country_city="Togo/Lom
         draw.text((50, 300), f"Company/Community : {organization}", fill="black", font=font_text)
 
 
-    qr = qrcode.make(data).resize((230, 230))
+    qr = render_qr(data, 230)
     img.paste(qr, (900, 150))
 
     draw.line((50, 400, 1150, 400), fill="black", width=2)
@@ -88,22 +121,176 @@ def generate_ticket_image(data, name, ref, organization, country_city="Togo/Lom
     return img
 
 
-def upload_ticket_to_cloudinary(pil_img, filename):
+def generate_scanner_image(data, ref):
+    """
+    Minimal ticket with only the QR code and the reference, for scanning
+    from a phone screen.
+    """
+    qr = render_qr(data, 410)
+    img = Image.new("L", (qr.width, qr.height + 60), 255)
+    img.paste(qr, (0, 0))
+    draw = ImageDraw.Draw(img)
+    text_width = draw.textlength(ref, font=font_text)
+    draw.text(((img.width - text_width) // 2, qr.height), ref, fill=0, font=font_text)
+    return img
+
+
+def encode_ticket(pil_img, fmt="png"):
+    """
+    Encode a ticket image in one of the TICKET_FORMATS.
+    """
+    encoding = TICKET_FORMATS[fmt]["encoding"]
     buffer = BytesIO()
-    pil_img.save(buffer, format="PNG")
-    buffer.seek(0)
-    result = cloudinary.uploader.upload(buffer, public_id=f"tickets/{filename}", folder="pycon2025", resource_type="image")
+    if encoding == "pdf":
+        pil_img.convert("RGB").save(buffer, format="PDF", resolution=150)
+    elif encoding == "palette":
+        if pil_img.mode == "L":
+            # Black and white scanner tickets only need 1 bit per pixel
+            pil_img = pil_img.point(lambda value: 255 if value > 127 else 0, mode="1")
+        else:
+            pil_img = pil_img.quantize(
+                colors=PALETTE_COLORS,
+                method=Image.Quantize.FASTOCTREE,
+                dither=Image.Dither.NONE,
+            )
+        pil_img.save(buffer, format="PNG", compress_level=PNG_COMPRESS_LEVEL)
+    elif encoding == "webp":
+        pil_img.save(buffer, format="WEBP", lossless=True, quality=WEBP_EFFORT, method=WEBP_METHOD)
+    else:
+        pil_img.save(buffer, format="PNG", compress_level=PNG_COMPRESS_LEVEL)
+    return buffer.getvalue()
+
+
+def render_ticket(data, name, ref, organization, country_city="Togo/Lomé", fmt="png"):
+    """
+    Render a ticket, or reuse the cached rendering of the same inputs.
+
+    Returns the content hash of the ticket and the path of the cached file.
+    """
+    token = sign_ticket(data, ref)
+    key = content_key(
+        version=TICKET_LAYOUT_VERSION,
+        token=token,
+        name=name,
+        ref=ref,
+        organization=organization or "",
+        country_city=country_city,
+        format=fmt,
+    )
+    path = ticket_cache.get(key, fmt)
+    if path is None:
+        if TICKET_FORMATS[fmt]["variant"] == "scanner":
+            ticket_img = generate_scanner_image(token, ref)
+        else:
+            ticket_img = generate_ticket_image(token, name, ref, organization, country_city)
+        path = ticket_cache.put(key, fmt, encode_ticket(ticket_img, fmt))
+    ticket_cache.remember(str(data), fmt, key)
+    return key, path
+
+
+def _cloudinary_url(public_id, extension="png"):
+    url, _ = cloudinary.utils.cloudinary_url(
+        f"{CLOUDINARY_FOLDER}/{public_id}", secure=True, format=extension, resource_type="image"
+    )
+    return url
+
+
+def _mirror_args(content, filename, digest=None, extension="png"):
+    public_id = f"tickets/{filename}-{digest[:16]}" if digest else f"tickets/{filename}"
+    existing_url = _cloudinary_url(public_id, extension) if digest else None
+    return content, public_id, existing_url
+
+
+def upload_ticket_to_cloudinary(content, filename, digest=None, extension="png"):
+    """
+    Mirror a rendered ticket on Cloudinary. With the content hash, the
+    public id is tied to the content and the upload is skipped when the
+    same ticket is already there.
+    """
+    content, public_id, existing_url = _mirror_args(content, filename, digest, extension)
+    result = cloudinary_uploader.upload_sync(
+        content, public_id, CLOUDINARY_FOLDER, existing_url=existing_url
+    )
     return result["secure_url"]
 
 
 
-def ticket_system(data=None, name=None, organization=None, country_city="Togo/Lomé"):
-    ref = generate_ticket_reference(data)
-    ticket_img = generate_ticket_image(data, name, ref, organization, country_city)
-    ticket_url = upload_ticket_to_cloudinary(ticket_img, ref)
+def ticket_system(data=None, name=None, organization=None, country_city="Togo/Lomé", ref=None):
+    ref = ref or generate_ticket_reference(data)
+    key, path = render_ticket(data, name, ref, organization, country_city, TICKET_EMAIL_FORMAT)
+    if not CLOUDINARY_MIRROR:
+        return f"{TICKET_BASE_URL}/api/tickets/{data}.{TICKET_EMAIL_FORMAT}"
+    with open(path, "rb") as f:
+        ticket_url = upload_ticket_to_cloudinary(
+            f.read(), ref, key, TICKET_EMAIL_FORMAT.rsplit(".", 1)[-1]
+        )
     return ticket_url
 
+
+def ticket_system_many(participants):
+    """
+    Render the tickets of several participants and mirror them on
+    Cloudinary concurrently.
+
+    participants are registration rows (id, fullName, organization,
+    ticket_ref). Returns the ticket URL of each participant, or the
+    exception raised for it.
+    """
+    extension = TICKET_EMAIL_FORMAT.rsplit(".", 1)[-1]
+    rendered = []
+    for participant in participants:
+        ref = participant.get("ticket_ref") or generate_ticket_reference(participant["id"])
+        key, path = render_ticket(
+            participant["id"],
+            participant.get("fullName"),
+            ref,
+            participant.get("organization"),
+            fmt=TICKET_EMAIL_FORMAT,
+        )
+        rendered.append((participant["id"], ref, key, path))
+
+    if not CLOUDINARY_MIRROR:
+        return [
+            f"{TICKET_BASE_URL}/api/tickets/{participant_id}.{TICKET_EMAIL_FORMAT}"
+            for participant_id, _, _, _ in rendered
+        ]
+
+    uploads = []
+    for _, ref, key, path in rendered:
+        with open(path, "rb") as f:
+            uploads.append(_mirror_args(f.read(), ref, key, extension))
+    results = cloudinary_uploader.upload_many_sync(uploads, CLOUDINARY_FOLDER)
+    return [
+        result if isinstance(result, Exception) else result["secure_url"]
+        for result in results
+    ]
+
 def generate_ticket_reference(participant_id):
+    """
+    Reference of the tickets sent before references were allocated and
+    stored on the registration, derived from the UUID.
+    """
     short_part = str(participant_id).split("-")[0][:6].upper()  
     return f"PYCONTG-2025-{short_part}"
 
+
+if __name__ == "__main__":
+    import time
+
+    os.environ.setdefault("TICKET_SIGNING_KEY", "benchmark")
+    participant_id = "5c663cb9-5b6c-4ff6-a2cf-0c87f2f5127c"
+    ref = "PYCONTG-2025-ABCDEF"
+    token = sign_ticket(participant_id, ref)
+    images = {
+        "full": generate_ticket_image(token, "Tester One", ref, "Python Togo"),
+        "scanner": generate_scanner_image(token, ref),
+    }
+    print(f"{'format':<14}{'bytes':>10}{'encode ms':>12}")
+    for fmt, spec in TICKET_FORMATS.items():
+        img = images[spec["variant"]]
+        best = float("inf")
+        for _ in range(5):
+            start = time.perf_counter()
+            content = encode_ticket(img, fmt)
+            best = min(best, time.perf_counter() - start)
+        print(f"{fmt:<14}{len(content):>10}{best * 1000:>12.1f}")
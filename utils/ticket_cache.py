@@ -0,0 +1,121 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+from dotenv import load_dotenv
+
+
+load_dotenv()
+
+TICKET_CACHE_DIR = os.getenv(
+    "TICKET_CACHE_DIR", os.path.join(tempfile.gettempdir(), "pycontg-tickets")
+)
+TICKET_CACHE_MAX_BYTES = int(os.getenv("TICKET_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+
+
+def content_key(**inputs) -> str:
+    """
+    Hash of everything a rendered ticket depends on.
+    """
+    payload = json.dumps(inputs, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class TicketCache:
+    """
+    Content-addressed disk cache of rendered tickets.
+
+    Files are named after the hash of their inputs, so an entry never needs
+    to be invalidated: changing the inputs changes the key. The least
+    recently used files are deleted once the cache grows over ``max_bytes``.
+    """
+
+    def __init__(self, directory: str = TICKET_CACHE_DIR, max_bytes: int = TICKET_CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._size = 0
+        # registration id and format -> key of the last rendering
+        self._latest = {}
+        os.makedirs(directory, exist_ok=True)
+        self._scan()
+
+    def _scan(self):
+        files = []
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if name.startswith(".") or not os.path.isfile(path):
+                continue
+            stat = os.stat(path)
+            files.append((stat.st_atime, name, stat.st_size))
+        for _, name, size in sorted(files):
+            self._entries[name] = size
+            self._size += size
+
+    def path(self, key: str, extension: str) -> str:
+        return os.path.join(self.directory, f"{key}.{extension}")
+
+    def get(self, key: str, extension: str):
+        """
+        Path of a cached file, or None. Marks the entry as recently used.
+        """
+        name = f"{key}.{extension}"
+        with self._lock:
+            if name not in self._entries:
+                return None
+            self._entries.move_to_end(name)
+        path = self.path(key, extension)
+        return path if os.path.exists(path) else None
+
+    def put(self, key: str, extension: str, content: bytes) -> str:
+        name = f"{key}.{extension}"
+        path = self.path(key, extension)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=".")
+        with os.fdopen(fd, "wb") as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+        with self._lock:
+            self._size -= self._entries.pop(name, 0)
+            self._entries[name] = len(content)
+            self._size += len(content)
+            self._evict()
+        return path
+
+    def _evict(self):
+        while self._size > self.max_bytes and len(self._entries) > 1:
+            name, size = self._entries.popitem(last=False)
+            self._size -= size
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+
+    def remember(self, registration_id: str, extension: str, key: str):
+        with self._lock:
+            self._latest[(registration_id, extension)] = key
+
+    def latest(self, registration_id: str, extension: str):
+        """
+        Key of the last rendering of a registration's ticket, if still cached.
+        """
+        with self._lock:
+            key = self._latest.get((registration_id, extension))
+        if key and self.get(key, extension):
+            return key
+        return None
+
+    def forget(self, registration_id: str):
+        with self._lock:
+            for cache_key in [k for k in self._latest if k[0] == registration_id]:
+                del self._latest[cache_key]
+
+    @property
+    def size(self):
+        return self._size
+
+
+ticket_cache = TicketCache()
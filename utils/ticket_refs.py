@@ -0,0 +1,72 @@
+import secrets
+import threading
+import time
+
+
+REF_PREFIX = "PYCONTG-2025-"
+# No 0/O or 1/I, references are read aloud and typed by the help desk
+REF_ALPHABET = "23456789ABCDEFGHJKLMNPQRSTUVWXYZ"
+REF_LENGTH = 6
+REF_INDEX_TTL = 600
+
+
+def normalize_ticket_reference(ref: str) -> str:
+    ref = (ref or "").strip().upper()
+    if not ref.startswith(REF_PREFIX):
+        ref = REF_PREFIX + ref
+    return ref
+
+
+def allocate_ticket_reference(is_taken, attempts: int = 10) -> str:
+    """
+    Draw a random reference that is_taken reports as free.
+
+    With 32^6 possible references a collision is already unlikely, checking
+    makes it impossible; the unique index on ticket_ref covers references
+    allocated at the same time by another instance.
+    """
+    for _ in range(attempts):
+        ref = REF_PREFIX + "".join(secrets.choice(REF_ALPHABET) for _ in range(REF_LENGTH))
+        if not is_taken(ref):
+            return ref
+    raise RuntimeError("Could not allocate a free ticket reference")
+
+
+class TicketRefIndex:
+    """
+    In-process ticket reference -> registration id map, warmed with one
+    paged query and refreshed every ``ttl`` seconds.
+    """
+
+    def __init__(self, ttl: int = REF_INDEX_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._ids = {}
+        self._loaded_at = None
+
+    @property
+    def warm(self):
+        return self._loaded_at is not None and time.monotonic() - self._loaded_at < self.ttl
+
+    def load(self, rows):
+        ids = {row["ticket_ref"]: row["id"] for row in rows if row.get("ticket_ref")}
+        with self._lock:
+            self._ids = ids
+            self._loaded_at = time.monotonic()
+
+    def invalidate(self):
+        with self._lock:
+            self._loaded_at = None
+
+    def add(self, ref: str, registration_id: str):
+        with self._lock:
+            self._ids[ref] = registration_id
+
+    def get(self, ref: str):
+        return self._ids.get(ref)
+
+    def __contains__(self, ref: str):
+        return ref in self._ids
+
+
+ticket_refs = TicketRefIndex()
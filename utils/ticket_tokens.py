@@ -0,0 +1,104 @@
+"""
+Signed ticket tokens encoded in the ticket QR codes.
+
+A token carries the registration id and the ticket reference, signed with
+HMAC-SHA256, so a scanner holding the signing key can tell a genuine ticket
+without asking the API. The module only depends on the standard library and
+can be copied as is on scanner devices.
+
+Layout before encoding:
+    version (1 byte) | registration UUID (16 bytes) | ref length (1 byte)
+    | ref (ascii) | truncated HMAC (12 bytes)
+
+The bytes are base32 encoded without padding, which only uses characters of
+the QR alphanumeric mode and keeps the QR code at a small version.
+"""
+
+import base64
+import hashlib
+import hmac
+import os
+from uuid import UUID
+
+
+TOKEN_VERSION = 1
+SIGNATURE_SIZE = 12
+REF_PREFIX = "PYCONTG-2025-"
+
+
+class InvalidTicketToken(ValueError):
+    pass
+
+
+def _key(key):
+    key = key if key is not None else os.getenv("TICKET_SIGNING_KEY")
+    if not key:
+        raise RuntimeError("TICKET_SIGNING_KEY is not configured")
+    return key.encode("utf-8") if isinstance(key, str) else key
+
+
+def _signature(body: bytes, key) -> bytes:
+    return hmac.new(_key(key), body, hashlib.sha256).digest()[:SIGNATURE_SIZE]
+
+
+def sign_ticket(registration_id, ref: str, key=None) -> str:
+    """
+    Build the signed token for a registration id and its ticket reference.
+    """
+    short_ref = ref[len(REF_PREFIX):] if ref.startswith(REF_PREFIX) else ref
+    ref_bytes = short_ref.encode("ascii")
+    body = (
+        bytes([TOKEN_VERSION])
+        + UUID(str(registration_id)).bytes
+        + bytes([len(ref_bytes)])
+        + ref_bytes
+    )
+    token = body + _signature(body, key)
+    return base64.b32encode(token).decode("ascii").rstrip("=")
+
+
+def verify_ticket(token: str, key=None) -> dict:
+    """
+    Check a token's signature and return its registration id and reference.
+
+    Raises InvalidTicketToken when the token is malformed or forged.
+    """
+    token = token.strip().upper()
+    try:
+        raw = base64.b32decode(token + "=" * (-len(token) % 8))
+    except (ValueError, TypeError):
+        raise InvalidTicketToken("Malformed ticket token")
+
+    if len(raw) < 18 + SIGNATURE_SIZE or raw[0] != TOKEN_VERSION:
+        raise InvalidTicketToken("Unsupported ticket token")
+
+    body, signature = raw[:-SIGNATURE_SIZE], raw[-SIGNATURE_SIZE:]
+    if not hmac.compare_digest(signature, _signature(body, key)):
+        raise InvalidTicketToken("Invalid ticket signature")
+
+    ref_length = body[17]
+    short_ref = body[18:18 + ref_length]
+    if len(short_ref) != ref_length or len(body) != 18 + ref_length:
+        raise InvalidTicketToken("Malformed ticket token")
+
+    return {
+        "id": str(UUID(bytes=body[1:17])),
+        "ref": REF_PREFIX + short_ref.decode("ascii"),
+    }
+
+
+def is_legacy_ticket(data: str) -> bool:
+    """
+    Tickets sent before signed tokens only held the registration UUID.
+    """
+    try:
+        UUID(data.strip())
+        return True
+    except ValueError:
+        return False
+
+
+if __name__ == "__main__":
+    token = sign_ticket("5c663cb9-5b6c-4ff6-a2cf-0c87f2f5127c", "PYCONTG-2025-5C663C", key="test")
+    print(token, len(token))
+    print(verify_ticket(token, key="test"))
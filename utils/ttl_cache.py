@@ -0,0 +1,58 @@
+import threading
+import time
+
+
+class TTLCache:
+    """
+    Small in-process cache whose entries expire ``ttl`` seconds after being
+    stored, for query results that are read far more often than they change.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = {}
+        # Bumped by invalidate(), so a load started before it cannot store
+        # its result afterwards
+        self._generation = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None or time.monotonic() - entry[0] >= self.ttl:
+            return default
+        return entry[1]
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+        return value
+
+    def get_or_load(self, key, loader):
+        """
+        Cached value of key, calling loader() to refresh it when missing or
+        expired. The loaded value is not stored if the cache was invalidated
+        while loading, it may predate the write that invalidated it.
+        """
+        value = self.get(key, _missing)
+        if value is _missing:
+            generation = self._generation
+            value = loader()
+            with self._lock:
+                if generation == self._generation:
+                    self._entries[key] = (time.monotonic(), value)
+        return value
+
+    def invalidate(self, key=None):
+        """
+        Drop one entry, or every entry when no key is given.
+        """
+        with self._lock:
+            self._generation += 1
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+
+_missing = object()
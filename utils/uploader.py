@@ -0,0 +1,193 @@
+import asyncio
+import os
+import random
+import threading
+import time
+
+import httpx
+from cloudinary.utils import api_sign_request
+from dotenv import load_dotenv
+
+
+load_dotenv()
+
+CLOUDINARY_API_URL = os.getenv("CLOUDINARY_API_URL", "https://api.cloudinary.com/v1_1")
+CLOUDINARY_UPLOAD_CONCURRENCY = int(os.getenv("CLOUDINARY_UPLOAD_CONCURRENCY", "8"))
+CLOUDINARY_TIMEOUT = float(os.getenv("CLOUDINARY_TIMEOUT", "20"))
+CLOUDINARY_RETRIES = 3
+RETRY_BASE_DELAY = 0.5
+
+TRANSIENT_STATUSES = {408, 420, 429, 500, 502, 503, 504}
+
+
+class UploadError(Exception):
+    pass
+
+
+def _upload_args(upload, folder, resource_type):
+    content, public_id, *rest = upload
+    return content, public_id, folder, resource_type, rest[0] if rest else None
+
+
+class CloudinaryUploader:
+    """
+    Cloudinary uploads over one pooled keep-alive HTTP client.
+
+    The client lives on a dedicated event loop thread, so the same pool and
+    concurrency limit are shared by async callers (``await upload(...)``),
+    sync route handlers and background tasks (``upload_sync(...)``).
+    Transient failures are retried with exponential backoff and full jitter.
+    """
+
+    def __init__(
+        self,
+        cloud_name=None,
+        api_key=None,
+        api_secret=None,
+        api_url=CLOUDINARY_API_URL,
+        concurrency=CLOUDINARY_UPLOAD_CONCURRENCY,
+        timeout=CLOUDINARY_TIMEOUT,
+        retries=CLOUDINARY_RETRIES,
+    ):
+        self.cloud_name = cloud_name or os.getenv("CLOUDINARY_CLOUD_NAME")
+        self.api_key = api_key or os.getenv("CLOUDINARY_API_KEY")
+        self.api_secret = api_secret or os.getenv("CLOUDINARY_API_SECRET")
+        self.api_url = api_url.rstrip("/")
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.retries = retries
+        self._lock = threading.Lock()
+        self._loop = None
+        self._client = None
+        self._semaphore = None
+
+    def _start(self):
+        with self._lock:
+            if self._loop is not None:
+                return self._loop
+            loop = asyncio.new_event_loop()
+            ready = threading.Event()
+
+            def run():
+                asyncio.set_event_loop(loop)
+                self._client = httpx.AsyncClient(
+                    timeout=self.timeout,
+                    limits=httpx.Limits(
+                        max_connections=self.concurrency,
+                        max_keepalive_connections=self.concurrency,
+                    ),
+                )
+                self._semaphore = asyncio.Semaphore(self.concurrency)
+                loop.call_soon(ready.set)
+                loop.run_forever()
+
+            threading.Thread(target=run, name="cloudinary-uploader", daemon=True).start()
+            ready.wait()
+            self._loop = loop
+            return loop
+
+    def _submit(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self._start())
+
+    def _signed_params(self, public_id, folder):
+        params = {"timestamp": int(time.time())}
+        if public_id:
+            params["public_id"] = public_id
+        if folder:
+            params["folder"] = folder
+        params["signature"] = api_sign_request(params, self.api_secret)
+        params["api_key"] = self.api_key
+        return params
+
+    async def _request(self, method, url, **kwargs):
+        for attempt in range(self.retries + 1):
+            try:
+                async with self._semaphore:
+                    response = await self._client.request(method, url, **kwargs)
+                if response.status_code not in TRANSIENT_STATUSES:
+                    return response
+                error = UploadError(f"{method} {url}: HTTP {response.status_code}")
+            except httpx.TransportError as e:
+                error = e
+            if attempt == self.retries:
+                raise error
+            await asyncio.sleep(random.uniform(0, RETRY_BASE_DELAY * 2 ** attempt))
+
+    async def _upload(self, content, public_id, folder, resource_type, existing_url=None):
+        if existing_url and await self._exists(existing_url):
+            return {"secure_url": existing_url, "public_id": public_id, "existing": True}
+        url = f"{self.api_url}/{self.cloud_name}/{resource_type}/upload"
+        response = await self._request(
+            "POST",
+            url,
+            data=self._signed_params(public_id, folder),
+            files={"file": (public_id or "upload", content)},
+        )
+        if response.status_code != 200:
+            raise UploadError(f"Upload of {public_id} failed: HTTP {response.status_code} {response.text}")
+        return response.json()
+
+    async def _exists(self, url):
+        try:
+            response = await self._request("HEAD", url)
+        except (httpx.TransportError, UploadError):
+            return False
+        return response.status_code == 200
+
+    async def upload(self, content: bytes, public_id=None, folder=None, resource_type="image", existing_url=None):
+        """
+        Upload bytes, returns Cloudinary's response (secure_url, public_id...).
+
+        With existing_url, the upload is skipped when that URL already
+        answers, e.g. for a public id derived from the content hash.
+        """
+        return await asyncio.wrap_future(
+            self._submit(self._upload(content, public_id, folder, resource_type, existing_url))
+        )
+
+    async def upload_many(self, uploads, folder=None, resource_type="image"):
+        """
+        Upload (content, public_id[, existing_url]) tuples concurrently, at
+        most ``concurrency`` at a time. Failed uploads are returned as
+        exceptions.
+        """
+        return await asyncio.gather(
+            *(self.upload(*_upload_args(upload, folder, resource_type)) for upload in uploads),
+            return_exceptions=True,
+        )
+
+    async def exists(self, url):
+        return await asyncio.wrap_future(self._submit(self._exists(url)))
+
+    def upload_sync(self, content: bytes, public_id=None, folder=None, resource_type="image", existing_url=None):
+        return self._submit(
+            self._upload(content, public_id, folder, resource_type, existing_url)
+        ).result()
+
+    def upload_many_sync(self, uploads, folder=None, resource_type="image"):
+        futures = [
+            self._submit(self._upload(*_upload_args(upload, folder, resource_type)))
+            for upload in uploads
+        ]
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                results.append(e)
+        return results
+
+    def exists_sync(self, url):
+        return self._submit(self._exists(url)).result()
+
+    def close(self):
+        with self._lock:
+            loop, self._loop = self._loop, None
+        if loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self._client.aclose(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+
+
+cloudinary_uploader = CloudinaryUploader()
+